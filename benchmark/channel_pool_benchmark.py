@@ -0,0 +1,71 @@
+"""
+Per-message latency of small control messages (types 100/101) when a fresh channel is
+opened for every send versus when the pooled channel of ``gRPCCommunicationManager`` is
+reused.
+
+    python -m benchmark.channel_pool_benchmark --num_messages 200
+"""
+import argparse
+import statistics
+import time
+
+from communication.communicator import gRPCCommunicationManager
+from communication.message import Message
+
+
+def control_messages(num_messages: int):
+    for i in range(num_messages):
+        if i % 2 == 0:
+            yield Message(message_type=100, sender="1", receiver="0", content={"ip": "127.0.0.1", "port": "50052"})
+        else:
+            yield Message(message_type=101, sender="0", receiver="1", content="")
+
+
+def send_with_fresh_channel(sender: gRPCCommunicationManager, address: str, message: Message):
+    stub, channel = sender._create_stub(address)
+    try:
+        stub.sendMessage(message.encode())
+    finally:
+        channel.close()
+
+
+def send_with_pooled_channel(sender: gRPCCommunicationManager, address: str, message: Message):
+    sender.channel_pool.get_stub(address).sendMessage(message.encode())
+
+
+def measure(send_func, sender, receiver, address, num_messages):
+    latencies = []
+    for message in control_messages(num_messages):
+        start = time.perf_counter()
+        send_func(sender, address, message)
+        latencies.append(time.perf_counter() - start)
+        receiver.receive()
+    return latencies
+
+
+def summarize(name, latencies):
+    latencies = sorted(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{name:>8}: mean {statistics.mean(latencies) * 1e3:.3f} ms, "
+          f"p50 {statistics.median(latencies) * 1e3:.3f} ms, p99 {p99 * 1e3:.3f} ms")
+    return statistics.mean(latencies)
+
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--ip', type=str, default='127.0.0.1')
+parser.add_argument('--sender_port', type=str, default='50061')
+parser.add_argument('--receiver_port', type=str, default='50062')
+parser.add_argument('--num_messages', type=int, default=200)
+if __name__ == '__main__':
+    args = parser.parse_args()
+    sender = gRPCCommunicationManager(ip=args.ip, port=args.sender_port)
+    receiver = gRPCCommunicationManager(ip=args.ip, port=args.receiver_port)
+    address = f"{args.ip}:{args.receiver_port}"
+    # warm up both paths once so that server start-up is not measured
+    measure(send_with_fresh_channel, sender, receiver, address, 2)
+    measure(send_with_pooled_channel, sender, receiver, address, 2)
+    fresh = summarize("fresh", measure(send_with_fresh_channel, sender, receiver, address, args.num_messages))
+    pooled = summarize("pooled", measure(send_with_pooled_channel, sender, receiver, address, args.num_messages))
+    print(f"saved per message: {(fresh - pooled) * 1e3:.3f} ms ({fresh / pooled:.1f}x)")
+    sender.terminate_server()
+    receiver.terminate_server()
@@ -0,0 +1,292 @@
+"""
+Broadcast and gather throughput of ``gRPCCommunicationManager`` + ``Message`` +
+``SerializationTool`` over loopback: an in-process server and ``num_clients`` client
+communicators exchange a synthetic model, for every combination of model size, codec and
+gRPC compression. Per case it reports the throughput, p50/p99 per-client latency, the
+serialized bytes, the peak RSS and the CPU time of the process, and writes all results to
+a JSON file so regressions can be tracked across versions.
+
+    python -m benchmark.communication_benchmark --num_clients 4 --sizes_mb 1 16 256 1024 \\
+        --codecs none fp16 int8 --compressions no_compression gzip deflate --output results.json
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+import grpc
+import torch
+
+from communication.communicator import gRPCCommunicationManager
+from communication.message import Message
+from utils.serialization import SerializationTool
+
+# the largest layer of the synthetic models, in float32 elements
+LAYER_NUMEL = 4 * 1024 * 1024
+
+
+def build_model(size_mb: float, seed: int):
+    """
+        a model of ``size_mb`` MB of float32 parameters split into layers of at most 16 MB
+    """
+    generator = torch.Generator().manual_seed(seed)
+    numel = max(1, int(size_mb * 1024 * 1024) // 4)
+    parameters = []
+    while numel > 0:
+        layer_numel = min(numel, LAYER_NUMEL)
+        parameters.append(torch.nn.Parameter(torch.randn(layer_numel, generator=generator)))
+        numel -= layer_numel
+    return torch.nn.ParameterList(parameters)
+
+
+def percentile(values: list, q: float):
+    values = sorted(values)
+    if len(values) == 0:
+        return None
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def current_rss():
+    """
+        resident set size of the process in bytes, None where /proc is not available
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+class ResourceMonitor:
+    """
+    Samples the RSS of the process from a daemon thread and measures the CPU time between
+    ``start`` and ``stop``. Without /proc the peak falls back to ``ru_maxrss``, the peak
+    over the whole process lifetime.
+    """
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.peak_rss = 0
+        self.cpu_time = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+        self._usage = None
+
+    def _sample(self):
+        while not self._stop.is_set():
+            rss = current_rss()
+            if rss is not None:
+                self.peak_rss = max(self.peak_rss, rss)
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self._usage = resource.getrusage(resource.RUSAGE_SELF)
+        self.peak_rss = current_rss() or 0
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        self.cpu_time = usage.ru_utime - self._usage.ru_utime + usage.ru_stime - self._usage.ru_stime
+        if current_rss() is None:
+            # ru_maxrss is in KB on Linux and in bytes on macOS
+            self.peak_rss = usage.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+        return self
+
+
+def model_message(model, sender: str, communication_round: int):
+    return Message(
+        message_type=201,
+        sender=sender,
+        receiver="0",
+        content={
+            'model': SerializationTool.serialize_model(model),
+            'num_samples': 1,
+            'version': communication_round
+        },
+        communication_round=communication_round
+    )
+
+
+def broadcast(server, clients: dict, model, communication_round: int):
+    """
+        send the model to all clients, each client parses and decodes it
+    :return: tuple of (seconds until every client decoded the model, {client id: latency})
+    """
+    latencies = dict()
+    start = time.perf_counter()
+
+    def receive(client_id, client):
+        message = client.receive(timeout=600)
+        message.content['model'].sum()
+        latencies[client_id] = time.perf_counter() - start
+
+    threads = [
+        threading.Thread(target=receive, args=(client_id, client), daemon=True) for client_id, client in clients.items()
+    ]
+    for thread in threads:
+        thread.start()
+    results = server.send(model_message(model, "0", communication_round))
+    for thread in threads:
+        thread.join()
+    failed = [client_id for client_id, result in results.items() if not result.success]
+    if len(failed) > 0:
+        raise RuntimeError(f"Broadcast to {failed} failed")
+    return time.perf_counter() - start, latencies
+
+
+def gather(server, clients: dict, model, communication_round: int):
+    """
+        let all clients upload the model at once, the server parses and decodes every update
+    :return: tuple of (seconds until the server decoded all updates, {client id: latency})
+    """
+    latencies = dict()
+    start = time.perf_counter()
+
+    def upload(client_id, client):
+        results = client.send(model_message(model, client_id, communication_round), receiver="0")
+        if not results["0"].success:
+            raise RuntimeError(f"Upload of client {client_id} failed")
+
+    threads = [
+        threading.Thread(target=upload, args=(client_id, client), daemon=True) for client_id, client in clients.items()
+    ]
+    for thread in threads:
+        thread.start()
+    for _ in clients:
+        message = server.receive(timeout=600)
+        message.content['model'].sum()
+        latencies[message.sender] = time.perf_counter() - start
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, latencies
+
+
+def summarize(durations: list, latencies: list, num_bytes: int, num_messages: int):
+    best = min(durations)
+    return {
+        "seconds": durations,
+        "best_seconds": best,
+        "throughput_mb_s": num_bytes * num_messages / best / 1024 / 1024,
+        "latency_p50": percentile(latencies, 0.5),
+        "latency_p99": percentile(latencies, 0.99),
+    }
+
+
+def run_case(args, size_mb: float, codec: str, compression: str, base_port: int):
+    gRPC_config = {
+        "grpc_max_send_message_length": 2047 * 1024 * 1024,
+        "grpc_max_receive_message_length": 2047 * 1024 * 1024,
+        "grpc_enable_http_proxy": False,
+        "grpc_compression": compression,
+        "codecs": {201: codec},
+        "shared_memory": args.shared_memory,
+        "wire_format": args.wire_format,
+    }
+    # one server worker per client, so the gather measures concurrent uploads rather than a queue
+    server = gRPCCommunicationManager(ip=args.ip, port=str(base_port), max_connection_num=args.num_clients,
+                                      gRPC_config=gRPC_config)
+    clients = dict()
+    for i in range(args.num_clients):
+        client_id = str(i + 1)
+        clients[client_id] = gRPCCommunicationManager(ip=args.ip, port=str(base_port + i + 1), gRPC_config=gRPC_config)
+        clients[client_id].add_communicators("0", f"{args.ip}:{base_port}")
+        server.add_communicators(client_id, f"{args.ip}:{base_port + i + 1}")
+    model = build_model(size_mb, args.seed)
+    num_bytes = sum(parameter.numel() * parameter.element_size() for parameter in model.parameters())
+    result = {
+        "size_mb": size_mb,
+        "model_bytes": num_bytes,
+        "codec": codec,
+        "compression": compression,
+        "num_clients": args.num_clients,
+    }
+    try:
+        # connect all channels and warm up the encoders before measuring
+        broadcast(server, clients, build_model(0.01, args.seed), -1)
+        gather(server, clients, build_model(0.01, args.seed), -1)
+        for phase, func in [("broadcast", broadcast), ("gather", gather)]:
+            server.metrics.reset()
+            for client in clients.values():
+                client.metrics.reset()
+            durations, latencies = [], []
+            monitor = ResourceMonitor().start()
+            for communication_round in range(args.repeat):
+                duration, round_latencies = func(server, clients, model, communication_round)
+                durations.append(duration)
+                latencies.extend(round_latencies.values())
+            monitor.stop()
+            result[phase] = summarize(durations, latencies, num_bytes, args.num_clients)
+            sent = server.metrics.snapshot()["totals"].get("send" if phase == "broadcast" else "receive", dict())
+            result[phase]["wire_bytes_per_message"] = sent.get("bytes", 0) // max(1, sent.get("messages", 1))
+            result[phase]["peak_rss_mb"] = monitor.peak_rss / 1024 / 1024
+            result[phase]["cpu_seconds"] = monitor.cpu_time
+    finally:
+        server.terminate_server()
+        for client in clients.values():
+            client.terminate_server()
+        # release the received models before the next case measures its peak RSS
+        del server, clients, model
+        gc.collect()
+    return result
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "git_commit": commit,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "torch": torch.__version__,
+        "grpc": grpc.__version__,
+    }
+
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--ip', type=str, default='127.0.0.1')
+parser.add_argument('--base_port', type=int, default=50200)
+parser.add_argument('--num_clients', type=int, default=4)
+parser.add_argument('--sizes_mb', type=float, nargs='+', default=[1, 16, 256], help='model sizes, up to 1024 (1 GB)')
+parser.add_argument('--codecs', type=str, nargs='+', default=['none', 'fp16', 'int8'])
+parser.add_argument('--compressions', type=str, nargs='+', default=['no_compression', 'gzip', 'deflate'])
+parser.add_argument('--wire_format', type=str, default='protobuf', help='protobuf or frame')
+parser.add_argument('--shared_memory', action='store_true', help='exchange models through shared memory')
+parser.add_argument('--repeat', type=int, default=3)
+parser.add_argument('--seed', type=int, default=0)
+parser.add_argument('--output', type=str, default='communication_benchmark.json')
+if __name__ == '__main__':
+    args = parser.parse_args()
+    report = {"environment": environment(), "arguments": vars(args), "results": []}
+    base_port = args.base_port
+    for size_mb in args.sizes_mb:
+        for codec in args.codecs:
+            for compression in args.compressions:
+                result = run_case(args, size_mb, codec, compression, base_port)
+                # fresh ports for every case, the previous servers may linger in TIME_WAIT
+                base_port += args.num_clients + 1
+                report["results"].append(result)
+                print(f"{size_mb:>7g} MB {codec:>5} {compression:>14}: "
+                      f"broadcast {result['broadcast']['throughput_mb_s']:8.1f} MB/s "
+                      f"(p99 {result['broadcast']['latency_p99'] * 1e3:8.1f} ms), "
+                      f"gather {result['gather']['throughput_mb_s']:8.1f} MB/s "
+                      f"(p99 {result['gather']['latency_p99'] * 1e3:8.1f} ms), "
+                      f"peak RSS {max(result['broadcast']['peak_rss_mb'], result['gather']['peak_rss_mb']):7.0f} MB")
+                with open(args.output, "w") as output:
+                    json.dump(report, output, indent=2)
+    print(f"Results written to {args.output}")
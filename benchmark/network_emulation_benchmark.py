@@ -0,0 +1,114 @@
+"""
+Round times of in-process ``Server``/``Client`` federated rounds when every client sits
+behind an emulated link (see ``communication/network_emulator.py``). Clients get the
+``--profiles`` round-robin, e.g. a mix of LAN, 4G and 3G clients, and the server's uplink
+can be capped with ``--server_uplink``. Reports per-round durations, per-client update
+latencies and stragglers, and writes them to a JSON file.
+
+    python -m benchmark.network_emulation_benchmark --num_clients 6 --profiles lan 4g 3g \\
+        --size_mb 4 --server_uplink 100 --quorum 0.5 --output network_rounds.json
+"""
+import argparse
+import json
+import threading
+import time
+
+import torch
+
+from benchmark.communication_benchmark import build_model, environment
+from client import Client
+from communication.network_emulator import PROFILES, NetworkEmulator, get_profile
+from server import Server
+
+
+def client_profiles(profiles: list, num_clients: int):
+    return {str(i + 1): profiles[i % len(profiles)] for i in range(num_clients)}
+
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--ip', type=str, default='127.0.0.1')
+parser.add_argument('--base_port', type=int, default=50300)
+parser.add_argument('--num_clients', type=int, default=4)
+parser.add_argument('--profiles', type=str, nargs='+', default=['lan', '4g', '3g'], help=f'of {list(PROFILES)}')
+parser.add_argument('--server_uplink', type=float, default=None, help='Mbit/s shared by all downloads')
+parser.add_argument('--size_mb', type=float, default=4)
+parser.add_argument('--codec', type=str, default='none', help='none, fp16, bf16 or int8 for the uploads')
+parser.add_argument('--compression', type=str, default='no_compression', help='no_compression, gzip or deflate')
+parser.add_argument('--round_deadline', type=float, default=None, help='seconds after which a round closes')
+parser.add_argument('--quorum', type=float, default=None, help='number, or fraction if below 1, of updates per round')
+parser.add_argument('--seed', type=int, default=0)
+parser.add_argument('--log_dir', type=str, default='log', help='directory of the server and client logs')
+parser.add_argument('--output', type=str, default='network_emulation_benchmark.json')
+if __name__ == '__main__':
+    args = parser.parse_args()
+    torch.manual_seed(args.seed)
+    profiles = client_profiles(args.profiles, args.num_clients)
+    client_ports = {client_id: args.base_port + int(client_id) for client_id in profiles}
+    gRPC_config = {
+        "grpc_max_send_message_length": 2047 * 1024 * 1024,
+        "grpc_max_receive_message_length": 2047 * 1024 * 1024,
+        "grpc_enable_http_proxy": False,
+        "grpc_compression": args.compression,
+    }
+    # the server emulates the downlink of every client, each client its own uplink
+    server = Server(
+        ip=args.ip,
+        port=str(args.base_port),
+        client_num=args.num_clients,
+        model=build_model(args.size_mb, args.seed),
+        quorum=int(args.quorum) if args.quorum and args.quorum >= 1 else args.quorum,
+        round_deadline=args.round_deadline,
+        log_dir=args.log_dir,
+        gRPC_config={**gRPC_config, "network_emulator": NetworkEmulator(
+            profiles={f"{args.ip}:{client_ports[client_id]}": profile for client_id, profile in profiles.items()},
+            uplink_bandwidth=args.server_uplink,
+            seed=args.seed
+        )}
+    )
+    clients = [
+        Client(
+            ip=args.ip,
+            port=str(client_ports[client_id]),
+            client_id=client_id,
+            server_ip=args.ip,
+            server_port=str(args.base_port),
+            model=build_model(args.size_mb, args.seed),
+            log_dir=args.log_dir,
+            gRPC_config={**gRPC_config, "codecs": {201: args.codec}, "network_emulator": NetworkEmulator(
+                default=profile, seed=args.seed + int(client_id))}
+        )
+        for client_id, profile in profiles.items()
+    ]
+
+    def run_client(client):
+        client.join_in()
+        client.local_process()
+        client.comm_manager.terminate_server()
+
+    threads = [threading.Thread(target=run_client, args=(client,), daemon=True) for client in clients]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    server.join_in()
+    join_time = time.perf_counter() - start
+    server.local_process()
+    for thread in threads:
+        thread.join()
+    server.comm_manager.terminate_server()
+    report = {
+        "environment": environment(),
+        "arguments": vars(args),
+        "profiles": {client_id: get_profile(profile).to_dict() for client_id, profile in profiles.items()},
+        "join_seconds": join_time,
+        "rounds": [stats.to_dict() for stats in server.scheduler.history],
+        "summary": server.scheduler.summary(),
+        "server_links": server.comm_manager.network_emulator.stats(),
+        "client_links": {client.client_id: client.comm_manager.network_emulator.stats() for client in clients},
+    }
+    for stats in server.scheduler.history:
+        latencies = ", ".join(f"{client_id} ({profiles[client_id]}) {latency:.2f}s"
+                              for client_id, latency in sorted(stats.latencies.items()))
+        print(f"Round {stats.communication_round}: {stats.duration:.2f}s, stragglers {stats.stragglers}, {latencies}")
+    with open(args.output, "w") as output:
+        json.dump(report, output, indent=2)
+    print(f"Results written to {args.output}")
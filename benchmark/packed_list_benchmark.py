@@ -0,0 +1,55 @@
+"""
+Encode/decode time and wire size of numeric lists packed into ``repeated`` fields versus
+the per-element ``mList``/``mSingle`` tree.
+
+    python -m benchmark.packed_list_benchmark --num_elements 1000000
+"""
+import argparse
+import random
+import time
+
+from communication import gRPC_communication_manager_pb2 as gRPC_communication_manager_pb2
+from communication.message import Message
+
+
+def encode_per_element(message: Message, value: list):
+    m_list = gRPC_communication_manager_pb2.mList()
+    for each in value:
+        m_list.list_value.append(message.create_by_type(each, nested=True))
+    msg_value = gRPC_communication_manager_pb2.MsgValue()
+    msg_value.list_msg.MergeFrom(m_list)
+    return msg_value
+
+
+def encode_packed(message: Message, value: list):
+    return message.create_by_type(value, nested=True)
+
+
+def measure(encode_func, value: list, repeat: int):
+    message = Message()
+    encode_time, decode_time, num_bytes = [], [], 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        payload = encode_func(message, value).SerializeToString()
+        encode_time.append(time.perf_counter() - start)
+        num_bytes = len(payload)
+        start = time.perf_counter()
+        message._parse_msg(gRPC_communication_manager_pb2.MsgValue.FromString(payload))
+        decode_time.append(time.perf_counter() - start)
+    return min(encode_time), min(decode_time), num_bytes
+
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--num_elements', type=int, default=1000000)
+parser.add_argument('--repeat', type=int, default=3)
+if __name__ == '__main__':
+    args = parser.parse_args()
+    samples = {
+        "int": [random.randint(0, 1 << 20) for _ in range(args.num_elements)],
+        "float": [random.random() for _ in range(args.num_elements)],
+    }
+    for name, value in samples.items():
+        for method, encode_func in [("mList", encode_per_element), ("packed", encode_packed)]:
+            encode_time, decode_time, num_bytes = measure(encode_func, value, args.repeat)
+            print(f"{name:>5} {method:>6}: encode {encode_time * 1e3:9.2f} ms, "
+                  f"decode {decode_time * 1e3:9.2f} ms, {num_bytes / 1024 / 1024:7.2f} MB")
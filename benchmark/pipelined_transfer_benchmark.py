@@ -0,0 +1,76 @@
+"""
+End-to-end latency of moving a model between two communicators, sequentially
+(``serialize_model`` -> ``Message`` -> RPC -> ``parse`` -> ``deserialize_model``) versus with
+the pipelined ``send_model``/``receive_transfer`` path, including per-stage timings.
+
+    python -m benchmark.pipelined_transfer_benchmark --num_layers 24 --hidden 1024
+"""
+import argparse
+import threading
+import time
+
+import torch
+
+from communication.communicator import gRPCCommunicationManager
+from communication.message import Message
+from utils.serialization import SerializationTool
+
+
+def build_model(num_layers: int, hidden: int):
+    return torch.nn.Sequential(*[torch.nn.Linear(hidden, hidden) for _ in range(num_layers)])
+
+
+def sequential_transfer(sender, receiver, source, target):
+    timings = dict()
+    start = time.perf_counter()
+    parameters = SerializationTool.serialize_model(source)
+    timings["serialize_time"] = time.perf_counter() - start
+    stage = time.perf_counter()
+    message = Message(message_type=201, sender="0", content={"model": parameters})
+    payload = message.encode()
+    timings["encode_time"] = time.perf_counter() - stage
+    stage = time.perf_counter()
+    # the cached encoding is reused by send
+    sender.send(message, receiver="1")
+    message = receiver.receive()
+    timings["rpc_and_parse_time"] = time.perf_counter() - stage
+    stage = time.perf_counter()
+    SerializationTool.deserialize_model(target, message.content["model"])
+    timings["deserialize_time"] = time.perf_counter() - stage
+    timings["total_time"] = time.perf_counter() - start
+    return len(payload), timings
+
+
+def pipelined_transfer(sender, receiver, source, target):
+    results = dict()
+    start = time.perf_counter()
+    thread = threading.Thread(target=lambda: results.update(
+        sender.send_model(source, Message(message_type=201, sender="0"), receiver="1")))
+    thread.start()
+    timings = dict(receiver.receive_transfer().copy_into(target))
+    thread.join()
+    timings["encode_time"] = results["1"].timings.get("encode_time", 0.0)
+    timings["total_time"] = time.perf_counter() - start
+    return results["1"].num_bytes, timings
+
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--ip', type=str, default='127.0.0.1')
+parser.add_argument('--sender_port', type=str, default='50063')
+parser.add_argument('--receiver_port', type=str, default='50064')
+parser.add_argument('--num_layers', type=int, default=24)
+parser.add_argument('--hidden', type=int, default=1024)
+parser.add_argument('--repeat', type=int, default=3)
+if __name__ == '__main__':
+    args = parser.parse_args()
+    sender = gRPCCommunicationManager(ip=args.ip, port=args.sender_port)
+    receiver = gRPCCommunicationManager(ip=args.ip, port=args.receiver_port)
+    sender.add_communicators("1", f"{args.ip}:{args.receiver_port}")
+    source, target = build_model(args.num_layers, args.hidden), build_model(args.num_layers, args.hidden)
+    for name, transfer in [("sequential", sequential_transfer), ("pipelined", pipelined_transfer)]:
+        runs = [transfer(sender, receiver, source, target) for _ in range(args.repeat)]
+        num_bytes, timings = min(runs, key=lambda run: run[1]["total_time"])
+        stages = ", ".join(f"{key[:-5]} {value * 1e3:.1f} ms" for key, value in timings.items())
+        print(f"{name:>10}: {num_bytes / 1024 / 1024:.1f} MB, {stages}")
+    sender.terminate_server()
+    receiver.terminate_server()
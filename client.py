@@ -2,11 +2,14 @@
 from communication.communicator import gRPCCommunicationManager
 from communication.message import Message
 import argparse
+import os
 import torch
+from utils.layout import LayoutManifest
 from utils.logger import Logger
 from utils.serialization import SerializationTool
-from model.mlp import MLP
-from transformers import BertModel
+from utils.snapshot import SnapshotStore, model_hash
+from utils.sparsification import TopKSparsifier
+from utils.versioning import ModelVersionStore
 
 
 class Client:
@@ -18,7 +21,14 @@ class Client:
             server_ip,
             server_port,
             model,
-            gRPC_config=None
+            gRPC_config=None,
+            sparse_ratio=None,
+            num_samples=1,
+            flat_buffer=False,
+            layout=None,
+            snapshot_dir=None,
+            snapshot_capacity=4 * 1024 * 1024 * 1024,
+            log_dir="log"
     ):
         self.ip = ip
         self.port = port
@@ -26,10 +36,29 @@ class Client:
         self.server_ip = server_ip
         self.server_port = server_port
         self.model = model
+        if flat_buffer:
+            # parameters become views into one buffer, serialization is then copy-free
+            SerializationTool.flatten_model(self.model)
+        # the state_dict entries exchanged with the server, all of them by default
+        self.layout = layout if layout is not None else LayoutManifest.build(self.model)
+        # weight of the client's updates in the server's aggregation
+        self.num_samples = num_samples
         self.gRPC_config = gRPC_config
+        # upload only the top ``sparse_ratio`` entries of the update if set
+        self.sparsifier = TopKSparsifier(ratio=sparse_ratio) if sparse_ratio else None
+        self.global_parameters = None
+        # version of the last received global model, reported so the server can send deltas
+        self.model_version = -1
+        # round of the last received global model, echoed in the updates so late ones can be told apart
+        self.communication_round = 0
+        # whether a join message was sent and no model was received since
+        self.joining = False
+        # received global models are kept on disk, a restarted client skips downloading them again
+        self.snapshot_store = SnapshotStore(snapshot_dir, snapshot_capacity) if snapshot_dir else None
+        os.makedirs(log_dir, exist_ok=True)
         self.logger = Logger(
             log_name=f"client{client_id}",
-            log_file=f"/Applications/LANGUAGE/PYTHON/fl_communication/log/client{client_id}.log"
+            log_file=os.path.join(log_dir, f"client{client_id}.log")
         )
         self.comm_manager = gRPCCommunicationManager(
             ip=ip,
@@ -39,7 +68,14 @@ class Client:
         )
         self.comm_manager.add_communicators("0", f"{server_ip}:{server_port}")
 
-    def join_in(self):
+    def join_in(self, use_snapshot=True):
+        """
+            join the server with the model version and snapshot held, a client joins again to get a
+            download which fits them
+        :param use_snapshot: offer the latest local snapshot to the server
+        """
+        snapshot_hash = self.snapshot_store.latest_hash if self.snapshot_store is not None and use_snapshot else None
+        self.joining = True
         self.comm_manager.send(
             Message(
                 message_type=100,
@@ -47,40 +83,125 @@ class Client:
                 receiver="0",
                 content={
                     "ip": self.ip,
-                    "port": self.port
+                    "port": self.port,
+                    "layout": self.layout.to_list(),
+                    "version": self.model_version,
+                    "snapshot_hash": snapshot_hash or ""
                 }
             ),
             receiver="0"
         )
 
+    def load_global_model(self, content):
+        """
+        :return: the serialized global model, None if it cannot be rebuilt from the models held
+        """
+        if 'model' not in content and 'indices' not in content:
+            parameters = self.snapshot_store.get(content['model_hash']) if self.snapshot_store else None
+            if parameters is None:
+                self.logger.warning(f"Snapshot {content['model_hash']} is not stored locally.")
+                return None
+            self.logger.info(f"Model loaded from the local snapshot {content['model_hash']}.")
+        elif 'indices' in content and (self.global_parameters is None or content['base_version'] != self.model_version):
+            # applying the delta onto another version would silently corrupt the model
+            self.logger.warning(f"Model version {content['version']} is a delta from version "
+                                f"{content['base_version']}, but version {self.model_version} is held.")
+            return None
+        else:
+            parameters = ModelVersionStore.apply_payload(self.global_parameters, content)
+        if self.snapshot_store is not None:
+            snapshot_hash = model_hash(parameters)
+            if snapshot_hash == content.get('model_hash'):
+                self.snapshot_store.put(parameters, snapshot_hash=snapshot_hash)
+            else:
+                # e.g. a lossy download codec: a later snapshot hit would take the copy for the exact model
+                self.logger.warning(f"Model version {content['version']} differs from the server's, "
+                                    f"it is not kept as a snapshot.")
+        return parameters
+
     def local_process(self):
         while True:
             msg = self.comm_manager.receive()
             if msg.message_type == 101:
-                self.logger.info("Terminating the client.")
+                if isinstance(msg.content, dict) and "reason" in msg.content:
+                    self.logger.warning(f"{msg.content['reason']}, terminating the client.")
+                else:
+                    self.logger.info("Terminating the client.")
                 break
             elif msg.message_type == 201:
-                SerializationTool.deserialize_model(self.model, msg.content['model'])
-                self.logger.info("Model received.")
+                parameters = self.load_global_model(msg.content)
+                if parameters is None:
+                    # a delta sent before the server got the last join message is answered by the server
+                    # anyway, otherwise join again to get a download based on what this client holds
+                    if 'indices' not in msg.content or not self.joining:
+                        self.join_in(use_snapshot='indices' in msg.content)
+                    continue
+                self.joining = False
+                SerializationTool.deserialize_selected_model(self.model, parameters, self.layout)
+                self.global_parameters = parameters.clone()
+                self.model_version = msg.content['version']
+                self.communication_round = msg.communication_round
+                kind = "full model" if 'model' in msg.content else "delta" if 'indices' in msg.content else "snapshot"
+                self.logger.info(f"Model version {self.model_version} received ({kind}).")
+            if self.sparsifier is not None and self.global_parameters is not None:
+                self.send_sparse_update()
+                continue
             self.comm_manager.send(
                 Message(
                     message_type=201,
                     sender=self.client_id,
                     receiver="0",
                     content={
-                        'model': SerializationTool.serialize_model(self.model)
-                    }
+                        'model': SerializationTool.serialize_selected_model(self.model, self.layout),
+                        'num_samples': self.num_samples,
+                        'version': self.model_version
+                    },
+                    communication_round=self.communication_round
                 ),
                 receiver="0"
             )
             self.logger.info("Model sent.")
 
+    def send_sparse_update(self):
+        update = SerializationTool.serialize_selected_model(self.model, self.layout) - self.global_parameters
+        indices, values = self.sparsifier.compress(update)
+        self.comm_manager.send(
+            Message(
+                message_type=202,
+                sender=self.client_id,
+                receiver="0",
+                content={
+                    'indices': indices,
+                    'values': values,
+                    'numel': update.numel(),
+                    'num_samples': self.num_samples,
+                    'version': self.model_version
+                },
+                communication_round=self.communication_round
+            ),
+            receiver="0"
+        )
+        self.logger.info(f"Sparse update with {values.numel()} / {update.numel()} entries sent.")
+
 
 parser = argparse.ArgumentParser()
 parser.add_argument('--ip', type=str, default='127.0.0.1')
 parser.add_argument('--port', type=str, default="50052")
 parser.add_argument('--client_id', type=str, default="1")
+parser.add_argument('--codec', type=str, default='none', help='none, fp16, bf16 or int8 for the model uploads')
+parser.add_argument('--sparse_ratio', type=float, default=None, help='fraction of the update entries to upload')
+parser.add_argument('--include', type=str, nargs='*', default=None, help='name patterns of the exchanged layers')
+parser.add_argument('--trainable_only', action='store_true', help='exchange only trainable parameters')
+parser.add_argument('--snapshot_dir', type=str, default=None, help='directory of the local model snapshots')
+parser.add_argument('--shared_memory', action='store_true', help='exchange models with co-located peers through shared memory')
+parser.add_argument('--wire_format', type=str, default='protobuf', help='protobuf or frame, the flat binary frame format')
+parser.add_argument('--metrics_port', type=int, default=None, help='port of the Prometheus endpoint of the transfer metrics')
+parser.add_argument('--network_profile', type=str, default=None, help='emulated link to every peer, e.g. lan, 4g or 3g')
+parser.add_argument('--log_dir', type=str, default='log', help='directory of the log file')
 if __name__ == "__main__":
+    # the model libraries are only needed to run the client, not to import it
+    from model.mlp import MLP
+    from transformers import BertModel
     # model = MLP(784, 10, 10)
     model = BertModel.from_pretrained("./model/")
     args = parser.parse_args()
@@ -91,11 +212,20 @@ if __name__ == "__main__":
         server_ip="127.0.0.1",
         server_port="50051",
         model=model,
+        sparse_ratio=args.sparse_ratio,
+        layout=LayoutManifest.build(model, include=args.include, trainable_only=args.trainable_only),
+        snapshot_dir=args.snapshot_dir,
+        log_dir=args.log_dir,
         gRPC_config={
             "grpc_max_send_message_length": 1000 * 1024 * 1024,
             "grpc_max_receive_message_length": 1000 * 1024 * 1024,
             "grpc_enable_http_proxy": False,
-            "grpc_compression": "gzip"
+            "grpc_compression": "gzip",
+            "codecs": {201: args.codec},
+            "shared_memory": args.shared_memory,
+            "wire_format": args.wire_format,
+            "metrics_port": args.metrics_port,
+            "network_emulator": args.network_profile
         }
     )
     client.join_in()
@@ -0,0 +1,231 @@
+import asyncio
+import functools
+import time
+
+import grpc
+from . import gRPC_communication_manager_pb2_grpc as gRPC_communication_manager_pb2_grpc
+from .channel_pool import gRPCComServeFuncRawStub
+from .codec import get_codec
+from .frame import decode_frame
+from .communicator import DEFAULT_GRPC_CONFIG, SendResult, build_options, chunk_payload, get_compression_method
+from .gRPC_server import AsyncgRPCComServeFunc
+from .message import Message
+from .retry import CircuitBreaker, CircuitOpenError
+
+
+class AsyncCommunicationManager:
+    """
+    ``asyncio`` counterpart of ``gRPCCommunicationManager`` built on ``grpc.aio``. ``send``
+    and ``receive`` are awaitable, so a single event loop serves many concurrent transfers
+    without a thread per connection.
+
+        manager = AsyncCommunicationManager(ip, port)
+        await manager.start()
+        manager.add_communicators("1", "127.0.0.1:50052")
+        await manager.send(message, receiver="1")
+        message = await manager.receive()
+        await manager.terminate_server()
+    """
+    def __init__(
+            self,
+            ip: str = "127.0.0.1",
+            port: str = "50051",
+            gRPC_config=None
+    ):
+        gRPC_config = {**DEFAULT_GRPC_CONFIG, **(gRPC_config or {})}
+        self._ip = ip
+        self._port = port
+        self._gRPC_config = gRPC_config
+        self._server_options, self._channel_options = build_options(gRPC_config)
+        self._compression_method = get_compression_method(gRPC_config["grpc_compression"])
+        self.server_funcs = None
+        self._gRPC_server = None
+        self._communicators = dict()
+        self._channels = dict()
+        self._codecs = {int(k): get_codec(v) for k, v in gRPC_config["codecs"].items()}
+        self._circuit_breaker = CircuitBreaker(
+            failure_threshold=gRPC_config["grpc_failure_threshold"],
+            cooldown=gRPC_config["grpc_circuit_cooldown"]
+        )
+
+    @property
+    def ip(self):
+        return self._ip
+
+    @property
+    def port(self):
+        return self._port
+
+    @property
+    def gRPC_config(self):
+        return self._gRPC_config
+
+    @property
+    def compression_method(self):
+        return self._compression_method
+
+    @property
+    def communicators(self):
+        return self._communicators
+
+    @property
+    def circuit_breaker(self):
+        return self._circuit_breaker
+
+    async def start(self):
+        """
+            start the ``grpc.aio`` server, must be awaited inside the event loop that
+            later calls ``send`` and ``receive``
+        """
+        self.server_funcs = AsyncgRPCComServeFunc()
+        server = grpc.aio.server(
+            compression=self._compression_method,
+            options=self._server_options
+        )
+        gRPC_communication_manager_pb2_grpc.add_gRPCComServeFuncServicer_to_server(
+            self.server_funcs, server)
+        server.add_insecure_port("{}:{}".format(self._ip, self._port))
+        await server.start()
+        self._gRPC_server = server
+        return server
+
+    async def terminate_server(self):
+        channels = list(self._channels.values())
+        self._channels.clear()
+        for _, channel in channels:
+            await channel.close()
+        if self._gRPC_server is not None:
+            await self._gRPC_server.stop(grace=None)
+
+    def add_communicators(self, communicator_id: str, communicator_address: dict | str):
+        if isinstance(communicator_address, dict):
+            self._communicators[communicator_id] = f"{communicator_address['ip']}:{communicator_address['port']}"
+        elif isinstance(communicator_address, str):
+            self._communicators[communicator_id] = communicator_address
+        else:
+            raise TypeError(f"The type of communicator_address ({type(communicator_address)}) is not supported")
+
+    def get_communicators(self, communicator_id: str | list | None):
+        if communicator_id:
+            if isinstance(communicator_id, list):
+                return {each: self._communicators[each] for each in communicator_id}
+            else:
+                return self._communicators[communicator_id]
+        else:
+            return self._communicators
+
+    def _get_stub(self, receiver_address: str):
+        if receiver_address not in self._channels:
+            channel = grpc.aio.insecure_channel(receiver_address,
+                                                compression=self._compression_method,
+                                                options=self._channel_options)
+            self._channels[receiver_address] = (gRPCComServeFuncRawStub(channel), channel)
+        return self._channels[receiver_address][0]
+
+    async def _reconnect(self, receiver_address: str):
+        stub_channel = self._channels.pop(receiver_address, None)
+        if stub_channel is not None:
+            await stub_channel[1].close()
+
+    async def _send(self, receiver: str, receiver_address: str, payload: bytes, semaphore: asyncio.Semaphore,
+                    max_retry: int | None = None):
+        """
+            deliver ``payload`` with exponential backoff, ``semaphore`` bounds the concurrent attempts
+            and is released while waiting for a retry
+        """
+        if max_retry is None:
+            max_retry = self._gRPC_config["grpc_max_retry"]
+        result = SendResult(receiver, num_bytes=len(payload))
+        streaming = len(payload) > self._gRPC_config["grpc_stream_threshold"]
+        timeout = self._gRPC_config["grpc_send_timeout"]
+        start_time = time.perf_counter()
+        retry_interval = self._gRPC_config["grpc_retry_interval"]
+        while result.attempts < max_retry:
+            if not self._circuit_breaker.allow(receiver_address):
+                if result.attempts == 0:
+                    result.skipped = True
+                    result.error = CircuitOpenError(receiver_address)
+                break
+            result.attempts += 1
+            async with semaphore:
+                stub = self._get_stub(receiver_address)
+                try:
+                    if streaming:
+                        await stub.sendMessageStream(
+                            chunk_payload(payload, self._gRPC_config["grpc_chunk_size"]), timeout=timeout)
+                    else:
+                        await stub.sendMessage(payload, timeout=timeout)
+                    result.success = True
+                    result.error = None
+                except grpc.aio.AioRpcError as error:
+                    result.error = error
+                    self._circuit_breaker.record_failure(receiver_address, error)
+                    await self._reconnect(receiver_address)
+            if result.success:
+                self._circuit_breaker.record_success(receiver_address)
+                break
+            if result.attempts < max_retry and not self._circuit_breaker.is_open(receiver_address):
+                await asyncio.sleep(retry_interval)
+                retry_interval *= 2
+        result.latency = time.perf_counter() - start_time
+        return result
+
+    async def send(self, message: Message, receiver: str | list | None = None):
+        """
+            send the message to the given receivers, or broadcast it to all communicators
+            if ``receiver`` is None, at most ``grpc_broadcast_concurrency`` transfers run at a time
+        :return: dict mapping receiver id to its ``SendResult``
+        """
+        if receiver is not None:
+            if not isinstance(receiver, list):
+                receiver = [receiver]
+            receiver = [each for each in receiver if each in self._communicators.keys()]
+        else:
+            receiver = list(self._communicators.keys())
+        if len(receiver) == 0:
+            return dict()
+        # encoding a model takes long enough to stall every other transfer of the event loop
+        payload = await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(message.encode, codec=self._codecs.get(message.message_type)))
+        semaphore = asyncio.Semaphore(max(1, self._gRPC_config["grpc_broadcast_concurrency"]))
+        results = await asyncio.gather(*[
+            self._send(each_receiver, self._communicators[each_receiver], payload, semaphore)
+            for each_receiver in receiver
+        ])
+        return dict(zip(receiver, results))
+
+    def _parse(self, received_message):
+        """
+            parse and decode a received message, ``receive`` runs it in the executor: the content,
+            otherwise decoded lazily on its first access, is decoded here so the tensors and their
+            codecs never stall the event loop
+        """
+        if isinstance(received_message, (bytes, bytearray)):
+            message = decode_frame(received_message)
+        else:
+            message = Message()
+            segment = None
+            if received_message.shared_segment:
+                segment = self.server_funcs.pop_shared_segment(received_message.shared_segment)
+            message.parse(received_message.msg, segment=segment)
+        message.content
+        return message
+
+    async def receive(self, timeout: float | None = None):
+        received_message = await self.server_funcs.receive(timeout=timeout)
+        if received_message is None:
+            return None
+        return await asyncio.get_running_loop().run_in_executor(None, self._parse, received_message)
+
+    def try_receive(self):
+        received_message = self.server_funcs.try_receive()
+        if received_message is None:
+            return None
+        return self._parse(received_message)
+
+    async def receive_many(self, n: int, timeout: float | None = None):
+        received_messages = await self.server_funcs.receive_many(n, timeout=timeout)
+        loop = asyncio.get_running_loop()
+        return list(await asyncio.gather(*[
+            loop.run_in_executor(None, self._parse, each) for each in received_messages
+        ]))
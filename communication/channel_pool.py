@@ -0,0 +1,97 @@
+import threading
+
+import grpc
+from . import gRPC_communication_manager_pb2 as gRPC_communication_manager_pb2
+
+
+class gRPCComServeFuncRawStub(object):
+    """
+    Stub of ``gRPCComServeFunc`` which takes already serialized ``MessageRequest`` bytes,
+    so that one encoded message is reused for every receiver and retry.
+    """
+    def __init__(self, channel):
+        self.sendMessage = channel.unary_unary(
+            '/gRPCComServeFunc/sendMessage',
+            request_serializer=None,
+            response_deserializer=gRPC_communication_manager_pb2.MessageResponse.FromString)
+        self.sendMessageStream = channel.stream_unary(
+            '/gRPCComServeFunc/sendMessageStream',
+            request_serializer=gRPC_communication_manager_pb2.MessageChunk.SerializeToString,
+            response_deserializer=gRPC_communication_manager_pb2.MessageResponse.FromString)
+        self.sendModelStream = channel.stream_unary(
+            '/gRPCComServeFunc/sendModelStream',
+            request_serializer=gRPC_communication_manager_pb2.ModelChunk.SerializeToString,
+            response_deserializer=gRPC_communication_manager_pb2.MessageResponse.FromString)
+        # takes an already serialized ``Frame``, see ``frame.frame_request``
+        self.sendFrame = channel.unary_unary(
+            '/gRPCComServeFunc/sendFrame',
+            request_serializer=None,
+            response_deserializer=gRPC_communication_manager_pb2.MessageResponse.FromString)
+        self.sendFrameStream = channel.stream_unary(
+            '/gRPCComServeFunc/sendFrameStream',
+            request_serializer=gRPC_communication_manager_pb2.MessageChunk.SerializeToString,
+            response_deserializer=gRPC_communication_manager_pb2.MessageResponse.FromString)
+        self.negotiate = channel.unary_unary(
+            '/gRPCComServeFunc/negotiate',
+            request_serializer=gRPC_communication_manager_pb2.MessageResponse.SerializeToString,
+            response_deserializer=gRPC_communication_manager_pb2.MessageResponse.FromString)
+
+
+class ChannelPool:
+    """
+    Keep one long-lived gRPC channel and stub per peer address, so that consecutive
+    messages to the same peer reuse the established TCP + HTTP/2 connection.
+        create_stub: factory which takes an address and returns ``(stub, channel)``
+        ready_timeout: seconds to wait for a channel to become ready in ``check_health``
+    """
+    def __init__(self, create_stub, ready_timeout: float = 5.0):
+        self._create_stub = create_stub
+        self._ready_timeout = ready_timeout
+        self._channels = dict()
+        self._lock = threading.Lock()
+
+    @property
+    def addresses(self):
+        return list(self._channels.keys())
+
+    def get_stub(self, address: str):
+        with self._lock:
+            if address not in self._channels:
+                self._channels[address] = self._create_stub(address)
+            stub, _ = self._channels[address]
+        return stub
+
+    def check_health(self, address: str, timeout: float | None = None) -> bool:
+        """
+            probe whether the channel to ``address`` can reach the READY state, a channel
+            which fails the probe is dropped so the next send reconnects
+        """
+        self.get_stub(address)
+        with self._lock:
+            _, channel = self._channels[address]
+        try:
+            grpc.channel_ready_future(channel).result(
+                timeout=self._ready_timeout if timeout is None else timeout)
+            return True
+        except grpc.FutureTimeoutError:
+            self.reconnect(address)
+            return False
+
+    def reconnect(self, address: str):
+        """
+            close the cached channel of ``address``, a new one is created on next use
+        """
+        with self._lock:
+            stub_channel = self._channels.pop(address, None)
+        if stub_channel is not None:
+            stub_channel[1].close()
+
+    def close(self, address: str | None = None):
+        if address is not None:
+            self.reconnect(address)
+            return
+        with self._lock:
+            channels = list(self._channels.values())
+            self._channels.clear()
+        for _, channel in channels:
+            channel.close()
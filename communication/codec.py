@@ -0,0 +1,134 @@
+import torch
+
+
+class CodedTensor:
+    """
+    A floating-point tensor compressed by a codec, as carried in a message.
+        codec: The codec id, used by the receiver to pick the decoder
+        dtype: The dtype of the original tensor, e.g. "float32"
+        shape: The shape of the original tensor
+        tensors: Dict of the encoded tensors, e.g. quantized values and their scales
+        params: Dict of integer codec parameters, e.g. the block size
+    """
+    def __init__(self, codec: str, dtype: str, shape: tuple, tensors: dict, params: dict | None = None):
+        self.codec = codec
+        self.dtype = dtype
+        self.shape = tuple(shape)
+        self.tensors = tensors
+        self.params = params if params is not None else dict()
+
+    def decode(self) -> torch.Tensor:
+        return get_codec(self.codec, **self.params).decode(self)
+
+
+class Codec:
+    """
+    Base class of the update compression codecs. ``encode`` turns a floating-point tensor
+    into a ``CodedTensor``, ``decode`` restores a tensor with the original dtype and shape.
+    NOTE: lossy codecs also round integer buffers (e.g. ``position_ids``) that
+    ``SerializationTool.serialize_model`` casts into the float vector.
+    """
+    codec_id = None
+
+    def params(self) -> dict:
+        return dict()
+
+    def encode(self, tensor: torch.Tensor) -> CodedTensor:
+        raise NotImplementedError
+
+    def decode(self, coded_tensor: CodedTensor) -> torch.Tensor:
+        raise NotImplementedError
+
+    def _coded_tensor(self, tensor: torch.Tensor, tensors: dict) -> CodedTensor:
+        return CodedTensor(
+            codec=self.codec_id,
+            dtype=str(tensor.dtype).split(".")[-1],
+            shape=tensor.shape,
+            tensors=tensors,
+            params=self.params()
+        )
+
+
+class Fp16Codec(Codec):
+    codec_id = "fp16"
+
+    def encode(self, tensor: torch.Tensor) -> CodedTensor:
+        return self._coded_tensor(tensor, {"values": tensor.detach().to(torch.float16)})
+
+    def decode(self, coded_tensor: CodedTensor) -> torch.Tensor:
+        return coded_tensor.tensors["values"].to(getattr(torch, coded_tensor.dtype)).view(coded_tensor.shape)
+
+
+class Bf16Codec(Fp16Codec):
+    codec_id = "bf16"
+
+    def encode(self, tensor: torch.Tensor) -> CodedTensor:
+        return self._coded_tensor(tensor, {"values": tensor.detach().to(torch.bfloat16)})
+
+
+class Int8Codec(Codec):
+    """
+    Symmetric int8 quantization with one fp32 scale per block of ``block_size`` elements.
+    """
+    codec_id = "int8"
+
+    def __init__(self, block_size: int = 256):
+        self.block_size = block_size
+
+    def params(self) -> dict:
+        return {"block_size": self.block_size}
+
+    def encode(self, tensor: torch.Tensor) -> CodedTensor:
+        flat = tensor.detach().reshape(-1).to(torch.float32)
+        padding = (-flat.numel()) % self.block_size
+        if padding:
+            flat = torch.nn.functional.pad(flat, (0, padding))
+        blocks = flat.view(-1, self.block_size)
+        scales = blocks.abs().amax(dim=1) / 127
+        scales = torch.where(scales > 0, scales, torch.ones_like(scales))
+        values = torch.round(blocks / scales.unsqueeze(1)).clamp_(-127, 127).to(torch.int8)
+        return self._coded_tensor(tensor, {"values": values.view(-1), "scales": scales})
+
+    def decode(self, coded_tensor: CodedTensor) -> torch.Tensor:
+        values = coded_tensor.tensors["values"].view(-1, self.block_size).to(torch.float32)
+        flat = (values * coded_tensor.tensors["scales"].unsqueeze(1)).view(-1)
+        numel = 1
+        for dim in coded_tensor.shape:
+            numel *= dim
+        return flat[:numel].to(getattr(torch, coded_tensor.dtype)).view(coded_tensor.shape)
+
+
+class IdentityCodec(Codec):
+    """
+    Sends tensors unchanged, used to switch the compression off for exact models.
+    """
+    codec_id = "none"
+
+    def encode(self, tensor: torch.Tensor):
+        return tensor
+
+    def decode(self, coded_tensor: CodedTensor) -> torch.Tensor:
+        return coded_tensor.tensors["values"]
+
+
+CODECS = {
+    IdentityCodec.codec_id: IdentityCodec,
+    Fp16Codec.codec_id: Fp16Codec,
+    Bf16Codec.codec_id: Bf16Codec,
+    Int8Codec.codec_id: Int8Codec,
+}
+
+
+def get_codec(codec: str | dict | Codec | None, **params) -> Codec | None:
+    """
+        build a codec from its id, e.g. "int8", or from a dict such as
+        ``{"name": "int8", "block_size": 128}``
+    """
+    if codec is None or isinstance(codec, Codec):
+        return codec
+    if isinstance(codec, dict):
+        params = {**{k: v for k, v in codec.items() if k != "name"}, **params}
+        codec = codec["name"]
+    if codec not in CODECS:
+        raise ValueError(f"Invalid codec {codec}, require one of {list(CODECS.keys())}")
+    return CODECS[codec](**params)
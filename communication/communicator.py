@@ -1,11 +1,136 @@
 import random
+import threading
 import time
 
 import grpc
+from . import gRPC_communication_manager_pb2 as gRPC_communication_manager_pb2
 from . import gRPC_communication_manager_pb2_grpc as gRPC_communication_manager_pb2_grpc
 from concurrent import futures
+from .channel_pool import ChannelPool, gRPCComServeFuncRawStub
+from .codec import get_codec
+from .frame import WIRE_FORMATS, chunk_buffers, decode_frame, encode_frame, frame_request
 from .gRPC_server import gRPCComServeFunc
 from .message import Message
+from .metrics import RECEIVE, SEND, MetricsServer, TransferMetrics, TransferRecord, compressed_size
+from .network_emulator import get_network_emulator
+from .pipeline import iter_model_chunks
+from .retry import CircuitBreaker, CircuitOpenError, RetryScheduler, SchedulerClosedError
+from .shared_memory import SharedSegmentWriter, is_local_address
+
+DEFAULT_GRPC_CONFIG = {
+    "grpc_max_send_message_length": 300 * 1024 * 1024,
+    "grpc_max_receive_message_length": 300 * 1024 * 1024,
+    "grpc_enable_http_proxy": False,
+    "grpc_compression": "no_compression",
+    # messages larger than the threshold are sent through the client-streaming RPC
+    "grpc_stream_threshold": 4 * 1024 * 1024,
+    "grpc_chunk_size": 4 * 1024 * 1024,
+    "grpc_keepalive_time_ms": 30 * 1000,
+    "grpc_keepalive_timeout_ms": 10 * 1000,
+    # maximum number of receivers a broadcast delivers to at the same time
+    "grpc_broadcast_concurrency": 16,
+    # failed attempts are retried after ``grpc_retry_interval`` seconds, doubling each time,
+    # without blocking the deliveries to other peers
+    "grpc_max_retry": 3,
+    "grpc_retry_interval": 1.0,
+    # a peer is skipped for ``grpc_circuit_cooldown`` seconds after this many consecutive failures
+    "grpc_failure_threshold": 3,
+    "grpc_circuit_cooldown": 30.0,
+    # deadline of a single RPC attempt in seconds, None waits until the peer answers
+    "grpc_send_timeout": None,
+    # message type -> codec compressing its floating-point tensors, e.g. {201: "int8"},
+    # see ``codec.py``; types without an entry are sent exactly. Codecs apply to the messages
+    # this communicator sends, so a client's codecs compress its uploads and the server's
+    # codecs its broadcasts
+    "codecs": {},
+    # peers on the same machine receive the tensors of a message through a shared-memory
+    # segment, only a small descriptor goes over gRPC
+    "shared_memory": False,
+    "shared_memory_min_bytes": 64 * 1024,
+    # "frame" sends the flat binary frame of ``frame.py`` to peers which support it, negotiated
+    # once per peer in the background, "protobuf" always sends the nested ``MessageRequest``
+    "wire_format": "protobuf",
+    "grpc_negotiation_timeout": 5.0,
+    # port of the Prometheus text endpoint of the transfer metrics, None disables it
+    "metrics_port": None,
+    # compress every payload once more to account the bytes after gRPC compression, costs CPU
+    "metrics_measure_compression": False,
+    # emulated bandwidth, RTT, jitter and drops of the links to the peers: a ``NetworkEmulator``,
+    # a profile name such as "4g" for every peer or a dict of the emulator's arguments
+    "network_emulator": None
+}
+
+
+def build_options(gRPC_config: dict):
+    """
+        build the gRPC options of the server and of the outgoing channels from ``gRPC_config``
+    :return: tuple of (server options, channel options)
+    """
+    options = [
+        ("grpc.max_send_message_length", gRPC_config["grpc_max_send_message_length"]),
+        ("grpc.max_receive_message_length", gRPC_config["grpc_max_receive_message_length"]),
+        ("grpc.enable_http_proxy", gRPC_config["grpc_enable_http_proxy"]),
+    ]
+    # pooled channels stay open between rounds, keepalive pings detect dead peers
+    channel_options = options + [
+        ("grpc.keepalive_time_ms", gRPC_config["grpc_keepalive_time_ms"]),
+        ("grpc.keepalive_timeout_ms", gRPC_config["grpc_keepalive_timeout_ms"]),
+        ("grpc.keepalive_permit_without_calls", 1),
+        ("grpc.http2.max_pings_without_data", 0),
+    ]
+    server_options = options + [
+        ("grpc.keepalive_permit_without_calls", 1),
+        ("grpc.http2.min_ping_interval_without_data_ms", gRPC_config["grpc_keepalive_time_ms"]),
+    ]
+    return server_options, channel_options
+
+
+def get_compression_method(name: str):
+    if name.lower() == 'deflate':
+        return grpc.Compression.Deflate
+    elif name.lower() == 'gzip':
+        return grpc.Compression.Gzip
+    else:
+        return grpc.Compression.NoCompression
+
+
+def chunk_payload(payload: bytes, chunk_size: int):
+    view = memoryview(payload)
+    for offset in range(0, len(payload), chunk_size):
+        yield gRPC_communication_manager_pb2.MessageChunk(
+            total_size=len(payload),
+            offset=offset,
+            data=bytes(view[offset:offset + chunk_size])
+        )
+
+
+class SendResult:
+    """
+    The delivery result of a message to a single receiver.
+        receiver: The receiver's ID
+        success: Whether the receiver acknowledged the message
+        latency: Seconds spent on the delivery, including retries
+        num_bytes: Serialized bytes of the message
+        attempts: Number of RPC attempts
+        error: The last RPC error, None if the delivery succeeded
+        timings: Optional per-stage timings of the delivery
+        skipped: Whether the receiver was skipped because its circuit is open
+    """
+    def __init__(self, receiver: str, success: bool = False, latency: float = 0.0,
+                 num_bytes: int = 0, attempts: int = 0, error=None, timings: dict | None = None,
+                 skipped: bool = False):
+        self.receiver = receiver
+        self.success = success
+        self.latency = latency
+        self.num_bytes = num_bytes
+        self.attempts = attempts
+        self.error = error
+        self.timings = timings
+        self.skipped = skipped
+
+    def __repr__(self):
+        return f"SendResult(receiver={self.receiver!r}, success={self.success}, latency={self.latency:.4f}, " \
+               f"num_bytes={self.num_bytes}, attempts={self.attempts}, skipped={self.skipped})"
 
 
 class gRPCCommunicationManager:
@@ -16,29 +141,14 @@ class gRPCCommunicationManager:
             max_connection_num: int = 1,
             gRPC_config=None
     ):
-        if gRPC_config is None:
-            gRPC_config = {
-                "grpc_max_send_message_length": 300 * 1024 * 1024,
-                "grpc_max_receive_message_length": 300 * 1024 * 1024,
-                "grpc_enable_http_proxy": False,
-                "grpc_compression": "no_compression"
-            }
+        gRPC_config = {**DEFAULT_GRPC_CONFIG, **(gRPC_config or {})}
         self._ip = ip
         self._port = port
         self._max_connection_num = max_connection_num
         self._gRPC_config = gRPC_config
         self.server_funcs = gRPCComServeFunc()
-        options = [
-            ("grpc.max_send_message_length", gRPC_config["grpc_max_send_message_length"]),
-            ("grpc.max_receive_message_length", gRPC_config["grpc_max_receive_message_length"]),
-            ("grpc.enable_http_proxy", gRPC_config["grpc_enable_http_proxy"]),
-        ]
-        if gRPC_config["grpc_compression"].lower() == 'deflate':
-            self._compression_method = grpc.Compression.Deflate
-        elif gRPC_config["grpc_compression"].lower() == 'gzip':
-            self._compression_method = grpc.Compression.Gzip
-        else:
-            self._compression_method = grpc.Compression.NoCompression
+        options, self._channel_options = build_options(gRPC_config)
+        self._compression_method = get_compression_method(gRPC_config["grpc_compression"])
         self._gRPC_server = self.serve(
             max_workers=max_connection_num,
             ip=ip,
@@ -46,6 +156,24 @@ class gRPCCommunicationManager:
             options=options
         )
         self._communicators = dict()
+        self._channel_pool = ChannelPool(self._create_stub)
+        self._circuit_breaker = CircuitBreaker(
+            failure_threshold=gRPC_config["grpc_failure_threshold"],
+            cooldown=gRPC_config["grpc_circuit_cooldown"]
+        )
+        self._retry_scheduler = RetryScheduler(max_workers=max(1, gRPC_config["grpc_broadcast_concurrency"]))
+        self._codecs = {int(k): get_codec(v) for k, v in gRPC_config["codecs"].items()}
+        # co-located addresses which failed to map a shared segment, e.g. behind a forwarded port
+        self._shared_memory_unreachable = set()
+        # address -> negotiated wire format, and the addresses with a negotiation in flight
+        self._wire_formats = dict()
+        self._negotiating = set()
+        self._negotiation_lock = threading.Lock()
+        self._metrics = TransferMetrics()
+        self._metrics_server = None
+        if gRPC_config["metrics_port"] is not None:
+            self._metrics_server = MetricsServer(self._metrics, int(gRPC_config["metrics_port"]))
+        self._network_emulator = get_network_emulator(gRPC_config["network_emulator"])
 
     @property
     def ip(self):
@@ -104,16 +232,67 @@ class gRPCCommunicationManager:
 
         return server
 
+    @property
+    def channel_pool(self):
+        return self._channel_pool
+
+    @property
+    def circuit_breaker(self):
+        return self._circuit_breaker
+
+    def peer_health(self, communicator_id: str | list | None = None):
+        """
+            delivery health of the given communicators, see ``PeerHealth``
+        :return: dict mapping communicator id to its ``PeerHealth``
+        """
+        return {
+            each: self._circuit_breaker.health(self._communicators[each])
+            for each in self._resolve_receivers(communicator_id)
+        }
+
+    @property
+    def network_emulator(self):
+        """
+            the ``NetworkEmulator`` throttling the outgoing RPCs, None over the real network
+        """
+        return self._network_emulator
+
+    @property
+    def metrics(self):
+        """
+            wire-level ``TransferMetrics`` of the sent and received messages
+        """
+        return self._metrics
+
     def terminate_server(self):
+        if self._metrics_server is not None:
+            self._metrics_server.stop()
+        # no new attempts, then cancel the in-flight RPCs so hung peers do not block the shutdown
+        self._retry_scheduler.close()
+        self._channel_pool.close()
+        self._retry_scheduler.shutdown()
         self._gRPC_server.stop(grace=None)
 
     def add_communicators(self, communicator_id: str, communicator_address: dict | str):
+        previous_address = self._communicators.get(communicator_id)
         if isinstance(communicator_address, dict):
             self._communicators[communicator_id] = f"{communicator_address['ip']}:{communicator_address['port']}"
         elif isinstance(communicator_address, str):
             self._communicators[communicator_id] = communicator_address
         else:
             raise TypeError(f"The type of communicator_address ({type(communicator_address)}) is not supported")
+        if previous_address is not None and previous_address != self._communicators[communicator_id]:
+            self._channel_pool.close(previous_address)
+            self._circuit_breaker.reset(previous_address)
+            self._wire_formats.pop(previous_address, None)
+        self._negotiate(self._communicators[communicator_id])
+
+    def remove_communicators(self, communicator_id: str):
+        address = self._communicators.pop(communicator_id, None)
+        if address is not None and address not in self._communicators.values():
+            self._channel_pool.close(address)
+            self._circuit_breaker.reset(address)
+            self._wire_formats.pop(address, None)
 
     def get_communicators(self, communicator_id: str | list | None):
         address = dict()
@@ -130,48 +309,430 @@ class gRPCCommunicationManager:
     def _create_stub(self, receiver_address: str):
         channel = grpc.insecure_channel(receiver_address,
                                         compression=self.compression_method,
-                                        # options=(('grpc.enable_http_proxy',
-                                        #           0),)
+                                        options=self._channel_options
                                         )
-        stub = gRPC_communication_manager_pb2_grpc.gRPCComServeFuncStub(channel)
+        if self._network_emulator is None:
+            stub = gRPCComServeFuncRawStub(channel)
+        else:
+            stub = gRPCComServeFuncRawStub(self._network_emulator.intercept(channel, receiver_address))
         return stub, channel
 
-    def _send(self, receiver_address: str, message: Message, max_retry: int = 3):
-        request = message.transform(to_list=True)
-        attempts = 0
-        retry_interval = 1
-        success_flag = False
-        while attempts < max_retry:
-            stub, channel = self._create_stub(receiver_address)
+    def _deliver(self, receiver: str, receiver_address: str, rpc, num_bytes: int, max_retry: int | None = None,
+                 timings: dict | None = None):
+        """
+            run ``rpc(stub, timeout)`` against the pooled stub of ``receiver_address`` on the retry
+            scheduler. Failed attempts are retried with exponential backoff without occupying a
+            worker, receivers whose circuit is open are skipped right away.
+        :return: ``concurrent.futures.Future`` of the ``SendResult``
+        """
+        if max_retry is None:
+            max_retry = self._gRPC_config["grpc_max_retry"]
+        future = futures.Future()
+        result = SendResult(receiver, num_bytes=num_bytes, timings=timings)
+        start_time = time.perf_counter()
+
+        def finish():
+            result.latency = time.perf_counter() - start_time
+            future.set_result(result)
+
+        def attempt():
+            if self._retry_scheduler.closed:
+                if result.attempts == 0:
+                    result.error = SchedulerClosedError()
+                finish()
+                return
+            if not self._circuit_breaker.allow(receiver_address):
+                if result.attempts == 0:
+                    result.skipped = True
+                    result.error = CircuitOpenError(receiver_address)
+                finish()
+                return
+            stub = self._channel_pool.get_stub(receiver_address)
+            result.attempts += 1
             try:
-                stub.sendMessage(request)
-                channel.close()
-                success_flag = True
-            except grpc._channel._InactiveRpcError as error:
-                print(error)
-                attempts += 1
-                time.sleep(retry_interval)
-                retry_interval *= 2
+                rpc(stub, self._gRPC_config["grpc_send_timeout"])
+            except grpc.RpcError as error:
+                result.error = error
+                self._circuit_breaker.record_failure(receiver_address, error)
+                self._channel_pool.reconnect(receiver_address)
+                if result.attempts < max_retry and not self._retry_scheduler.closed and \
+                        not self._circuit_breaker.is_open(receiver_address):
+                    self._retry_scheduler.submit(
+                        attempt, delay=self._gRPC_config["grpc_retry_interval"] * 2 ** (result.attempts - 1))
+                    return
+            except BaseException as error:
+                future.set_exception(error)
+                return
+            else:
+                result.success = True
+                result.error = None
+                self._circuit_breaker.record_success(receiver_address)
+            finish()
+
+        self._retry_scheduler.submit(attempt)
+        return future
+
+    def _send(self, receiver: str, receiver_address: str, payload: bytes, max_retry: int | None = None,
+              timings: dict | None = None):
+        """
+        :return: ``concurrent.futures.Future`` of the ``SendResult``
+        """
+        if len(payload) > self._gRPC_config["grpc_stream_threshold"]:
+            def rpc(stub, timeout):
+                stub.sendMessageStream(chunk_payload(payload, self._gRPC_config["grpc_chunk_size"]), timeout=timeout)
+        else:
+            def rpc(stub, timeout):
+                stub.sendMessage(payload, timeout=timeout)
+        return self._deliver(receiver, receiver_address, rpc, len(payload), max_retry=max_retry, timings=timings)
+
+    def _send_frame(self, receiver: str, receiver_address: str, buffers: list, size: int, request: bytes | None,
+                    timings: dict | None = None):
+        """
+            deliver a frame, large frames are streamed chunk by chunk straight from its buffers
+        :param request: the serialized ``Frame`` request of frames below the stream threshold
+        :return: ``concurrent.futures.Future`` of the ``SendResult``
+        """
+        if request is None:
+            def rpc(stub, timeout):
+                stub.sendFrameStream(chunk_buffers(buffers, size, self._gRPC_config["grpc_chunk_size"]), timeout=timeout)
+        else:
+            def rpc(stub, timeout):
+                stub.sendFrame(request, timeout=timeout)
+        return self._deliver(receiver, receiver_address, rpc, size, timings=timings)
+
+    def wire_format(self, communicator_address: str):
+        """
+            the wire format of messages to ``communicator_address``: "frame" if ``wire_format`` is
+            "frame" and the peer supports it, otherwise "protobuf". The negotiation with the peer
+            runs in the background, started by ``add_communicators``, and messages go out as
+            "protobuf" until it has finished.
+        """
+        if self._gRPC_config["wire_format"] != "frame":
+            return "protobuf"
+        if communicator_address in self._wire_formats:
+            return self._wire_formats[communicator_address]
+        self._negotiate(communicator_address)
+        return "protobuf"
+
+    def _negotiate(self, communicator_address: str):
+        """
+            negotiate the wire format with ``communicator_address`` on the retry scheduler, unless
+            it is known, already being negotiated, or the peer's circuit is open
+        """
+        if self._gRPC_config["wire_format"] != "frame" or communicator_address in self._wire_formats or \
+                self._retry_scheduler.closed or self._circuit_breaker.is_open(communicator_address):
+            return
+        with self._negotiation_lock:
+            if communicator_address in self._negotiating:
+                return
+            self._negotiating.add(communicator_address)
+
+        def negotiate():
+            wire_format = None
+            try:
+                response = self._channel_pool.get_stub(communicator_address).negotiate(
+                    gRPC_communication_manager_pb2.MessageResponse(msg=",".join(WIRE_FORMATS)),
+                    timeout=self._gRPC_config["grpc_negotiation_timeout"]
+                )
+                wire_format = response.msg if response.msg in WIRE_FORMATS else "protobuf"
+            except grpc.RpcError as error:
+                # an unreachable peer is negotiated again with the next message
+                if error.code() == grpc.StatusCode.UNIMPLEMENTED:
+                    wire_format = "protobuf"
             finally:
-                channel.close()
-            if success_flag:
-                break
+                with self._negotiation_lock:
+                    self._negotiating.discard(communicator_address)
+                    if wire_format is not None and communicator_address in self._communicators.values():
+                        self._wire_formats[communicator_address] = wire_format
+
+        self._retry_scheduler.submit(negotiate)
+
+    def is_shared_memory_peer(self, communicator_address: str):
+        """
+            check whether messages to ``communicator_address`` go through shared memory
+        """
+        return self._gRPC_config["shared_memory"] and \
+            communicator_address not in self._shared_memory_unreachable and \
+            is_local_address(communicator_address, self._ip)
 
-    def send(self, message: Message, receiver: str | list | None = None):
+    def _resolve_receivers(self, receiver: str | list | None):
         if receiver is not None:
             if not isinstance(receiver, list):
                 receiver = [receiver]
-            for each_receiver in receiver:
-                if each_receiver in self._communicators.keys():
-                    receiver_address = self._communicators[each_receiver]
-                    self._send(receiver_address, message)
+            return [each for each in receiver if each in self._communicators.keys()]
+        return list(self._communicators.keys())
+
+    @staticmethod
+    def _collect(pending: dict, wait: bool):
+        if not wait:
+            return pending
+        return {each_receiver: future.result() for each_receiver, future in pending.items()}
+
+    def send(self, message: Message, receiver: str | list | None = None, wait: bool = True):
+        """
+            send the message to the given receivers, or broadcast it to all communicators
+            if ``receiver`` is None. Deliveries to several receivers run concurrently, at
+            most ``grpc_broadcast_concurrency`` at a time, and retries of one receiver never
+            delay the others. With ``shared_memory`` enabled, the tensors are copied once into
+            a shared segment which all co-located receivers map. Receivers which negotiated the
+            "frame" wire format get the flat binary frame, the others the ``MessageRequest``.
+        :param wait: return right away with futures instead of the final results
+        :return: dict mapping receiver id to its ``SendResult``, or to a future of it if not ``wait``
+        """
+        receiver = self._resolve_receivers(receiver)
+        if len(receiver) == 0:
+            return dict()
+        codec = self._codecs.get(message.message_type)
+        local_receiver = [each for each in receiver if self.is_shared_memory_peer(self._communicators[each])]
+        # delivery group -> (encode time, payload, number of receivers) for the transfer metrics
+        encodings = dict()
+        segment = None
+        shared_payload = None
+        if len(local_receiver) > 0:
+            start_time = time.perf_counter()
+            segment = SharedSegmentWriter(min_tensor_bytes=self._gRPC_config["shared_memory_min_bytes"])
+            request = message.transform(to_list=True, codec=codec, segment=segment)
+            if segment.seal() is not None:
+                request.shared_segment = segment.name
+                request.shared_size = segment.size
+                shared_payload = request.SerializeToString()
+                encodings["shared_memory"] = (time.perf_counter() - start_time, shared_payload,
+                                              len(local_receiver))
+        frame_receiver = [
+            each for each in receiver
+            if (shared_payload is None or each not in local_receiver) and
+            self.wire_format(self._communicators[each]) == "frame"
+        ]
+        frame_buffers, frame_size, frame_payload = None, 0, None
+        if len(frame_receiver) > 0:
+            start_time = time.perf_counter()
+            frame_buffers, frame_size = encode_frame(message, codec=codec)
+            if frame_size <= self._gRPC_config["grpc_stream_threshold"]:
+                frame_payload = frame_request(frame_buffers, frame_size)
+            encodings["frame"] = (time.perf_counter() - start_time, frame_payload or frame_buffers,
+                                  len(frame_receiver))
+        protobuf_receiver = [
+            each for each in receiver
+            if each not in frame_receiver and (shared_payload is None or each not in local_receiver)
+        ]
+        payload = None
+        if len(protobuf_receiver) > 0:
+            start_time = time.perf_counter()
+            payload = message.encode(codec=codec)
+            encodings["protobuf"] = (time.perf_counter() - start_time, payload, len(protobuf_receiver))
+        groups = {each: "shared_memory" if shared_payload is not None and each in local_receiver else
+                  "frame" if each in frame_receiver else "protobuf" for each in receiver}
+
+        def timings(group):
+            # the encode time of a payload is split among the receivers sharing it
+            encode_time, _, num_receivers = encodings[group]
+            return {"encode_time": encode_time / num_receivers}
+
+        def send_shared(each_receiver):
+            address = self._communicators[each_receiver]
+            shared_future = self._send(each_receiver, address, shared_payload, max_retry=1,
+                                       timings=timings("shared_memory"))
+            future = futures.Future()
+
+            def fall_back(done):
+                try:
+                    result = done.result()
+                    if result.success or not isinstance(result.error, grpc.RpcError) or \
+                            result.error.code() != grpc.StatusCode.FAILED_PRECONDITION:
+                        future.set_result(result)
+                        return
+                    # the peer cannot map the segment, e.g. it is behind a forwarded port
+                    self._shared_memory_unreachable.add(address)
+                    if payload is not None:
+                        fallback_payload, fallback_timings = payload, timings("protobuf")
+                        groups[each_receiver] = "protobuf"
+                    else:
+                        start_time = time.perf_counter()
+                        fallback_payload = message.encode(codec=codec)
+                        fallback_timings = {"encode_time": time.perf_counter() - start_time}
+                        groups[each_receiver] = None
+                    self._send(each_receiver, address, fallback_payload, timings=fallback_timings).add_done_callback(
+                        lambda fallback_done: future.set_result(fallback_done.result()))
+                except BaseException as error:
+                    future.set_exception(error)
+
+            shared_future.add_done_callback(fall_back)
+            return future
+
+        pending = dict()
+        for each_receiver in receiver:
+            if groups[each_receiver] == "shared_memory":
+                pending[each_receiver] = send_shared(each_receiver)
+            elif groups[each_receiver] == "frame":
+                pending[each_receiver] = self._send_frame(
+                    each_receiver, self._communicators[each_receiver], frame_buffers, frame_size, frame_payload,
+                    timings=timings("frame"))
+            else:
+                pending[each_receiver] = self._send(each_receiver, self._communicators[each_receiver], payload,
+                                                    timings=timings("protobuf"))
+        if segment is not None:
+            # the segment is removed once every co-located receiver has mapped it
+            shared_pending = [pending[each] for each in local_receiver]
+            remaining = [len(shared_pending)]
+            lock = threading.Lock()
+
+            def unlink(_):
+                with lock:
+                    remaining[0] -= 1
+                    if remaining[0] == 0:
+                        segment.unlink()
+
+            for future in shared_pending:
+                future.add_done_callback(unlink)
+        self._record_sends(message, pending, encodings, groups)
+        return self._collect(pending, wait)
+
+    def _record_sends(self, message: Message, pending: dict, encodings: dict, groups: dict):
+        """
+            account the deliveries of a message in the transfer metrics once they finish, the
+            encode time of each delivery comes with its ``SendResult``
+        :param encodings: delivery group -> (encode time, payload or frame buffers, number of receivers)
+        :param groups: receiver -> delivery group of the payload it got, None if not in ``encodings``
+        """
+        compression = self._gRPC_config["grpc_compression"].lower()
+        compressed = dict()
+        if self._gRPC_config["metrics_measure_compression"]:
+            for group, (_, payload, _) in encodings.items():
+                compressed[group] = compressed_size(
+                    payload if isinstance(payload, bytes) else b"".join(payload), compression)
+
+        def record(future):
+            if future.exception() is not None:
+                return
+            result = future.result()
+            delivered = result.attempts > 0
+            self._metrics.record(TransferRecord(
+                SEND, result.receiver, message.message_type, message.communication_round,
+                num_bytes=result.num_bytes if delivered else 0,
+                compressed_bytes=compressed.get(groups[result.receiver]) if delivered else None,
+                encode_time=result.timings.get("encode_time", 0.0),
+                rpc_time=result.latency,
+                attempts=result.attempts,
+                success=result.success
+            ))
+
+        for future in pending.values():
+            future.add_done_callback(record)
+
+    def send_model(self, model, message: Message, receiver: str | list | None = None, layout=None,
+                   wait: bool = True):
+        """
+            pipelined transfer of ``model``: its ``state_dict`` entries are encoded in layer order
+            and each chunk is on the wire while the next one is encoded, the receiver copies
+            chunks into its model as they arrive (see ``receive_transfer``). ``message`` is sent
+            along as header, e.g. with the round and sample count.
+        :param layout: ``LayoutManifest`` selecting the entries to send, all entries by default
+        :param wait: return right away with futures instead of the final results
+        :return: dict mapping receiver id to its ``SendResult``, ``timings`` holds the encode time
+        """
+        receiver = self._resolve_receivers(receiver)
+        state_dict = model.state_dict()
+        names = layout.names if layout is not None else list(state_dict.keys())
+        num_bytes = sum(state_dict[name].numel() * state_dict[name].element_size() for name in names)
+
+        def send_to(each_receiver):
+            timings = dict()
+
+            def rpc(stub, timeout):
+                timings.clear()
+                stub.sendModelStream(iter_model_chunks(
+                    model, message, self._gRPC_config["grpc_chunk_size"], layout=layout, timings=timings),
+                    timeout=timeout)
+
+            return self._deliver(each_receiver, self._communicators[each_receiver], rpc, num_bytes, timings=timings)
+
+        def record(future):
+            if future.exception() is not None:
+                return
+            result = future.result()
+            self._metrics.record(TransferRecord(
+                SEND, result.receiver, message.message_type, message.communication_round,
+                num_bytes=result.num_bytes if result.attempts > 0 else 0,
+                encode_time=result.timings.get("encode_time", 0.0),
+                rpc_time=result.latency,
+                attempts=result.attempts,
+                success=result.success
+            ))
+
+        pending = {each_receiver: send_to(each_receiver) for each_receiver in receiver}
+        for future in pending.values():
+            future.add_done_callback(record)
+        return self._collect(pending, wait)
+
+    def check_health(self, communicator_id: str | list | None = None, timeout: float | None = None):
+        """
+            check whether the pooled channels to the given communicators are ready
+        :return: dict mapping communicator id to a bool health flag
+        """
+        if communicator_id is None:
+            communicator_id = list(self._communicators.keys())
+        elif not isinstance(communicator_id, list):
+            communicator_id = [communicator_id]
+        return {
+            each: self._channel_pool.check_health(self._communicators[each], timeout=timeout)
+            for each in communicator_id
+        }
+
+    def _parse(self, received_message):
+        start_time = time.perf_counter()
+        if isinstance(received_message, (bytes, bytearray)):
+            num_bytes = len(received_message)
+            message = decode_frame(received_message)
         else:
-            for each_receiver in self._communicators.keys():
-                receiver_address = self._communicators[each_receiver]
-                self._send(receiver_address, message)
-
-    def receive(self):
-        received_message = self.server_funcs.receive()
-        message = Message()
-        message.parse(received_message.msg)
+            num_bytes = received_message.ByteSize()
+            message = Message()
+            segment = None
+            if received_message.shared_segment:
+                segment = self.server_funcs.pop_shared_segment(received_message.shared_segment)
+            message.parse(received_message.msg, segment=segment)
+        self._metrics.record(TransferRecord(
+            RECEIVE, message.sender, message.message_type, message.communication_round,
+            num_bytes=num_bytes, decode_time=time.perf_counter() - start_time, attempts=1
+        ))
+        loader = message.content_loader
+        if loader is not None:
+            # the content is decoded on its first access, its decode time is added then
+            def load():
+                decode_start = time.perf_counter()
+                content = loader()
+                self._metrics.record_decode(message.sender, message.message_type, message.communication_round,
+                                            time.perf_counter() - decode_start)
+                return content
+
+            message.set_content_loader(load)
         return message
+
+    def receive(self, timeout: float | None = None):
+        """
+            block until a message arrives, or return None after ``timeout`` seconds
+        """
+        received_message = self.server_funcs.receive(timeout=timeout)
+        if received_message is None:
+            return None
+        return self._parse(received_message)
+
+    def try_receive(self):
+        received_message = self.server_funcs.try_receive()
+        if received_message is None:
+            return None
+        return self._parse(received_message)
+
+    def receive_many(self, n: int, timeout: float | None = None):
+        """
+            gather up to ``n`` messages, e.g. all updates of a round
+        :return: list of messages, shorter than ``n`` if ``timeout`` expired
+        """
+        return [self._parse(each) for each in self.server_funcs.receive_many(n, timeout=timeout)]
+
+    def receive_transfer(self, timeout: float | None = None):
+        """
+            block until a pipelined model transfer sent by ``send_model`` starts
+        :return: ``PipelinedTransfer`` whose chunks are consumed while they arrive, e.g. with
+            ``transfer.copy_into(model)``, or None after ``timeout`` seconds
+        """
+        return self.server_funcs.receive_transfer(timeout=timeout)
@@ -0,0 +1,232 @@
+import json
+import struct
+import warnings
+
+import numpy as np
+import torch
+from . import gRPC_communication_manager_pb2 as gRPC_communication_manager_pb2
+from .codec import Codec, CodedTensor, get_codec
+from .message import Message
+
+# flat binary frame, an alternative to the nested ``MsgValue`` tree of ``MessageRequest``:
+#   fixed header | JSON metadata | padding | aligned raw tensor segments
+# the metadata carries the header fields and the content tree, numbers keep their full
+# precision (float64, arbitrary ints) and tensors are references into the segments
+FRAME_MAGIC = b"FLFR"
+FRAME_VERSION = 1
+# magic, version, flags, metadata length, data length
+FRAME_HEADER = struct.Struct("<4sHHIQ")
+FRAME_ALIGNMENT = 64
+WIRE_FORMATS = ("frame", "protobuf")
+
+_TENSOR_TAG = "__tensor__"
+_CODED_TAG = "__coded__"
+_BYTES_TAG = "__bytes__"
+_INT_DICT_TAG = "__dict_int__"
+_DICT_TAG = "__dict__"
+_TAGS = (_TENSOR_TAG, _CODED_TAG, _BYTES_TAG, _INT_DICT_TAG, _DICT_TAG)
+
+
+def _align(offset: int):
+    return -(-offset // FRAME_ALIGNMENT) * FRAME_ALIGNMENT
+
+
+class _Segments:
+    """
+    The raw tensor segments of a frame, kept as a list of buffers so the frame is never
+    assembled in memory on the sending side.
+    """
+    def __init__(self):
+        self.buffers = []
+        self.size = 0
+
+    def add(self, buffer):
+        offset = _align(self.size)
+        if offset > self.size:
+            self.buffers.append(bytes(offset - self.size))
+        self.buffers.append(buffer)
+        self.size = offset + len(buffer)
+        return offset
+
+    def add_tensor(self, value):
+        if isinstance(value, torch.Tensor):
+            value = value.detach().cpu().contiguous()
+            reference = {
+                "framework": "torch",
+                "dtype": str(value.dtype).split(".")[-1],
+                "shape": list(value.shape),
+            }
+            buffer = memoryview(value.reshape(-1).view(torch.uint8).numpy())
+        else:
+            if value.dtype.hasobject:
+                raise ValueError(f'The data type {value.dtype} has not been supported.')
+            value = np.ascontiguousarray(value)
+            reference = {
+                "framework": "numpy",
+                "dtype": value.dtype.str,
+                "shape": list(value.shape),
+            }
+            buffer = memoryview(value.reshape(-1).view(np.uint8))
+        reference["nbytes"] = len(buffer)
+        reference["offset"] = self.add(buffer)
+        return reference
+
+
+def _pack(value, segments: _Segments):
+    if isinstance(value, dict):
+        if all(isinstance(key, str) for key in value.keys()):
+            packed = {key: _pack(each, segments) for key, each in value.items()}
+            if len(packed) == 1 and next(iter(packed)) in _TAGS:
+                return {_DICT_TAG: packed}
+            return packed
+        return {_INT_DICT_TAG: [[int(key), _pack(each, segments)] for key, each in value.items()]}
+    elif isinstance(value, list) or isinstance(value, tuple):
+        return [_pack(each, segments) for each in value]
+    elif isinstance(value, torch.Tensor) or isinstance(value, np.ndarray):
+        return {_TENSOR_TAG: segments.add_tensor(value)}
+    elif isinstance(value, CodedTensor):
+        return {_CODED_TAG: {
+            "codec": value.codec,
+            "dtype": value.dtype,
+            "shape": list(value.shape),
+            "params": value.params,
+            "tensors": {key: segments.add_tensor(tensor) for key, tensor in value.tensors.items()},
+        }}
+    elif isinstance(value, bytes):
+        return {_BYTES_TAG: {"offset": segments.add(value), "nbytes": len(value)}}
+    elif isinstance(value, np.generic):
+        return value.item()
+    elif value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    raise ValueError(f'The data type {type(value)} has not been supported.')
+
+
+def _map_tensor(buffer, data_start: int, reference: dict):
+    offset = data_start + reference["offset"]
+    shape = tuple(reference["shape"])
+    if reference["framework"] == "numpy":
+        dtype = np.dtype(reference["dtype"])
+        return np.frombuffer(buffer, dtype=dtype, count=reference["nbytes"] // dtype.itemsize,
+                             offset=offset).reshape(shape)
+    dtype = getattr(torch, reference["dtype"])
+    if reference["nbytes"] == 0:
+        return torch.empty(shape, dtype=dtype)
+    with warnings.catch_warnings():
+        # the received buffer is owned by the message only, so writing to it is safe
+        warnings.simplefilter("ignore", UserWarning)
+        return torch.frombuffer(buffer, dtype=dtype, count=reference["nbytes"] // dtype.itemsize,
+                                offset=offset).view(shape)
+
+
+def _unpack(value, buffer, data_start: int):
+    if isinstance(value, list):
+        return [_unpack(each, buffer, data_start) for each in value]
+    elif isinstance(value, dict):
+        if len(value) == 1:
+            tag, packed = next(iter(value.items()))
+            if tag == _TENSOR_TAG:
+                return _map_tensor(buffer, data_start, packed)
+            elif tag == _CODED_TAG:
+                # compressed tensors are decoded on arrival
+                return CodedTensor(
+                    codec=packed["codec"],
+                    dtype=packed["dtype"],
+                    shape=packed["shape"],
+                    tensors={key: _map_tensor(buffer, data_start, each) for key, each in packed["tensors"].items()},
+                    params=packed["params"]
+                ).decode()
+            elif tag == _BYTES_TAG:
+                offset = data_start + packed["offset"]
+                return bytes(buffer[offset:offset + packed["nbytes"]])
+            elif tag == _INT_DICT_TAG:
+                return {key: _unpack(each, buffer, data_start) for key, each in packed}
+            elif tag == _DICT_TAG:
+                value = packed
+        return {key: _unpack(each, buffer, data_start) for key, each in value.items()}
+    return value
+
+
+def encode_frame(message: Message, codec: str | dict | Codec | None = None):
+    """
+        serialize the message into a frame without assembling it: the returned buffers are the
+        header with the metadata followed by views of the tensors' memory, ready to be written
+        one after another (writev-style)
+    :param codec: codec compressing the floating-point tensors of the content, see ``codec.py``
+    :return: tuple of (list of buffers, total size of the frame)
+    """
+    segments = _Segments()
+    content = message.transform_to_list(message.content, get_codec(codec))
+    metadata = json.dumps({
+        "message_type": _pack(message.message_type, segments),
+        "sender": _pack(message.sender, segments),
+        "receiver": _pack(message.receiver, segments),
+        "communication_round": _pack(message.communication_round, segments),
+        "timestamp": message.timestamp,
+        "content": _pack(content, segments),
+    }, separators=(",", ":")).encode()
+    data_start = _align(FRAME_HEADER.size + len(metadata))
+    head = FRAME_HEADER.pack(FRAME_MAGIC, FRAME_VERSION, 0, len(metadata), segments.size) + metadata
+    head += bytes(data_start - len(head))
+    return [head] + segments.buffers, data_start + segments.size
+
+
+def decode_frame(buffer):
+    """
+        rebuild a message from a received frame, the header fields are decoded right away,
+        the content on its first access with its tensors mapped in place over ``buffer``
+    """
+    view = memoryview(buffer)
+    magic, version, _, metadata_size, data_size = FRAME_HEADER.unpack_from(view)
+    if magic != FRAME_MAGIC or version != FRAME_VERSION:
+        raise ValueError("The buffer is not a frame of a supported version")
+    data_start = _align(FRAME_HEADER.size + metadata_size)
+    if data_start + data_size > len(view):
+        raise ValueError("The frame is truncated")
+    metadata = json.loads(bytes(view[FRAME_HEADER.size:FRAME_HEADER.size + metadata_size]))
+    message = Message(
+        message_type=metadata["message_type"],
+        sender=metadata["sender"],
+        receiver=metadata["receiver"],
+        communication_round=metadata["communication_round"]
+    )
+    message.timestamp = metadata["timestamp"]
+    message.set_content_loader(lambda: _unpack(metadata["content"], buffer, data_start))
+    return message
+
+
+def frame_request(buffers: list, size: int):
+    """
+        wrap the frame into a serialized ``Frame`` request, written in a single pass over the buffers
+    """
+    # field 1 with wire type 2 (length-delimited), followed by the varint length
+    prefix = bytearray(b"\x0a")
+    while size > 0x7F:
+        prefix.append((size & 0x7F) | 0x80)
+        size >>= 7
+    prefix.append(size)
+    return b"".join([bytes(prefix)] + buffers)
+
+
+def chunk_buffers(buffers: list, size: int, chunk_size: int):
+    """
+        split the frame buffers into ``MessageChunk``s without assembling the frame first
+    """
+    pending = []
+    pending_size = 0
+    offset = 0
+    for buffer in buffers:
+        view = memoryview(buffer).cast("B")
+        start = 0
+        while start < len(view):
+            piece = view[start:start + chunk_size - pending_size]
+            pending.append(piece)
+            pending_size += len(piece)
+            start += len(piece)
+            if pending_size == chunk_size:
+                yield gRPC_communication_manager_pb2.MessageChunk(
+                    total_size=size, offset=offset, data=b"".join(pending))
+                offset += pending_size
+                pending = []
+                pending_size = 0
+    if pending_size > 0:
+        yield gRPC_communication_manager_pb2.MessageChunk(total_size=size, offset=offset, data=b"".join(pending))
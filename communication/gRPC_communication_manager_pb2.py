@@ -14,7 +14,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n gRPC_communication_manager.proto\"n\n\x0eMessageRequest\x12%\n\x03msg\x18\x01 \x03(\x0b\x32\x18.MessageRequest.MsgEntry\x1a\x35\n\x08MsgEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\x18\n\x05value\x18\x02 \x01(\x0b\x32\t.MsgValue:\x02\x38\x01\"\x1e\n\x0fMessageResponse\x12\x0b\n\x03msg\x18\x01 \x01(\t\"\xae\x01\n\x08MsgValue\x12\x1e\n\nsingle_msg\x18\x01 \x01(\x0b\x32\x08.mSingleH\x00\x12\x1a\n\x08list_msg\x18\x02 \x01(\x0b\x32\x06.mListH\x00\x12\x31\n\x13\x64ict_msg_string_key\x18\x03 \x01(\x0b\x32\x12.mDict_keyIsStringH\x00\x12+\n\x10\x64ict_msg_int_key\x18\x04 \x01(\x0b\x32\x0f.mDict_keyIsIntH\x00\x42\x06\n\x04type\"R\n\x07mSingle\x12\x15\n\x0b\x66loat_value\x18\x01 \x01(\x02H\x00\x12\x13\n\tint_value\x18\x02 \x01(\x05H\x00\x12\x13\n\tstr_value\x18\x03 \x01(\tH\x00\x42\x06\n\x04type\"&\n\x05mList\x12\x1d\n\nlist_value\x18\x01 \x03(\x0b\x32\t.MsgValue\"\x87\x01\n\x11mDict_keyIsString\x12\x35\n\ndict_value\x18\x01 \x03(\x0b\x32!.mDict_keyIsString.DictValueEntry\x1a;\n\x0e\x44ictValueEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\x18\n\x05value\x18\x02 \x01(\x0b\x32\t.MsgValue:\x02\x38\x01\"\x81\x01\n\x0emDict_keyIsInt\x12\x32\n\ndict_value\x18\x01 \x03(\x0b\x32\x1e.mDict_keyIsInt.DictValueEntry\x1a;\n\x0e\x44ictValueEntry\x12\x0b\n\x03key\x18\x01 \x01(\x05\x12\x18\n\x05value\x18\x02 \x01(\x0b\x32\t.MsgValue:\x02\x38\x01\x32\x46\n\x10gRPCComServeFunc\x12\x32\n\x0bsendMessage\x12\x0f.MessageRequest\x1a\x10.MessageResponse\"\x00\x62\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n gRPC_communication_manager.proto\"\x9b\x01\n\x0eMessageRequest\x12%\n\x03msg\x18\x01 \x03(\x0b\x32\x18.MessageRequest.MsgEntry\x12\x16\n\x0eshared_segment\x18\x02 \x01(\t\x12\x13\n\x0bshared_size\x18\x03 \x01(\x03\x1a\x35\n\x08MsgEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\x18\n\x05value\x18\x02 \x01(\x0b\x32\t.MsgValue:\x02\x38\x01\"\x1e\n\x0fMessageResponse\x12\x0b\n\x03msg\x18\x01 \x01(\t\"\x15\n\x05\x46rame\x12\x0c\n\x04\x64\x61ta\x18\x01 \x01(\x0c\"@\n\x0cMessageChunk\x12\x12\n\ntotal_size\x18\x01 \x01(\x03\x12\x0e\n\x06offset\x18\x02 \x01(\x03\x12\x0c\n\x04\x64\x61ta\x18\x03 \x01(\x0c\"t\n\nModelChunk\x12\x1f\n\x06header\x18\x01 \x01(\x0b\x32\x0f.MessageRequest\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\r\n\x05start\x18\x03 \x01(\x03\x12\x0e\n\x06offset\x18\x04 \x01(\x03\x12\x18\n\x06tensor\x18\x05 \x01(\x0b\x32\x08.mTensor\"\xf0\x02\n\x08MsgValue\x12\x1e\n\nsingle_msg\x18\x01 \x01(\x0b\x32\x08.mSingleH\x00\x12\x1a\n\x08list_msg\x18\x02 \x01(\x0b\x32\x06.mListH\x00\x12\x31\n\x13\x64ict_msg_string_key\x18\x03 \x01(\x0b\x32\x12.mDict_keyIsStringH\x00\x12+\n\x10\x64ict_msg_int_key\x18\x04 \x01(\x0b\x32\x0f.mDict_keyIsIntH\x00\x12\x1e\n\ntensor_msg\x18\x05 \x01(\x0b\x32\x08.mTensorH\x00\x12%\n\x0e\x66loat_list_msg\x18\x06 \x01(\x0b\x32\x0b.mFloatListH\x00\x12\'\n\x0f\x64ouble_list_msg\x18\x07 \x01(\x0b\x32\x0c.mDoubleListH\x00\x12%\n\x0eint64_list_msg\x18\x08 \x01(\x0b\x32\x0b.mInt64ListH\x00\x12)\n\x10\x63oded_tensor_msg\x18\t \x01(\x0b\x32\r.mCodedTensorH\x00\x42\x06\n\x04type\"R\n\x07mSingle\x12\x15\n\x0b\x66loat_value\x18\x01 \x01(\x02H\x00\x12\x13\n\tint_value\x18\x02 \x01(\x05H\x00\x12\x13\n\tstr_value\x18\x03 \x01(\tH\x00\x42\x06\n\x04type\"{\n\x07mTensor\x12\r\n\x05\x64type\x18\x01 \x01(\t\x12\r\n\x05shape\x18\x02 \x03(\x03\x12\x0e\n\x06\x62uffer\x18\x03 \x01(\x0c\x12\x11\n\tframework\x18\x04 \x01(\t\x12\x18\n\x10in_shared_memory\x18\x05 \x01(\x08\x12\x15\n\rshared_offset\x18\x06 \x01(\x03\"\xfc\x01\n\x0cmCodedTensor\x12\r\n\x05\x63odec\x18\x01 \x01(\t\x12\r\n\x05\x64type\x18\x02 \x01(\t\x12\r\n\x05shape\x18\x03 \x03(\x03\x12+\n\x07tensors\x18\x04 \x03(\x0b\x32\x1a.mCodedTensor.TensorsEntry\x12)\n\x06params\x18\x05 \x03(\x0b\x32\x19.mCodedTensor.ParamsEntry\x1a\x38\n\x0cTensorsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\x17\n\x05value\x18\x02 \x01(\x0b\x32\x08.mTensor:\x02\x38\x01\x1a-\n\x0bParamsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x03:\x02\x38\x01\"\x1c\n\nmFloatList\x12\x0e\n\x06values\x18\x01 \x03(\x02\"\x1d\n\x0bmDoubleList\x12\x0e\n\x06values\x18\x01 \x03(\x01\"\x1c\n\nmInt64List\x12\x0e\n\x06values\x18\x01 \x03(\x03\"&\n\x05mList\x12\x1d\n\nlist_value\x18\x01 \x03(\x0b\x32\t.MsgValue\"\x87\x01\n\x11mDict_keyIsString\x12\x35\n\ndict_value\x18\x01 \x03(\x0b\x32!.mDict_keyIsString.DictValueEntry\x1a;\n\x0e\x44ictValueEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\x18\n\x05value\x18\x02 \x01(\x0b\x32\t.MsgValue:\x02\x38\x01\"\x81\x01\n\x0emDict_keyIsInt\x12\x32\n\ndict_value\x18\x01 \x03(\x0b\x32\x1e.mDict_keyIsInt.DictValueEntry\x1a;\n\x0e\x44ictValueEntry\x12\x0b\n\x03key\x18\x01 \x01(\x05\x12\x18\n\x05value\x18\x02 \x01(\x0b\x32\t.MsgValue:\x02\x38\x01\x32\xca\x02\n\x10gRPCComServeFunc\x12\x32\n\x0bsendMessage\x12\x0f.MessageRequest\x1a\x10.MessageResponse\"\x00\x12\x38\n\x11sendMessageStream\x12\r.MessageChunk\x1a\x10.MessageResponse\"\x00(\x01\x12\x34\n\x0fsendModelStream\x12\x0b.ModelChunk\x1a\x10.MessageResponse\"\x00(\x01\x12\'\n\tsendFrame\x12\x06.Frame\x1a\x10.MessageResponse\"\x00\x12\x36\n\x0fsendFrameStream\x12\r.MessageChunk\x1a\x10.MessageResponse\"\x00(\x01\x12\x31\n\tnegotiate\x12\x10.MessageResponse\x1a\x10.MessageResponse\"\x00\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -23,30 +23,54 @@ if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
   _globals['_MESSAGEREQUEST_MSGENTRY']._loaded_options = None
   _globals['_MESSAGEREQUEST_MSGENTRY']._serialized_options = b'8\001'
+  _globals['_MCODEDTENSOR_TENSORSENTRY']._loaded_options = None
+  _globals['_MCODEDTENSOR_TENSORSENTRY']._serialized_options = b'8\001'
+  _globals['_MCODEDTENSOR_PARAMSENTRY']._loaded_options = None
+  _globals['_MCODEDTENSOR_PARAMSENTRY']._serialized_options = b'8\001'
   _globals['_MDICT_KEYISSTRING_DICTVALUEENTRY']._loaded_options = None
   _globals['_MDICT_KEYISSTRING_DICTVALUEENTRY']._serialized_options = b'8\001'
   _globals['_MDICT_KEYISINT_DICTVALUEENTRY']._loaded_options = None
   _globals['_MDICT_KEYISINT_DICTVALUEENTRY']._serialized_options = b'8\001'
-  _globals['_MESSAGEREQUEST']._serialized_start=36
-  _globals['_MESSAGEREQUEST']._serialized_end=146
-  _globals['_MESSAGEREQUEST_MSGENTRY']._serialized_start=93
-  _globals['_MESSAGEREQUEST_MSGENTRY']._serialized_end=146
-  _globals['_MESSAGERESPONSE']._serialized_start=148
-  _globals['_MESSAGERESPONSE']._serialized_end=178
-  _globals['_MSGVALUE']._serialized_start=181
-  _globals['_MSGVALUE']._serialized_end=355
-  _globals['_MSINGLE']._serialized_start=357
-  _globals['_MSINGLE']._serialized_end=439
-  _globals['_MLIST']._serialized_start=441
-  _globals['_MLIST']._serialized_end=479
-  _globals['_MDICT_KEYISSTRING']._serialized_start=482
-  _globals['_MDICT_KEYISSTRING']._serialized_end=617
-  _globals['_MDICT_KEYISSTRING_DICTVALUEENTRY']._serialized_start=558
-  _globals['_MDICT_KEYISSTRING_DICTVALUEENTRY']._serialized_end=617
-  _globals['_MDICT_KEYISINT']._serialized_start=620
-  _globals['_MDICT_KEYISINT']._serialized_end=749
-  _globals['_MDICT_KEYISINT_DICTVALUEENTRY']._serialized_start=690
-  _globals['_MDICT_KEYISINT_DICTVALUEENTRY']._serialized_end=749
-  _globals['_GRPCCOMSERVEFUNC']._serialized_start=751
-  _globals['_GRPCCOMSERVEFUNC']._serialized_end=821
+  _globals['_MESSAGEREQUEST']._serialized_start=37
+  _globals['_MESSAGEREQUEST']._serialized_end=192
+  _globals['_MESSAGEREQUEST_MSGENTRY']._serialized_start=139
+  _globals['_MESSAGEREQUEST_MSGENTRY']._serialized_end=192
+  _globals['_MESSAGERESPONSE']._serialized_start=194
+  _globals['_MESSAGERESPONSE']._serialized_end=224
+  _globals['_FRAME']._serialized_start=226
+  _globals['_FRAME']._serialized_end=247
+  _globals['_MESSAGECHUNK']._serialized_start=249
+  _globals['_MESSAGECHUNK']._serialized_end=313
+  _globals['_MODELCHUNK']._serialized_start=315
+  _globals['_MODELCHUNK']._serialized_end=431
+  _globals['_MSGVALUE']._serialized_start=434
+  _globals['_MSGVALUE']._serialized_end=802
+  _globals['_MSINGLE']._serialized_start=804
+  _globals['_MSINGLE']._serialized_end=886
+  _globals['_MTENSOR']._serialized_start=888
+  _globals['_MTENSOR']._serialized_end=1011
+  _globals['_MCODEDTENSOR']._serialized_start=1014
+  _globals['_MCODEDTENSOR']._serialized_end=1266
+  _globals['_MCODEDTENSOR_TENSORSENTRY']._serialized_start=1163
+  _globals['_MCODEDTENSOR_TENSORSENTRY']._serialized_end=1219
+  _globals['_MCODEDTENSOR_PARAMSENTRY']._serialized_start=1221
+  _globals['_MCODEDTENSOR_PARAMSENTRY']._serialized_end=1266
+  _globals['_MFLOATLIST']._serialized_start=1268
+  _globals['_MFLOATLIST']._serialized_end=1296
+  _globals['_MDOUBLELIST']._serialized_start=1298
+  _globals['_MDOUBLELIST']._serialized_end=1327
+  _globals['_MINT64LIST']._serialized_start=1329
+  _globals['_MINT64LIST']._serialized_end=1357
+  _globals['_MLIST']._serialized_start=1359
+  _globals['_MLIST']._serialized_end=1397
+  _globals['_MDICT_KEYISSTRING']._serialized_start=1400
+  _globals['_MDICT_KEYISSTRING']._serialized_end=1535
+  _globals['_MDICT_KEYISSTRING_DICTVALUEENTRY']._serialized_start=1476
+  _globals['_MDICT_KEYISSTRING_DICTVALUEENTRY']._serialized_end=1535
+  _globals['_MDICT_KEYISINT']._serialized_start=1538
+  _globals['_MDICT_KEYISINT']._serialized_end=1667
+  _globals['_MDICT_KEYISINT_DICTVALUEENTRY']._serialized_start=1608
+  _globals['_MDICT_KEYISINT_DICTVALUEENTRY']._serialized_end=1667
+  _globals['_GRPCCOMSERVEFUNC']._serialized_start=1670
+  _globals['_GRPCCOMSERVEFUNC']._serialized_end=2000
 # @@protoc_insertion_point(module_scope)
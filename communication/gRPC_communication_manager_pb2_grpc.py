@@ -44,6 +44,31 @@ class gRPCComServeFuncStub(object):
                 request_serializer=gRPC__communication__manager__pb2.MessageRequest.SerializeToString,
                 response_deserializer=gRPC__communication__manager__pb2.MessageResponse.FromString,
                 _registered_method=True)
+        self.sendMessageStream = channel.stream_unary(
+                '/gRPCComServeFunc/sendMessageStream',
+                request_serializer=gRPC__communication__manager__pb2.MessageChunk.SerializeToString,
+                response_deserializer=gRPC__communication__manager__pb2.MessageResponse.FromString,
+                _registered_method=True)
+        self.sendModelStream = channel.stream_unary(
+                '/gRPCComServeFunc/sendModelStream',
+                request_serializer=gRPC__communication__manager__pb2.ModelChunk.SerializeToString,
+                response_deserializer=gRPC__communication__manager__pb2.MessageResponse.FromString,
+                _registered_method=True)
+        self.sendFrame = channel.unary_unary(
+                '/gRPCComServeFunc/sendFrame',
+                request_serializer=gRPC__communication__manager__pb2.Frame.SerializeToString,
+                response_deserializer=gRPC__communication__manager__pb2.MessageResponse.FromString,
+                _registered_method=True)
+        self.sendFrameStream = channel.stream_unary(
+                '/gRPCComServeFunc/sendFrameStream',
+                request_serializer=gRPC__communication__manager__pb2.MessageChunk.SerializeToString,
+                response_deserializer=gRPC__communication__manager__pb2.MessageResponse.FromString,
+                _registered_method=True)
+        self.negotiate = channel.unary_unary(
+                '/gRPCComServeFunc/negotiate',
+                request_serializer=gRPC__communication__manager__pb2.MessageResponse.SerializeToString,
+                response_deserializer=gRPC__communication__manager__pb2.MessageResponse.FromString,
+                _registered_method=True)
 
 
 class gRPCComServeFuncServicer(object):
@@ -55,6 +80,37 @@ class gRPCComServeFuncServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def sendMessageStream(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def sendModelStream(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def sendFrame(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def sendFrameStream(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def negotiate(self, request, context):
+        """the request lists the wire formats of the sender by preference, the response is the chosen one
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_gRPCComServeFuncServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -63,6 +119,31 @@ def add_gRPCComServeFuncServicer_to_server(servicer, server):
                     request_deserializer=gRPC__communication__manager__pb2.MessageRequest.FromString,
                     response_serializer=gRPC__communication__manager__pb2.MessageResponse.SerializeToString,
             ),
+            'sendMessageStream': grpc.stream_unary_rpc_method_handler(
+                    servicer.sendMessageStream,
+                    request_deserializer=gRPC__communication__manager__pb2.MessageChunk.FromString,
+                    response_serializer=gRPC__communication__manager__pb2.MessageResponse.SerializeToString,
+            ),
+            'sendModelStream': grpc.stream_unary_rpc_method_handler(
+                    servicer.sendModelStream,
+                    request_deserializer=gRPC__communication__manager__pb2.ModelChunk.FromString,
+                    response_serializer=gRPC__communication__manager__pb2.MessageResponse.SerializeToString,
+            ),
+            'sendFrame': grpc.unary_unary_rpc_method_handler(
+                    servicer.sendFrame,
+                    request_deserializer=gRPC__communication__manager__pb2.Frame.FromString,
+                    response_serializer=gRPC__communication__manager__pb2.MessageResponse.SerializeToString,
+            ),
+            'sendFrameStream': grpc.stream_unary_rpc_method_handler(
+                    servicer.sendFrameStream,
+                    request_deserializer=gRPC__communication__manager__pb2.MessageChunk.FromString,
+                    response_serializer=gRPC__communication__manager__pb2.MessageResponse.SerializeToString,
+            ),
+            'negotiate': grpc.unary_unary_rpc_method_handler(
+                    servicer.negotiate,
+                    request_deserializer=gRPC__communication__manager__pb2.MessageResponse.FromString,
+                    response_serializer=gRPC__communication__manager__pb2.MessageResponse.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'gRPCComServeFunc', rpc_method_handlers)
@@ -100,3 +181,138 @@ class gRPCComServeFunc(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def sendMessageStream(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(
+            request_iterator,
+            target,
+            '/gRPCComServeFunc/sendMessageStream',
+            gRPC__communication__manager__pb2.MessageChunk.SerializeToString,
+            gRPC__communication__manager__pb2.MessageResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def sendModelStream(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(
+            request_iterator,
+            target,
+            '/gRPCComServeFunc/sendModelStream',
+            gRPC__communication__manager__pb2.ModelChunk.SerializeToString,
+            gRPC__communication__manager__pb2.MessageResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def sendFrame(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/gRPCComServeFunc/sendFrame',
+            gRPC__communication__manager__pb2.Frame.SerializeToString,
+            gRPC__communication__manager__pb2.MessageResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def sendFrameStream(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(
+            request_iterator,
+            target,
+            '/gRPCComServeFunc/sendFrameStream',
+            gRPC__communication__manager__pb2.MessageChunk.SerializeToString,
+            gRPC__communication__manager__pb2.MessageResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def negotiate(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/gRPCComServeFunc/negotiate',
+            gRPC__communication__manager__pb2.MessageResponse.SerializeToString,
+            gRPC__communication__manager__pb2.MessageResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -1,20 +1,289 @@
-
+import asyncio
+import queue
+import threading
+import time
 from collections import deque
+import grpc
 from . import gRPC_communication_manager_pb2 as gRPC_communication_manager_pb2
 from . import gRPC_communication_manager_pb2_grpc as gRPC_communication_manager_pb2_grpc
+from .frame import WIRE_FORMATS
+from .pipeline import PipelinedTransfer
+from .shared_memory import SharedSegment
+
+
+def map_shared_segment(request):
+    """
+        map the shared segment of a request from a co-located peer, this must happen before
+        the request is acknowledged since the sender removes the segment afterwards
+    :return: ``SharedSegment``, None if the request carries its tensors inline
+    """
+    if not request.shared_segment:
+        return None
+    return SharedSegment(request.shared_segment, request.shared_size)
+
+
+def choose_wire_format(request):
+    """
+        pick the first wire format of the sender's preference list which this peer supports
+    """
+    for wire_format in request.msg.split(","):
+        if wire_format in WIRE_FORMATS:
+            return gRPC_communication_manager_pb2.MessageResponse(msg=wire_format)
+    return gRPC_communication_manager_pb2.MessageResponse(msg="protobuf")
 
 
 class gRPCComServeFunc(gRPC_communication_manager_pb2_grpc.gRPCComServeFuncServicer):
     def __init__(self):
         self.message_queue = deque()
+        self._queue_condition = threading.Condition()
+        self.transfer_queue = queue.Queue()
+        # name -> mapped ``SharedSegment``s of queued requests, see ``pop_shared_segment``
+        self.shared_segments = dict()
+
+    def _put(self, request, context):
+        try:
+            segment = map_shared_segment(request)
+        except (OSError, ValueError) as error:
+            context.abort(grpc.StatusCode.FAILED_PRECONDITION, f"Cannot map the shared segment: {error}")
+        with self._queue_condition:
+            if segment is not None:
+                self.shared_segments.setdefault(segment.name, []).append(segment)
+            self.message_queue.append(request)
+            self._queue_condition.notify()
+
+    def _put_frame(self, frame):
+        """
+            queue a received frame, it stays raw bytes until the consumer decodes it
+        """
+        with self._queue_condition:
+            self.message_queue.append(frame)
+            self._queue_condition.notify()
+
+    @staticmethod
+    def _reassemble(request_iterator, context):
+        """
+            reassemble a chunked message into one preallocated buffer, the chunks are
+            copied in place as they arrive so only a single copy of the payload is held
+        """
+        buffer = None
+        received_size = 0
+        for chunk in request_iterator:
+            if buffer is None:
+                buffer = bytearray(chunk.total_size)
+            chunk_size = len(chunk.data)
+            if chunk.offset + chunk_size > len(buffer):
+                context.abort(grpc.StatusCode.INVALID_ARGUMENT, "Chunk exceeds the announced message size")
+            buffer[chunk.offset:chunk.offset + chunk_size] = chunk.data
+            received_size += chunk_size
+        if buffer is None or received_size != len(buffer):
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, "Incomplete chunked message")
+        return buffer
+
+    def pop_shared_segment(self, name: str):
+        """
+            take the mapped segment of a dequeued request
+        """
+        with self._queue_condition:
+            segments = self.shared_segments.get(name)
+            if not segments:
+                return None
+            segment = segments.pop(0)
+            if len(segments) == 0:
+                del self.shared_segments[name]
+            return segment
 
     def sendMessage(self, request, context):
-        self.message_queue.append(request)
+        self._put(request, context)
+
+        return gRPC_communication_manager_pb2.MessageResponse(msg='ACK')
+
+    def sendMessageStream(self, request_iterator, context):
+        buffer = self._reassemble(request_iterator, context)
+        request = gRPC_communication_manager_pb2.MessageRequest.FromString(buffer)
+        del buffer
+        self._put(request, context)
 
         return gRPC_communication_manager_pb2.MessageResponse(msg='ACK')
 
-    def receive(self):
-        while len(self.message_queue) == 0:
-            continue
-        message = self.message_queue.popleft()
-        return message
+    def sendFrame(self, request, context):
+        self._put_frame(request.data)
+
+        return gRPC_communication_manager_pb2.MessageResponse(msg='ACK')
+
+    def sendFrameStream(self, request_iterator, context):
+        """
+            the reassembled buffer is queued as is, tensors are later mapped in place over it
+        """
+        self._put_frame(self._reassemble(request_iterator, context))
+
+        return gRPC_communication_manager_pb2.MessageResponse(msg='ACK')
+
+    def negotiate(self, request, context):
+        return choose_wire_format(request)
+
+    def sendModelStream(self, request_iterator, context):
+        """
+            hand a pipelined model transfer to the consumer on its first chunk, the following
+            chunks are passed on as they arrive
+        """
+        transfer = None
+        try:
+            for chunk in request_iterator:
+                if transfer is None:
+                    transfer = PipelinedTransfer(chunk.header)
+                    self.transfer_queue.put(transfer)
+                if not transfer.put(chunk, context.is_active):
+                    break
+            else:
+                if transfer is None or transfer.finish(context.is_active):
+                    return gRPC_communication_manager_pb2.MessageResponse(msg='ACK')
+        except Exception as error:
+            if transfer is not None:
+                transfer.fail(error)
+            raise
+        # the consumer closed the transfer or stopped taking chunks, or the sender is gone
+        if transfer.closed:
+            details = "The receiver closed the transfer"
+        else:
+            details = "The receiver stopped consuming the transfer"
+        transfer.fail(RuntimeError(details))
+        context.abort(grpc.StatusCode.ABORTED, details)
+
+    def receive_transfer(self, timeout: float | None = None):
+        """
+            block until a pipelined model transfer starts, or return None after ``timeout`` seconds
+        """
+        try:
+            return self.transfer_queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def receive(self, timeout: float | None = None):
+        """
+            block until a message arrives, or return None after ``timeout`` seconds
+        """
+        with self._queue_condition:
+            if not self._queue_condition.wait_for(lambda: len(self.message_queue) > 0, timeout=timeout):
+                return None
+            return self.message_queue.popleft()
+
+    def try_receive(self):
+        """
+            return the oldest queued message without blocking, or None if the queue is empty
+        """
+        with self._queue_condition:
+            if len(self.message_queue) == 0:
+                return None
+            return self.message_queue.popleft()
+
+    def receive_many(self, n: int, timeout: float | None = None):
+        """
+            gather up to ``n`` messages, returning early with fewer messages once
+            ``timeout`` seconds have passed
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        messages = []
+        with self._queue_condition:
+            while len(messages) < n:
+                remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                if not self._queue_condition.wait_for(lambda: len(self.message_queue) > 0, timeout=remaining):
+                    break
+                while len(self.message_queue) > 0 and len(messages) < n:
+                    messages.append(self.message_queue.popleft())
+        return messages
+
+
+class AsyncgRPCComServeFunc(gRPC_communication_manager_pb2_grpc.gRPCComServeFuncServicer):
+    """
+    ``gRPCComServeFunc`` for a ``grpc.aio`` server, incoming requests are queued on an
+    ``asyncio.Queue`` of the server's event loop.
+    """
+    def __init__(self):
+        self.message_queue = asyncio.Queue()
+        self.shared_segments = dict()
+
+    async def _put(self, request, context):
+        try:
+            segment = map_shared_segment(request)
+        except (OSError, ValueError) as error:
+            await context.abort(grpc.StatusCode.FAILED_PRECONDITION, f"Cannot map the shared segment: {error}")
+        if segment is not None:
+            self.shared_segments.setdefault(segment.name, []).append(segment)
+        self.message_queue.put_nowait(request)
+
+    def pop_shared_segment(self, name: str):
+        segments = self.shared_segments.get(name)
+        if not segments:
+            return None
+        segment = segments.pop(0)
+        if len(segments) == 0:
+            del self.shared_segments[name]
+        return segment
+
+    async def sendMessage(self, request, context):
+        await self._put(request, context)
+
+        return gRPC_communication_manager_pb2.MessageResponse(msg='ACK')
+
+    @staticmethod
+    async def _reassemble(request_iterator, context):
+        buffer = None
+        received_size = 0
+        async for chunk in request_iterator:
+            if buffer is None:
+                buffer = bytearray(chunk.total_size)
+            chunk_size = len(chunk.data)
+            if chunk.offset + chunk_size > len(buffer):
+                await context.abort(grpc.StatusCode.INVALID_ARGUMENT, "Chunk exceeds the announced message size")
+            buffer[chunk.offset:chunk.offset + chunk_size] = chunk.data
+            received_size += chunk_size
+        if buffer is None or received_size != len(buffer):
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, "Incomplete chunked message")
+        return buffer
+
+    async def sendMessageStream(self, request_iterator, context):
+        buffer = await self._reassemble(request_iterator, context)
+        request = gRPC_communication_manager_pb2.MessageRequest.FromString(buffer)
+        del buffer
+        await self._put(request, context)
+
+        return gRPC_communication_manager_pb2.MessageResponse(msg='ACK')
+
+    async def sendFrame(self, request, context):
+        self.message_queue.put_nowait(request.data)
+
+        return gRPC_communication_manager_pb2.MessageResponse(msg='ACK')
+
+    async def sendFrameStream(self, request_iterator, context):
+        self.message_queue.put_nowait(await self._reassemble(request_iterator, context))
+
+        return gRPC_communication_manager_pb2.MessageResponse(msg='ACK')
+
+    async def negotiate(self, request, context):
+        return choose_wire_format(request)
+
+    async def receive(self, timeout: float | None = None):
+        if not self.message_queue.empty():
+            return self.message_queue.get_nowait()
+        try:
+            return await asyncio.wait_for(self.message_queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def try_receive(self):
+        try:
+            return self.message_queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return None
+
+    async def receive_many(self, n: int, timeout: float | None = None):
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        messages = []
+        while len(messages) < n:
+            remaining = None if deadline is None else max(0.0, deadline - loop.time())
+            message = await self.receive(timeout=remaining)
+            if message is None:
+                break
+            messages.append(message)
+        return messages
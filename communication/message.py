@@ -1,14 +1,94 @@
 import json
-import pickle
-import base64
+import warnings
 import numpy as np
+import torch
 from . import gRPC_communication_manager_pb2 as gRPC_communication_manager_pb2
+from .codec import Codec, CodedTensor, get_codec
 from datetime import datetime
-from pympler import asizeof
 
 
-def b64serializer(x):
-    return base64.b64encode(pickle.dumps(x))
+def tensor_to_proto(value, segment=None):
+    """
+        pack a ``torch.Tensor`` or ``np.ndarray`` into a ``mTensor`` message, the raw
+        memory of the tensor is copied into the ``bytes`` buffer without any intermediate
+        Python list or base64 string
+    :param segment: ``SharedSegmentWriter`` of a message to co-located peers, large tensors
+        are placed in its shared memory and only their offset is stored in the message
+    """
+    m_tensor = gRPC_communication_manager_pb2.mTensor()
+    if isinstance(value, torch.Tensor):
+        value = value.detach().cpu().contiguous()
+        m_tensor.framework = "torch"
+        m_tensor.dtype = str(value.dtype).split(".")[-1]
+        m_tensor.shape.extend(value.shape)
+        offset = None if segment is None else segment.reserve(value)
+        if offset is not None:
+            m_tensor.in_shared_memory = True
+            m_tensor.shared_offset = offset
+        else:
+            m_tensor.buffer = value.reshape(-1).view(torch.uint8).numpy().tobytes()
+    elif isinstance(value, np.ndarray):
+        if value.dtype.hasobject:
+            raise ValueError(f'The data type {value.dtype} has not been supported.')
+        m_tensor.framework = "numpy"
+        m_tensor.dtype = value.dtype.str
+        m_tensor.shape.extend(value.shape)
+        value = np.ascontiguousarray(value)
+        offset = None if segment is None else segment.reserve(value)
+        if offset is not None:
+            m_tensor.in_shared_memory = True
+            m_tensor.shared_offset = offset
+        else:
+            m_tensor.buffer = value.tobytes()
+    else:
+        raise TypeError(f"The type of value ({type(value)}) is not a tensor")
+    return m_tensor
+
+
+def proto_to_tensor(m_tensor, segment=None):
+    """
+        rebuild a ``torch.Tensor`` or ``np.ndarray`` from a ``mTensor`` message, the
+        returned tensor is a view over the received buffer
+    :param segment: ``SharedSegment`` mapped for the message, holds tensors stored in shared memory
+    """
+    shape = tuple(m_tensor.shape)
+    if m_tensor.in_shared_memory:
+        if segment is None:
+            raise ValueError("The tensor is stored in a shared segment which has not been mapped")
+        return segment.tensor(m_tensor.shared_offset, m_tensor.dtype, shape, m_tensor.framework)
+    if m_tensor.framework == "numpy":
+        return np.frombuffer(m_tensor.buffer, dtype=np.dtype(m_tensor.dtype)).reshape(shape)
+    dtype = getattr(torch, m_tensor.dtype)
+    buffer = m_tensor.buffer
+    if len(buffer) == 0:
+        return torch.empty(shape, dtype=dtype)
+    with warnings.catch_warnings():
+        # the buffer is owned by the returned tensor only, so writing to it is safe
+        warnings.simplefilter("ignore", UserWarning)
+        return torch.frombuffer(buffer, dtype=dtype).view(shape)
+
+
+PACKED_LIST_TYPES = {
+    "int64": ([int, np.int32, np.int64], gRPC_communication_manager_pb2.mInt64List, "int64_list_msg"),
+    "double": ([float, np.float64], gRPC_communication_manager_pb2.mDoubleList, "double_list_msg"),
+    "float": ([np.float32], gRPC_communication_manager_pb2.mFloatList, "float_list_msg"),
+}
+
+
+def packed_list_type(value):
+    """
+        find the packed repeated type of a homogeneous list of numbers, None if the list
+        is empty or its elements are of different types
+    """
+    if len(value) == 0:
+        return None
+    first_type = type(value[0])
+    for packed_type, (element_types, _, _) in PACKED_LIST_TYPES.items():
+        if first_type in element_types:
+            if all(type(each) is first_type for each in value):
+                return packed_type
+            return None
+    return None
 
 
 class Message:
@@ -21,6 +101,9 @@ class Message:
         receiver: The receiver's ID
         communication_round: The training round of the message, which is determined by
         the sender and used to filter out the outdated messages.
+    A received message decodes its header fields right away and its content only on the
+    first access of ``content``, so messages which are dropped after checking the header
+    cost almost nothing.
     """
     def __init__(
             self,
@@ -36,7 +119,10 @@ class Message:
         self._content = content
         self._communication_round = communication_round
         self._timestamp = datetime.now().timestamp()
-        self.param_serializer = b64serializer
+        self._encoded = None
+        self._encoded_codec = None
+        # decodes the content of a received message on its first access
+        self._content_loader = None
 
     @property
     def message_type(self):
@@ -45,6 +131,7 @@ class Message:
     @message_type.setter
     def message_type(self, value):
         self._message_type = value
+        self._encoded = None
 
     @property
     def sender(self):
@@ -53,6 +140,7 @@ class Message:
     @sender.setter
     def sender(self, value):
         self._sender = value
+        self._encoded = None
 
     @property
     def receiver(self):
@@ -61,14 +149,43 @@ class Message:
     @receiver.setter
     def receiver(self, value):
         self._receiver = value
+        self._encoded = None
 
     @property
     def content(self):
+        if self._content_loader is not None:
+            self._content = self._content_loader()
+            self._content_loader = None
         return self._content
 
     @content.setter
     def content(self, value):
         self._content = value
+        self._content_loader = None
+        self._encoded = None
+
+    @property
+    def content_parsed(self):
+        """
+            whether the content of a received message has been decoded
+        """
+        return self._content_loader is None
+
+    @property
+    def content_loader(self):
+        """
+            the pending decoder of the content, None once the content is decoded
+        """
+        return self._content_loader
+
+    def set_content_loader(self, loader):
+        """
+            defer decoding the content of a received message, ``loader()`` returns the content
+            on the first access of ``content``
+        """
+        self._content = ""
+        self._content_loader = loader
+        self._encoded = None
 
     @property
     def communication_round(self):
@@ -77,6 +194,7 @@ class Message:
     @communication_round.setter
     def communication_round(self, value):
         self._communication_round = value
+        self._encoded = None
 
     @property
     def timestamp(self):
@@ -85,6 +203,7 @@ class Message:
     @timestamp.setter
     def timestamp(self, value):
         self._timestamp = value
+        self._encoded = None
 
     def __lt__(self, other):
         if self.timestamp != other.timestamp:
@@ -92,7 +211,7 @@ class Message:
         else:
             return self.communication_round < other.communication_round
 
-    def create_by_type(self, value, nested=False):
+    def create_by_type(self, value, nested=False, segment=None):
         if isinstance(value, dict):
             if isinstance(list(value.keys())[0], str):
                 m_dict = gRPC_communication_manager_pb2.mDict_keyIsString()
@@ -102,7 +221,7 @@ class Message:
                 key_type = 'int'
             for key in value.keys():
                 m_dict.dict_value[key].MergeFrom(
-                    self.create_by_type(value[key], nested=True))
+                    self.create_by_type(value[key], nested=True, segment=segment))
             if nested:
                 msg_value = gRPC_communication_manager_pb2.MsgValue()
                 if key_type == 'string':
@@ -112,11 +231,46 @@ class Message:
                 return msg_value
             else:
                 return m_dict
+        elif isinstance(value, torch.Tensor) or isinstance(value, np.ndarray):
+            m_tensor = tensor_to_proto(value, segment=segment)
+            if nested:
+                msg_value = gRPC_communication_manager_pb2.MsgValue()
+                msg_value.tensor_msg.MergeFrom(m_tensor)
+                return msg_value
+            else:
+                return m_tensor
+        elif isinstance(value, CodedTensor):
+            m_coded_tensor = gRPC_communication_manager_pb2.mCodedTensor(
+                codec=value.codec,
+                dtype=value.dtype,
+                shape=value.shape,
+                params=value.params
+            )
+            for key, tensor in value.tensors.items():
+                m_coded_tensor.tensors[key].MergeFrom(tensor_to_proto(tensor, segment=segment))
+            if nested:
+                msg_value = gRPC_communication_manager_pb2.MsgValue()
+                msg_value.coded_tensor_msg.MergeFrom(m_coded_tensor)
+                return msg_value
+            else:
+                return m_coded_tensor
         elif isinstance(value, list) or isinstance(value, tuple):
+            packed_type = packed_list_type(value)
+            if packed_type is not None:
+                _, proto_type, field_name = PACKED_LIST_TYPES[packed_type]
+                m_packed = proto_type()
+                m_packed.values.extend(value)
+                if nested:
+                    msg_value = gRPC_communication_manager_pb2.MsgValue()
+                    getattr(msg_value, field_name).MergeFrom(m_packed)
+                    return msg_value
+                else:
+                    return m_packed
             m_list = gRPC_communication_manager_pb2.mList()
             for each in value:
                 m_list.list_value.append(self.create_by_type(each,
-                                                             nested=True))
+                                                             nested=True,
+                                                             segment=segment))
             if nested:
                 msg_value = gRPC_communication_manager_pb2.MsgValue()
                 msg_value.list_msg.MergeFrom(m_list)
@@ -142,44 +296,51 @@ class Message:
             else:
                 return m_single
 
-    def transform_to_list(self, x):
+    def transform_to_list(self, x, codec: Codec | None = None):
         if isinstance(x, list) or isinstance(x, tuple):
-            return [self.transform_to_list(each_x) for each_x in x]
+            return [self.transform_to_list(each_x, codec) for each_x in x]
         elif isinstance(x, dict):
-            for key in x.keys():
-                if self.message_type == 200 and key == "model":
-                    x[key] = self.param_serializer(x[key])
-                else:
-                    x[key] = self.transform_to_list(x[key])
+            return {key: self.transform_to_list(x[key], codec) for key in x.keys()}
+        elif isinstance(x, torch.Tensor):
+            # tensors are packed into ``mTensor`` as raw bytes, floating-point ones are
+            # compressed by the codec first
+            if codec is not None and x.is_floating_point():
+                return codec.encode(x)
+            return x
+        elif isinstance(x, np.ndarray):
             return x
         else:
             if hasattr(x, 'tolist'):
-                # if self.msg_type == 'model_para':
-                # return self.param_serializer(x)
-                # else:
                 return x.tolist()
             else:
                 return x
 
-    def build_msg_value(self, value):
+    def build_msg_value(self, value, segment=None):
         msg_value = gRPC_communication_manager_pb2.MsgValue()
 
         if isinstance(value, list) or isinstance(value, tuple):
-            msg_value.list_msg.MergeFrom(self.create_by_type(value))
+            msg_value.MergeFrom(self.create_by_type(value, nested=True, segment=segment))
         elif isinstance(value, dict):
             if isinstance(list(value.keys())[0], str):
                 msg_value.dict_msg_string_key.MergeFrom(
-                    self.create_by_type(value))
+                    self.create_by_type(value, segment=segment))
             else:
-                msg_value.dict_msg_int_key.MergeFrom(self.create_by_type(value))
+                msg_value.dict_msg_int_key.MergeFrom(self.create_by_type(value, segment=segment))
+        elif isinstance(value, torch.Tensor) or isinstance(value, np.ndarray) or \
+                isinstance(value, CodedTensor):
+            msg_value.MergeFrom(self.create_by_type(value, nested=True, segment=segment))
         else:
             msg_value.single_msg.MergeFrom(self.create_by_type(value))
 
         return msg_value
 
-    def transform(self, to_list=False):
-        if to_list:
-            self.content = self.transform_to_list(self.content)
+    def transform(self, to_list=False, codec: str | dict | Codec | None = None, segment=None):
+        """
+            build the ``MessageRequest`` of the message
+        :param segment: ``SharedSegmentWriter`` collecting the large tensors of a message to
+            co-located peers, call its ``seal`` afterwards and attach the segment to the request
+        """
+        content = self.transform_to_list(self.content, get_codec(codec)) if to_list else self.content
 
         split_message = gRPC_communication_manager_pb2.MessageRequest()  # map/dict
         split_message.msg['message_type'].MergeFrom(
@@ -188,53 +349,81 @@ class Message:
         split_message.msg['receiver'].MergeFrom(
             self.build_msg_value(self.receiver))
         split_message.msg['content'].MergeFrom(self.build_msg_value(
-            self.content))
+            content, segment=segment))
         split_message.msg['communication_round'].MergeFrom(self.build_msg_value(self.communication_round))
         split_message.msg['timestamp'].MergeFrom(
             self.build_msg_value(self.timestamp))
         return split_message
 
-    def _parse_msg(self, value):
+    def encode(self, codec: str | dict | Codec | None = None):
+        """
+            serialize the message into an immutable wire buffer, the buffer is cached and
+            reused for every receiver and retry until a field of the message is reassigned.
+            NOTE: in-place changes of ``content`` are not tracked, call ``clear_cache`` after them.
+        :param codec: codec compressing the floating-point tensors of the content, see ``codec.py``
+        :return: bytes of the serialized ``MessageRequest``
+        """
+        codec = get_codec(codec)
+        codec_key = None if codec is None else (codec.codec_id, tuple(sorted(codec.params().items())))
+        if self._encoded is None or self._encoded_codec != codec_key:
+            self._encoded = self.transform(to_list=True, codec=codec).SerializeToString()
+            self._encoded_codec = codec_key
+        return self._encoded
+
+    def clear_cache(self):
+        self._encoded = None
+
+    def _parse_msg(self, value, segment=None):
         if isinstance(value, gRPC_communication_manager_pb2.MsgValue) or \
                 isinstance(value, gRPC_communication_manager_pb2.mSingle):
-            return self._parse_msg(getattr(value, value.WhichOneof("type")))
+            return self._parse_msg(getattr(value, value.WhichOneof("type")), segment)
+        elif isinstance(value, gRPC_communication_manager_pb2.mTensor):
+            return proto_to_tensor(value, segment)
+        elif isinstance(value, gRPC_communication_manager_pb2.mCodedTensor):
+            # compressed tensors are decoded on arrival
+            return CodedTensor(
+                codec=value.codec,
+                dtype=value.dtype,
+                shape=value.shape,
+                tensors={k: proto_to_tensor(value.tensors[k], segment) for k in value.tensors},
+                params=dict(value.params)
+            ).decode()
         elif isinstance(value, gRPC_communication_manager_pb2.mList):
-            return [self._parse_msg(each) for each in value.list_value]
+            return [self._parse_msg(each, segment) for each in value.list_value]
+        elif isinstance(value, gRPC_communication_manager_pb2.mInt64List) or \
+                isinstance(value, gRPC_communication_manager_pb2.mDoubleList) or \
+                isinstance(value, gRPC_communication_manager_pb2.mFloatList):
+            return list(value.values)
         elif isinstance(value, gRPC_communication_manager_pb2.mDict_keyIsString) or \
                 isinstance(value, gRPC_communication_manager_pb2.mDict_keyIsInt):
             return {
-                k: self._parse_msg(value.dict_value[k])
+                k: self._parse_msg(value.dict_value[k], segment)
                 for k in value.dict_value
             }
         else:
             return value
 
-    def _parse_model(self, value):
-        if isinstance(value, dict):
-            return {
-                k: self._parse_model(value[k]) for k in value.keys()
-            }
-        elif isinstance(value, str):
-            return pickle.loads(base64.b64decode(value))
-        else:
-            return value
-
-    def parse(self, received_msg):
+    def parse(self, received_msg, segment=None):
+        """
+            fill the message from the ``msg`` map of a received ``MessageRequest``, the header
+            fields are decoded right away and ``content`` on its first access
+        :param segment: ``SharedSegment`` mapped for the request if it was sent through shared memory
+        """
         self.message_type = self._parse_msg(received_msg['message_type'])
         self.sender = self._parse_msg(received_msg['sender'])
         self.receiver = self._parse_msg(received_msg['receiver'])
         self.communication_round = self._parse_msg(received_msg['communication_round'])
-        self.content = self._parse_msg(received_msg['content'])
-        if isinstance(self.content, dict) and "model" in self.content.keys():
-            self.content["model"] = self._parse_model(self.content["model"])
         self.timestamp = self._parse_msg(received_msg['timestamp'])
+        raw_content = received_msg['content']
+        self.set_content_loader(lambda: self._parse_msg(raw_content, segment))
 
     def count_bytes(self):
         """
-            calculate the message bytes to be sent/received
+            calculate the message bytes to be sent/received from the size of the serialized
+            message, see ``TransferMetrics`` of the communicator for the measured traffic
         :return: tuple of bytes of the message to be sent and received
         """
-        download_bytes = asizeof.asizeof(self.content)
+        download_bytes = len(self.encode())
         upload_cnt = len(self.receiver) if isinstance(self.receiver,
                                                       list) else 1
         upload_bytes = download_bytes * upload_cnt
@@ -0,0 +1,206 @@
+import threading
+import time
+import zlib
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SEND = "send"
+RECEIVE = "receive"
+
+# counter name -> help text of the Prometheus exposition
+COUNTERS = {
+    "messages": "Messages sent or received",
+    "bytes": "Serialized message bytes",
+    "compressed_bytes": "Message bytes after gRPC compression, the serialized bytes where not measured",
+    "encode_seconds": "Seconds spent encoding messages",
+    "decode_seconds": "Seconds spent decoding messages",
+    "rpc_seconds": "Seconds spent in RPCs, including retries",
+    "retries": "RPC attempts beyond the first one",
+    "failures": "Messages which could not be delivered",
+}
+
+
+def compressed_size(payload: bytes, compression: str):
+    """
+        size of ``payload`` after the gRPC message compression ``compression``, None without compression
+    """
+    if compression == "gzip":
+        compressor = zlib.compressobj(wbits=31)
+    elif compression == "deflate":
+        compressor = zlib.compressobj()
+    else:
+        return None
+    return len(compressor.compress(payload)) + len(compressor.flush())
+
+
+class TransferRecord:
+    """
+    The wire-level accounting of a single message to or from a peer.
+        direction: "send" or "receive"
+        peer: The id of the receiver or sender
+        message_type/communication_round: The header fields of the message
+        num_bytes: Serialized bytes of the message
+        compressed_bytes: Bytes after gRPC compression, None if not measured
+        encode_time/decode_time: Seconds spent encoding or decoding the message
+        rpc_time: Seconds spent in the RPCs of the delivery, including retries
+        attempts: Number of RPC attempts
+        success: Whether the message was delivered
+    """
+    def __init__(self, direction: str, peer: str, message_type=None, communication_round=None, num_bytes: int = 0,
+                 compressed_bytes: int | None = None, encode_time: float = 0.0, decode_time: float = 0.0,
+                 rpc_time: float = 0.0, attempts: int = 0, success: bool = True):
+        self.direction = direction
+        self.peer = peer
+        self.message_type = message_type
+        self.communication_round = communication_round
+        self.num_bytes = num_bytes
+        self.compressed_bytes = compressed_bytes
+        self.encode_time = encode_time
+        self.decode_time = decode_time
+        self.rpc_time = rpc_time
+        self.attempts = attempts
+        self.success = success
+        self.time = time.time()
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+
+def _empty_counters():
+    return {name: 0 for name in COUNTERS}
+
+
+class TransferMetrics:
+    """
+    Thread-safe wire-level transfer metrics of a communicator, aggregated per peer, per
+    round and per message type, the latest ``history`` records are kept individually.
+    """
+    def __init__(self, history: int = 10000):
+        self._lock = threading.Lock()
+        self.records = deque(maxlen=history)
+        self._peers = dict()
+        self._rounds = dict()
+        self._message_types = dict()
+        self._rpc_max = dict()
+
+    def _add(self, record: TransferRecord, counters: dict):
+        for key, table in ((record.peer, self._peers), (record.communication_round, self._rounds),
+                           (record.message_type, self._message_types)):
+            if key is None:
+                continue
+            table_counters = table.setdefault((record.direction, key), _empty_counters())
+            for name, value in counters.items():
+                table_counters[name] += value
+
+    def record(self, record: TransferRecord):
+        counters = {
+            "messages": 1,
+            "bytes": record.num_bytes,
+            "compressed_bytes": record.compressed_bytes if record.compressed_bytes is not None else record.num_bytes,
+            "encode_seconds": record.encode_time,
+            "decode_seconds": record.decode_time,
+            "rpc_seconds": record.rpc_time,
+            "retries": max(0, record.attempts - 1),
+            "failures": 0 if record.success else 1,
+        }
+        with self._lock:
+            self.records.append(record)
+            self._add(record, counters)
+            key = (record.direction, record.peer)
+            self._rpc_max[key] = max(self._rpc_max.get(key, 0.0), record.rpc_time)
+
+    def record_decode(self, peer: str, message_type, communication_round, decode_time: float):
+        """
+            add the deferred content decode time of a received message
+        """
+        record = TransferRecord(RECEIVE, peer, message_type, communication_round, decode_time=decode_time)
+        with self._lock:
+            self._add(record, {"decode_seconds": decode_time})
+
+    def reset(self):
+        with self._lock:
+            self.records.clear()
+            self._peers.clear()
+            self._rounds.clear()
+            self._message_types.clear()
+            self._rpc_max.clear()
+
+    @staticmethod
+    def _table(table: dict):
+        result = dict()
+        for (direction, key), counters in table.items():
+            result.setdefault(direction, dict())[key] = dict(counters)
+        return result
+
+    def snapshot(self):
+        """
+            the aggregated metrics as nested dicts: ``{"peers"|"rounds"|"message_types": {direction:
+            {key: counters}}, "totals": {direction: counters}}``
+        """
+        with self._lock:
+            totals = dict()
+            for (direction, _), counters in self._peers.items():
+                direction_totals = totals.setdefault(direction, _empty_counters())
+                for name, value in counters.items():
+                    direction_totals[name] += value
+            peers = self._table(self._peers)
+            for (direction, peer), value in self._rpc_max.items():
+                peers[direction][peer]["rpc_seconds_max"] = value
+            return {
+                "peers": peers,
+                "rounds": self._table(self._rounds),
+                "message_types": self._table(self._message_types),
+                "totals": totals,
+            }
+
+    def to_prometheus(self, prefix: str = "fl_comm"):
+        """
+            the per-peer counters in the Prometheus text exposition format
+        """
+        with self._lock:
+            peers = {key: dict(counters) for key, counters in self._peers.items()}
+            rpc_max = dict(self._rpc_max)
+        lines = []
+        for name, help_text in COUNTERS.items():
+            lines.append(f"# HELP {prefix}_{name}_total {help_text}")
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            for (direction, peer), counters in sorted(peers.items()):
+                lines.append(f'{prefix}_{name}_total{{direction="{direction}",peer="{peer}"}} {counters[name]}')
+        lines.append(f"# HELP {prefix}_rpc_seconds_max Longest delivery to or from the peer")
+        lines.append(f"# TYPE {prefix}_rpc_seconds_max gauge")
+        for (direction, peer), value in sorted(rpc_max.items()):
+            lines.append(f'{prefix}_rpc_seconds_max{{direction="{direction}",peer="{peer}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """
+    Serves ``TransferMetrics.to_prometheus`` at ``http://host:port/metrics`` from a daemon thread.
+    """
+    def __init__(self, metrics: TransferMetrics, port: int, host: str = "0.0.0.0"):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.to_prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
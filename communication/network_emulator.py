@@ -0,0 +1,243 @@
+import random
+import threading
+import time
+
+import grpc
+
+
+class NetworkProfile:
+    """
+    The emulated link to a peer.
+        bandwidth: Megabits per second, None for unlimited
+        rtt: Round-trip time in seconds
+        jitter: Standard deviation of the one-way delay in seconds
+        drop_rate: Probability that a message is lost, its RPC then fails with UNAVAILABLE
+    """
+    def __init__(self, bandwidth: float | None = None, rtt: float = 0.0, jitter: float = 0.0, drop_rate: float = 0.0):
+        self.bandwidth = bandwidth
+        self.rtt = rtt
+        self.jitter = jitter
+        self.drop_rate = drop_rate
+
+    def transmission_time(self, num_bytes: int):
+        if self.bandwidth is None:
+            return 0.0
+        return num_bytes * 8 / (self.bandwidth * 1000 * 1000)
+
+    def to_dict(self):
+        return {"bandwidth": self.bandwidth, "rtt": self.rtt, "jitter": self.jitter, "drop_rate": self.drop_rate}
+
+    def __repr__(self):
+        return f"NetworkProfile(bandwidth={self.bandwidth}, rtt={self.rtt}, jitter={self.jitter}, " \
+               f"drop_rate={self.drop_rate})"
+
+
+PROFILES = {
+    "loopback": NetworkProfile(),
+    "lan": NetworkProfile(bandwidth=1000, rtt=0.0005),
+    "broadband": NetworkProfile(bandwidth=100, rtt=0.02, jitter=0.002),
+    "4g": NetworkProfile(bandwidth=20, rtt=0.05, jitter=0.01, drop_rate=0.001),
+    "3g": NetworkProfile(bandwidth=2, rtt=0.15, jitter=0.03, drop_rate=0.01),
+    "satellite": NetworkProfile(bandwidth=10, rtt=0.6, jitter=0.05, drop_rate=0.005),
+}
+
+
+def get_profile(profile: str | dict | NetworkProfile | None) -> NetworkProfile | None:
+    """
+        build a profile from its name in ``PROFILES``, e.g. "4g", or from a dict such as
+        ``{"bandwidth": 10, "rtt": 0.1}``
+    """
+    if profile is None or isinstance(profile, NetworkProfile):
+        return profile
+    if isinstance(profile, dict):
+        return NetworkProfile(**profile)
+    if profile not in PROFILES:
+        raise ValueError(f"Invalid network profile {profile}, require one of {list(PROFILES.keys())}")
+    return PROFILES[profile]
+
+
+class EmulatedDropError(grpc.RpcError):
+    """
+    An emulated message loss, raised like the ``grpc.RpcError`` of an unreachable peer.
+    """
+    def __init__(self, address: str):
+        super().__init__(f"The message to {address} was dropped by the network emulator")
+        self.address = address
+
+    def code(self):
+        return grpc.StatusCode.UNAVAILABLE
+
+    def details(self):
+        return str(self)
+
+
+class _Link:
+    """
+    A serial link: concurrent transmissions queue up behind each other.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._free_at = 0.0
+
+    def reserve(self, duration: float):
+        """
+        :return: ``time.perf_counter()`` at which a transmission of ``duration`` seconds ends
+        """
+        with self._lock:
+            self._free_at = max(time.perf_counter(), self._free_at) + duration
+            return self._free_at
+
+
+def _sleep_until(deadline: float):
+    remaining = deadline - time.perf_counter()
+    if remaining > 0:
+        time.sleep(remaining)
+
+
+class NetworkEmulator:
+    """
+    In-process emulation of slow and lossy links for the RPCs of a ``gRPCCommunicationManager``.
+    Every outgoing message is delayed by its transmission time on the link to the peer, which
+    it shares with the other messages to that peer, plus half the RTT with jitter on the way
+    there and the other half for the response. Since every message of this project is a
+    client-to-server RPC, each communicator emulates its own uplinks.
+        profiles: Peer address -> profile (name, dict or ``NetworkProfile``)
+        default: Profile of the peers not in ``profiles``, None leaves them unthrottled
+        uplink_bandwidth: Megabits per second of this node's uplink, shared by all peers
+        seed: Seed of the jitter and drops
+    """
+    def __init__(self, profiles: dict | None = None, default: str | dict | NetworkProfile | None = None,
+                 uplink_bandwidth: float | None = None, seed: int | None = None):
+        self._profiles = {address: get_profile(profile) for address, profile in (profiles or {}).items()}
+        self.default = get_profile(default)
+        self._uplink_profile = NetworkProfile(bandwidth=uplink_bandwidth)
+        self._uplink = _Link()
+        self._links = dict()
+        self._stats = dict()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def set_profile(self, address: str, profile: str | dict | NetworkProfile | None):
+        with self._lock:
+            self._profiles[address] = get_profile(profile)
+
+    def profile(self, address: str):
+        with self._lock:
+            return self._profiles.get(address, self.default)
+
+    def _link(self, address: str):
+        with self._lock:
+            if address not in self._links:
+                self._links[address] = _Link()
+                self._stats[address] = {"messages": 0, "bytes": 0, "dropped": 0, "seconds": 0.0}
+            return self._links[address]
+
+    def _one_way_delay(self, profile: NetworkProfile):
+        with self._lock:
+            jitter = self._random.gauss(0.0, profile.jitter) if profile.jitter > 0 else 0.0
+        return max(0.0, profile.rtt / 2 + jitter)
+
+    def _dropped(self, profile: NetworkProfile):
+        with self._lock:
+            return profile.drop_rate > 0 and self._random.random() < profile.drop_rate
+
+    def _transmit(self, address: str, profile: NetworkProfile, num_bytes: int):
+        """
+            occupy the links for ``num_bytes`` and wait until they are on the wire
+        """
+        finish = max(self._link(address).reserve(profile.transmission_time(num_bytes)),
+                     self._uplink.reserve(self._uplink_profile.transmission_time(num_bytes)))
+        _sleep_until(finish)
+
+    def _account(self, address: str, num_bytes: int, duration: float, dropped: bool):
+        with self._lock:
+            stats = self._stats[address]
+            stats["messages"] += 1
+            stats["bytes"] += num_bytes
+            stats["dropped"] += int(dropped)
+            stats["seconds"] += duration
+
+    def stats(self):
+        """
+            per peer address: emulated messages, bytes, drops and seconds spent in their RPCs
+        """
+        with self._lock:
+            return {address: dict(stats) for address, stats in self._stats.items()}
+
+    def intercept(self, channel, address: str):
+        """
+            wrap ``channel`` to ``address`` so its RPCs go through the emulated link
+        """
+        return grpc.intercept_channel(channel, _ThrottlingInterceptor(self, address))
+
+
+def get_network_emulator(emulator: str | dict | NetworkEmulator | None) -> NetworkEmulator | None:
+    """
+        build an emulator from a profile name applied to every peer, e.g. "4g", or from a dict
+        of its arguments such as ``{"default": "3g", "profiles": {"10.0.0.2:50052": "lan"}}``
+    """
+    if emulator is None or isinstance(emulator, NetworkEmulator):
+        return emulator
+    if isinstance(emulator, dict):
+        return NetworkEmulator(**emulator)
+    return NetworkEmulator(default=emulator)
+
+
+def _request_size(request):
+    return len(request) if isinstance(request, (bytes, bytearray)) else request.ByteSize()
+
+
+class _ThrottlingInterceptor(grpc.UnaryUnaryClientInterceptor, grpc.StreamUnaryClientInterceptor):
+    def __init__(self, emulator: NetworkEmulator, address: str):
+        self._emulator = emulator
+        self._address = address
+
+    def intercept_unary_unary(self, continuation, client_call_details, request):
+        profile = self._emulator.profile(self._address)
+        if profile is None:
+            return continuation(client_call_details, request)
+        start_time = time.perf_counter()
+        num_bytes = _request_size(request)
+        self._emulator._transmit(self._address, profile, num_bytes)
+        time.sleep(self._emulator._one_way_delay(profile))
+        if self._emulator._dropped(profile):
+            return self._drop(profile, start_time, num_bytes)
+        outcome = continuation(client_call_details, request)
+        return self._finish(profile, start_time, num_bytes, outcome)
+
+    def intercept_stream_unary(self, continuation, client_call_details, request_iterator):
+        profile = self._emulator.profile(self._address)
+        if profile is None:
+            return continuation(client_call_details, request_iterator)
+        start_time = time.perf_counter()
+        num_bytes = [0]
+
+        def throttled():
+            # chunks leave one after another at the link's pace, the last one arrives half an RTT later
+            delay = self._emulator._one_way_delay(profile)
+            for request in request_iterator:
+                size = _request_size(request)
+                num_bytes[0] += size
+                self._emulator._transmit(self._address, profile, size)
+                yield request
+            time.sleep(delay)
+
+        if self._emulator._dropped(profile):
+            # the lost message still occupies the link, but never reaches the peer
+            for _ in throttled():
+                pass
+            return self._drop(profile, start_time, num_bytes[0])
+        outcome = continuation(client_call_details, throttled())
+        return self._finish(profile, start_time, num_bytes[0], outcome)
+
+    def _finish(self, profile: NetworkProfile, start_time: float, num_bytes: int, outcome):
+        # the response travels back over the same link
+        time.sleep(self._emulator._one_way_delay(profile))
+        self._emulator._account(self._address, num_bytes, time.perf_counter() - start_time, dropped=False)
+        return outcome
+
+    def _drop(self, profile: NetworkProfile, start_time: float, num_bytes: int):
+        # the sender notices the loss once the response is overdue
+        time.sleep(profile.rtt)
+        self._emulator._account(self._address, num_bytes, time.perf_counter() - start_time, dropped=True)
+        raise EmulatedDropError(self._address)
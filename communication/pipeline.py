@@ -0,0 +1,187 @@
+import queue
+import threading
+import time
+
+import torch
+from . import gRPC_communication_manager_pb2 as gRPC_communication_manager_pb2
+from .message import Message, proto_to_tensor, tensor_to_proto
+
+_END_OF_TRANSFER = object()
+# seconds between the checks of a blocked ``put`` whether the transfer is still wanted
+_POLL_INTERVAL = 0.1
+
+
+def iter_model_chunks(model: torch.nn.Module, message: Message, chunk_size: int, layout=None,
+                      timings: dict | None = None):
+    """
+        walk the ``state_dict`` entries of ``model`` in layer order and yield one ``ModelChunk``
+        per ``chunk_size`` bytes as soon as it is encoded, the first chunk carries the
+        encoded ``message`` as header
+    :param layout: ``LayoutManifest`` selecting the entries to send, all entries by default
+    :param timings: dict which accumulates the encode time under "encode_time"
+    """
+    header = message.transform(to_list=True)
+    state_dict = model.state_dict()
+    names = layout.names if layout is not None else list(state_dict.keys())
+    offset = 0
+    first_chunk = True
+    for name in names:
+        flat = state_dict[name].detach().reshape(-1)
+        step = max(1, chunk_size // flat.element_size())
+        for start in range(0, flat.numel(), step):
+            start_time = time.perf_counter()
+            chunk = gRPC_communication_manager_pb2.ModelChunk(
+                name=name,
+                start=start,
+                offset=offset + start,
+                tensor=tensor_to_proto(flat[start:start + step])
+            )
+            if first_chunk:
+                chunk.header.CopyFrom(header)
+                first_chunk = False
+            if timings is not None:
+                timings["encode_time"] = timings.get("encode_time", 0.0) + time.perf_counter() - start_time
+            yield chunk
+        offset += flat.numel()
+    if first_chunk:
+        yield gRPC_communication_manager_pb2.ModelChunk(header=header)
+
+
+class PipelinedTransfer:
+    """
+    A model arriving chunk by chunk through ``sendModelStream``. The receiving servicer puts
+    the chunks in as they arrive while the consumer already copies earlier chunks into the
+    target model, so network transfer and deserialization overlap.
+        message: The header message sent with the model
+        timings: Seconds spent waiting for chunks, decoding and copying them, and in total
+        stall_timeout: Seconds the servicer waits for the consumer to take a chunk before it
+        gives the transfer up, None waits as long as the sender is connected
+    """
+    def __init__(self, header, max_pending_chunks: int = 16, stall_timeout: float | None = 60.0):
+        self.message = Message()
+        self.message.parse(header.msg)
+        self._chunks = queue.Queue(maxsize=max_pending_chunks)
+        self._start_time = time.perf_counter()
+        self.timings = {"wait_time": 0.0, "decode_time": 0.0, "copy_time": 0.0, "total_time": 0.0}
+        self.num_bytes = 0
+        self.stall_timeout = stall_timeout
+        self._closed = threading.Event()
+
+    @property
+    def closed(self):
+        return self._closed.is_set()
+
+    def put(self, chunk, is_active=None):
+        """
+            queue a received chunk, waiting while the consumer is behind
+        :param is_active: callable telling whether the sender is still connected
+        :return: False if the chunk was not queued since the consumer closed the transfer, the
+            sender is gone or the consumer took no chunk for ``stall_timeout`` seconds
+        """
+        wait_start = time.monotonic()
+        while not self._closed.is_set():
+            try:
+                self._chunks.put(chunk, timeout=_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                if is_active is not None and not is_active():
+                    break
+                if self.stall_timeout is not None and time.monotonic() - wait_start > self.stall_timeout:
+                    break
+        return False
+
+    def finish(self, is_active=None):
+        """
+            mark the end of the transfer once all chunks are queued
+        :return: False if the end could not be queued, see ``put``
+        """
+        return self.put(_END_OF_TRANSFER, is_active)
+
+    def fail(self, error: Exception):
+        """
+            give the transfer up on the receiving side, the consumer gets ``error`` raised
+        """
+        self._closed.set()
+        self._drain()
+        self._chunks.put_nowait(error)
+
+    def close(self):
+        """
+            abandon the transfer on the consuming side, e.g. after copying a chunk failed, the
+            servicer then stops receiving and aborts the RPC
+        """
+        self._closed.set()
+        self._drain()
+
+    def _drain(self):
+        while True:
+            try:
+                self._chunks.get_nowait()
+            except queue.Empty:
+                return
+
+    def __iter__(self):
+        """
+            yield ``(name, start, offset, tensor)`` of every chunk, ``tensor`` is the 1-D slice
+            ``[start, start + len(tensor))`` of the entry ``name`` and starts at ``offset`` of the
+            serialized vector
+        """
+        while True:
+            wait_start = time.perf_counter()
+            chunk = self._chunks.get()
+            decode_start = time.perf_counter()
+            self.timings["wait_time"] += decode_start - wait_start
+            if chunk is _END_OF_TRANSFER:
+                break
+            if isinstance(chunk, Exception):
+                raise chunk
+            if not chunk.name:
+                continue
+            tensor = proto_to_tensor(chunk.tensor)
+            self.num_bytes += len(chunk.tensor.buffer)
+            self.timings["decode_time"] += time.perf_counter() - decode_start
+            yield chunk.name, chunk.start, chunk.offset, tensor
+        self.timings["total_time"] = time.perf_counter() - self._start_time
+
+    def copy_into(self, model: torch.nn.Module, mode: str = "copy"):
+        """
+            copy every chunk into the matching ``state_dict`` entry of ``model`` as it arrives
+        :param mode: "copy", "add" or "sub" as in ``SerializationTool.deserialize_model``
+        :return: the timings of the transfer
+        """
+        state_dict = model.state_dict()
+        try:
+            for name, start, _, tensor in self:
+                copy_start = time.perf_counter()
+                target = state_dict[name].view(-1)[start:start + tensor.numel()]
+                if mode == "copy":
+                    target.copy_(tensor)
+                elif mode == "add":
+                    target.add_(tensor.to(target.dtype))
+                elif mode == "sub":
+                    target.sub_(tensor.to(target.dtype))
+                else:
+                    raise ValueError(
+                        "Invalid deserialize mode {}, require \"copy\", \"add\" or \"sub\" "
+                        .format(mode))
+                self.timings["copy_time"] += time.perf_counter() - copy_start
+        except BaseException:
+            # e.g. an entry missing from ``model``, the sender must not wait for us
+            self.close()
+            raise
+        return self.timings
+
+    def fold_into(self, aggregator, weight: float = 1.0):
+        """
+            fold every chunk into a ``StreamingAggregator`` as it arrives
+        """
+        try:
+            for _, _, offset, tensor in self:
+                copy_start = time.perf_counter()
+                aggregator.add_chunk(offset, tensor, weight)
+                self.timings["copy_time"] += time.perf_counter() - copy_start
+        except BaseException:
+            self.close()
+            raise
+        aggregator.finish_update(weight)
+        return self.timings
@@ -0,0 +1,212 @@
+import heapq
+import itertools
+import threading
+import time
+from concurrent import futures
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """
+    A delivery was skipped because the circuit of the peer is open.
+    """
+    def __init__(self, address: str):
+        super().__init__(f"The circuit of {address} is open")
+        self.address = address
+
+
+class SchedulerClosedError(Exception):
+    """
+    A delivery was given up because the communicator is shutting down.
+    """
+    def __init__(self):
+        super().__init__("The communicator is shut down")
+
+
+class PeerHealth:
+    """
+    The delivery health of a single peer address.
+        state: "closed" (healthy), "open" (skipped until the cooldown ends) or "half_open"
+        (the cooldown ended, the next delivery is a probe)
+        consecutive_failures: Failed attempts since the last successful one
+        failures/successes: Total failed/successful attempts
+        opened_at: ``time.monotonic()`` when the circuit was opened or the probe started
+        last_error: The last RPC error
+    """
+    def __init__(self):
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.failures = 0
+        self.successes = 0
+        self.opened_at = None
+        self.last_error = None
+
+    def __repr__(self):
+        return f"PeerHealth(state={self.state!r}, consecutive_failures={self.consecutive_failures}, " \
+               f"failures={self.failures}, successes={self.successes})"
+
+
+class CircuitBreaker:
+    """
+    Per-peer circuit breaker: after ``failure_threshold`` consecutive failed attempts a
+    peer is skipped for ``cooldown`` seconds, then a single probe decides whether the
+    circuit closes again or stays open for another cooldown.
+    """
+    def __init__(self, failure_threshold: int = 3, cooldown: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._peers = dict()
+        self._lock = threading.Lock()
+
+    def _health(self, address: str):
+        if address not in self._peers:
+            self._peers[address] = PeerHealth()
+        return self._peers[address]
+
+    def allow(self, address: str):
+        """
+            check whether a delivery to ``address`` may be attempted now
+        """
+        with self._lock:
+            health = self._health(address)
+            if health.state == CLOSED:
+                return True
+            now = time.monotonic()
+            # while a probe is in flight the other deliveries are still skipped
+            if now - health.opened_at < self.cooldown:
+                return False
+            health.state = HALF_OPEN
+            health.opened_at = now
+            return True
+
+    def available(self, address: str):
+        """
+            check without side effects whether ``address`` would be attempted now: its circuit is
+            closed, or open with the cooldown elapsed so the next delivery is a probe
+        """
+        with self._lock:
+            if address not in self._peers:
+                return True
+            health = self._peers[address]
+            if health.state == CLOSED:
+                return True
+            return health.state == OPEN and time.monotonic() - health.opened_at >= self.cooldown
+
+    def is_open(self, address: str):
+        with self._lock:
+            return address in self._peers and self._peers[address].state == OPEN
+
+    def record_success(self, address: str):
+        with self._lock:
+            health = self._health(address)
+            health.state = CLOSED
+            health.consecutive_failures = 0
+            health.successes += 1
+            health.last_error = None
+
+    def record_failure(self, address: str, error=None):
+        with self._lock:
+            health = self._health(address)
+            health.consecutive_failures += 1
+            health.failures += 1
+            health.last_error = error
+            if health.state == HALF_OPEN or health.consecutive_failures >= self.failure_threshold:
+                health.state = OPEN
+                health.opened_at = time.monotonic()
+
+    def reset(self, address: str | None = None):
+        with self._lock:
+            if address is None:
+                self._peers.clear()
+            else:
+                self._peers.pop(address, None)
+
+    def health(self, address: str):
+        with self._lock:
+            return self._health(address)
+
+    @property
+    def peers(self):
+        with self._lock:
+            return dict(self._peers)
+
+
+class RetryScheduler:
+    """
+    Runs delivery attempts on a bounded worker pool. A failed attempt is scheduled again
+    after its backoff by a single timer thread instead of sleeping in its worker, so a
+    dead peer never holds up the deliveries to other peers.
+    """
+    def __init__(self, max_workers: int):
+        self._executor = futures.ThreadPoolExecutor(max_workers=max_workers)
+        self._delayed = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._closed = False
+
+    def submit(self, fn, delay: float = 0.0):
+        """
+            run ``fn()`` on the worker pool after ``delay`` seconds, ``fn`` is called right away
+            once the scheduler is closed and must then give up without an RPC
+        """
+        with self._condition:
+            if not self._closed:
+                if delay <= 0:
+                    self._dispatch(fn)
+                    return
+                heapq.heappush(self._delayed, (time.monotonic() + delay, next(self._counter), fn))
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, daemon=True)
+                    self._thread.start()
+                self._condition.notify()
+                return
+        fn()
+
+    def _dispatch(self, fn):
+        try:
+            self._executor.submit(fn)
+        except RuntimeError:
+            # the executor is gone, e.g. at interpreter exit, so ``fn`` resolves its delivery as failed
+            self._closed = True
+            fn()
+
+    def _run(self):
+        with self._condition:
+            while not self._closed:
+                if len(self._delayed) == 0:
+                    self._condition.wait()
+                    continue
+                due_time = self._delayed[0][0]
+                now = time.monotonic()
+                if due_time > now:
+                    self._condition.wait(timeout=due_time - now)
+                    continue
+                _, _, fn = heapq.heappop(self._delayed)
+                self._dispatch(fn)
+
+    def close(self):
+        """
+            stop accepting attempts, pending retries resolve their deliveries as failed right away
+        """
+        with self._condition:
+            self._closed = True
+            delayed = [fn for _, _, fn in self._delayed]
+            self._delayed = []
+            self._condition.notify()
+        for fn in delayed:
+            fn()
+
+    def shutdown(self):
+        """
+            close the scheduler and wait for the running attempts
+        """
+        self.close()
+        self._executor.shutdown(wait=True)
+
+    @property
+    def closed(self):
+        return self._closed
@@ -0,0 +1,182 @@
+import random
+import time
+
+
+class RoundStats:
+    """
+    Participation and latency statistics of a single round.
+        communication_round: The round number
+        selected: Clients sampled for the round
+        delivered: Selected clients which received the round's model
+        reported: Clients whose update of this round arrived before the round closed
+        late_accepted/late_discarded: Clients whose update of an earlier round arrived during the round
+        latencies: Client id -> seconds from the start of the round to the arrival of its update
+        quorum: Updates needed to close the round
+        quorum_reached: Whether the quorum arrived before the deadline
+        duration: Seconds from the start of the broadcast until the round closed
+    """
+    def __init__(self, communication_round: int, selected: list):
+        self.communication_round = communication_round
+        self.selected = selected
+        self.delivered = []
+        self.reported = []
+        self.late_accepted = []
+        self.late_discarded = []
+        self.latencies = dict()
+        self.quorum = 0
+        self.quorum_reached = False
+        self.duration = 0.0
+
+    @property
+    def stragglers(self):
+        """
+            clients which received the model but did not report before the round closed
+        """
+        return [each for each in self.delivered if each not in self.reported]
+
+    @property
+    def participation(self):
+        return len(self.reported) / len(self.selected) if len(self.selected) > 0 else 0.0
+
+    def latency_percentile(self, q: float):
+        latencies = sorted(self.latencies.values())
+        if len(latencies) == 0:
+            return None
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+
+    def to_dict(self):
+        return {
+            "communication_round": self.communication_round,
+            "selected": self.selected,
+            "delivered": self.delivered,
+            "reported": self.reported,
+            "stragglers": self.stragglers,
+            "late_accepted": self.late_accepted,
+            "late_discarded": self.late_discarded,
+            "latencies": self.latencies,
+            "quorum": self.quorum,
+            "quorum_reached": self.quorum_reached,
+            "participation": self.participation,
+            "duration": self.duration,
+        }
+
+    def __repr__(self):
+        return f"RoundStats(communication_round={self.communication_round}, selected={len(self.selected)}, " \
+               f"reported={len(self.reported)}, stragglers={len(self.stragglers)}, " \
+               f"quorum_reached={self.quorum_reached}, duration={self.duration:.4f})"
+
+
+class RoundScheduler:
+    """
+    Drives synchronous FL rounds over a ``gRPCCommunicationManager`` with partial
+    participation: each round samples a subset of the registered communicators, and the
+    round closes as soon as a quorum of updates has arrived or its deadline has passed.
+    Updates are matched to rounds by their ``communication_round``.
+        comm_manager: The ``gRPCCommunicationManager`` of the server
+        clients_per_round: Number (int) or fraction (float) of the communicators sampled
+        each round, all of them by default
+        deadline: Seconds after the start of a round at which it closes, None waits for the quorum
+        quorum: Number (int) or fraction (float) of the delivered clients whose updates close
+        the round, all of them by default
+        max_staleness: Updates at most this many rounds late are still accepted, older ones
+        are discarded
+        update_types: Message types of client updates
+        seed: Seed of the client sampling
+    """
+    def __init__(
+            self,
+            comm_manager,
+            clients_per_round: int | float | None = None,
+            deadline: float | None = None,
+            quorum: int | float | None = None,
+            max_staleness: int = 0,
+            update_types: tuple = (201, 202),
+            seed: int | None = None
+    ):
+        self.comm_manager = comm_manager
+        self.clients_per_round = clients_per_round
+        self.deadline = deadline
+        self.quorum = quorum
+        self.max_staleness = max_staleness
+        self.update_types = update_types
+        self._random = random.Random(seed)
+        self.history = []
+
+    @staticmethod
+    def _count(value: int | float | None, total: int):
+        if value is None:
+            return total
+        if isinstance(value, float):
+            return min(total, max(1, round(value * total)))
+        return min(total, value)
+
+    def sample(self):
+        """
+            sample the clients of the next round, communicators whose circuit is open are left out
+            until their cooldown has elapsed, then they are sampled again as a probe
+        """
+        candidates = [
+            each for each, address in self.comm_manager.communicators.items()
+            if self.comm_manager.circuit_breaker.available(address)
+        ]
+        num_clients = self._count(self.clients_per_round, len(candidates))
+        return sorted(self._random.sample(candidates, num_clients))
+
+    def run_round(self, communication_round: int, broadcast, handle_update, handle_message=None):
+        """
+            run one round: sample clients, ``broadcast(receivers)`` the model to them and pass every
+            accepted update to ``handle_update(message, staleness)`` until the round closes
+        :param broadcast: callable sending the round's model, returns ``{client id: SendResult}``
+        :param handle_update: callable folding in an update, ``staleness`` is 0 for updates of this round
+        :param handle_message: optional callable receiving all other messages
+        :return: ``RoundStats`` of the round, also appended to ``history``
+        """
+        stats = RoundStats(communication_round, self.sample())
+        start_time = time.perf_counter()
+        results = broadcast(stats.selected)
+        stats.delivered = [each for each in stats.selected if each in results and results[each].success]
+        stats.quorum = self._count(self.quorum, len(stats.delivered))
+        close_time = None if self.deadline is None else start_time + self.deadline
+        while len(stats.reported) < stats.quorum:
+            remaining = None if close_time is None else close_time - time.perf_counter()
+            if remaining is not None and remaining <= 0:
+                break
+            message = self.comm_manager.receive(timeout=remaining)
+            if message is None:
+                break
+            if message.message_type not in self.update_types:
+                if handle_message is not None:
+                    handle_message(message)
+                continue
+            staleness = communication_round - message.communication_round
+            if staleness == 0:
+                if message.sender in stats.delivered and message.sender not in stats.reported:
+                    stats.reported.append(message.sender)
+                    stats.latencies[message.sender] = time.perf_counter() - start_time
+                    handle_update(message, 0)
+            elif 0 < staleness <= self.max_staleness:
+                stats.late_accepted.append(message.sender)
+                handle_update(message, staleness)
+            else:
+                stats.late_discarded.append(message.sender)
+        stats.quorum_reached = len(stats.delivered) > 0 and len(stats.reported) >= stats.quorum
+        stats.duration = time.perf_counter() - start_time
+        self.history.append(stats)
+        return stats
+
+    def summary(self):
+        """
+            participation and latency summary over all rounds run so far
+        """
+        latencies = [latency for stats in self.history for latency in stats.latencies.values()]
+        return {
+            "rounds": len(self.history),
+            "rounds_with_quorum": sum(1 for stats in self.history if stats.quorum_reached),
+            "mean_participation": sum(stats.participation for stats in self.history) / len(self.history)
+            if len(self.history) > 0 else 0.0,
+            "mean_round_duration": sum(stats.duration for stats in self.history) / len(self.history)
+            if len(self.history) > 0 else 0.0,
+            "mean_update_latency": sum(latencies) / len(latencies) if len(latencies) > 0 else None,
+            "late_accepted": sum(len(stats.late_accepted) for stats in self.history),
+            "late_discarded": sum(len(stats.late_discarded) for stats in self.history),
+        }
@@ -0,0 +1,124 @@
+import os
+import socket
+import tempfile
+import uuid
+
+import numpy as np
+import torch
+
+SHARED_MEMORY_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+SEGMENT_PREFIX = "fl_comm_"
+# tensors are placed at aligned offsets so every dtype can be viewed in place
+SEGMENT_ALIGNMENT = 64
+
+_local_addresses = None
+
+
+def local_addresses():
+    """
+        host names and IP addresses which refer to this machine
+    """
+    global _local_addresses
+    if _local_addresses is None:
+        addresses = {"localhost", "127.0.0.1", "::1", "0.0.0.0", "[::1]"}
+        try:
+            hostname = socket.gethostname()
+            addresses.add(hostname)
+            addresses.update(socket.gethostbyname_ex(hostname)[2])
+        except OSError:
+            pass
+        _local_addresses = addresses
+    return _local_addresses
+
+
+def is_local_address(address: str, own_ip: str | None = None):
+    """
+        check whether ``address`` ("ip:port") is a peer on the same machine
+    """
+    host = address.rsplit(":", 1)[0]
+    return host in local_addresses() or (own_ip is not None and host == own_ip)
+
+
+def segment_path(name: str):
+    if os.path.basename(name) != name or not name.startswith(SEGMENT_PREFIX):
+        raise ValueError(f"Invalid shared segment name {name!r}")
+    return os.path.join(SHARED_MEMORY_DIR, name)
+
+
+class SharedSegmentWriter:
+    """
+    Collects the tensors of a message to co-located peers and copies them into one
+    shared-memory file, the message itself then only carries their offsets.
+        min_tensor_bytes: Smaller tensors stay inline in the message
+    """
+    def __init__(self, min_tensor_bytes: int = 64 * 1024):
+        self.min_tensor_bytes = min_tensor_bytes
+        self.name = None
+        self.size = 0
+        self._tensors = []
+
+    def reserve(self, value):
+        """
+            reserve room for a contiguous tensor or ndarray
+        :return: offset of the tensor in the segment, None if the tensor is sent inline
+        """
+        num_bytes = value.numel() * value.element_size() if isinstance(value, torch.Tensor) else value.nbytes
+        if num_bytes < self.min_tensor_bytes:
+            return None
+        offset = -(-self.size // SEGMENT_ALIGNMENT) * SEGMENT_ALIGNMENT
+        self._tensors.append((offset, value))
+        self.size = offset + num_bytes
+        return offset
+
+    def seal(self):
+        """
+            create the segment and copy the reserved tensors into it
+        :return: name of the segment, None if no tensor was reserved
+        """
+        if len(self._tensors) == 0:
+            return None
+        self.name = f"{SEGMENT_PREFIX}{os.getpid()}_{uuid.uuid4().hex}"
+        path = segment_path(self.name)
+        with open(path, "wb") as segment_file:
+            segment_file.truncate(self.size)
+        segment = torch.from_file(path, shared=True, size=self.size, dtype=torch.uint8).numpy()
+        for offset, value in self._tensors:
+            if isinstance(value, torch.Tensor):
+                value = value.reshape(-1).view(torch.uint8).numpy()
+            else:
+                value = value.reshape(-1).view(np.uint8)
+            segment[offset:offset + len(value)] = value
+        del segment
+        self._tensors = []
+        return self.name
+
+    def unlink(self):
+        """
+            remove the segment once every receiver has mapped it, existing mappings stay valid
+        """
+        if self.name is not None:
+            try:
+                os.unlink(segment_path(self.name))
+            except FileNotFoundError:
+                pass
+            self.name = None
+
+
+class SharedSegment:
+    """
+    A copy-on-write mapping of a received shared-memory segment, tensors are views into
+    it so writes of one receiver are never seen by the sender or other receivers.
+    """
+    def __init__(self, name: str, size: int):
+        self.name = name
+        self.size = size
+        self._buffer = torch.from_file(segment_path(name), shared=False, size=size, dtype=torch.uint8)
+
+    def tensor(self, offset: int, dtype: str, shape: tuple, framework: str = "torch"):
+        if framework == "numpy":
+            dtype = np.dtype(dtype)
+            num_bytes = int(np.prod(shape, dtype=np.int64)) * dtype.itemsize
+            return self._buffer[offset:offset + num_bytes].numpy().view(dtype).reshape(shape)
+        dtype = getattr(torch, dtype)
+        num_bytes = int(np.prod(shape, dtype=np.int64)) * torch.empty((), dtype=dtype).element_size()
+        return self._buffer[offset:offset + num_bytes].view(dtype).view(shape)
@@ -1,9 +1,9 @@
 
-python server.py --port "50051" --client_num 1 & \
-python client.py --port "50052" --client_id "1" & \
-#python client.py --port "50053" --client_id "2" & \
-#python client.py --port "50054" --client_id "3" & \
-#python client.py --port "50055" --client_id "4" & \
-#python client.py --port "50056" --client_id "5" & \
-#python client.py --port "50057" --client_id "6"
+python server.py --port "50051" --client_num 1 --shared_memory & \
+python client.py --port "50052" --client_id "1" --shared_memory & \
+#python client.py --port "50053" --client_id "2" --shared_memory & \
+#python client.py --port "50054" --client_id "3" --shared_memory & \
+#python client.py --port "50055" --client_id "4" --shared_memory & \
+#python client.py --port "50056" --client_id "5" --shared_memory & \
+#python client.py --port "50057" --client_id "6" --shared_memory
 wait
\ No newline at end of file
@@ -1,11 +1,16 @@
 
 from communication.communicator import gRPCCommunicationManager
 from communication.message import Message
+from communication.round_scheduler import RoundScheduler
 import argparse
+import os
+import time
+from utils.aggregator import BufferedAggregator, StreamingAggregator
 from utils.serialization import SerializationTool
+from utils.sparsification import decode_indices
+from utils.versioning import ModelVersionStore
+from utils.layout import LayoutManifest
 from utils.logger import Logger
-from model.mlp import MLP
-from transformers import BertModel
 
 
 class Server:
@@ -15,61 +20,236 @@ class Server:
             port,
             client_num,
             model,
-            gRPC_config=None
+            gRPC_config=None,
+            flat_buffer=False,
+            layout=None,
+            version_history=2,
+            clients_per_round=None,
+            round_deadline=None,
+            quorum=None,
+            max_staleness=0,
+            log_dir="log"
     ):
         self.ip = ip
         self.port = port
         self.client_num = client_num
         self.gRPC_config = gRPC_config
+        os.makedirs(log_dir, exist_ok=True)
         self.logger = Logger(
             log_name="server",
-            log_file="/Applications/LANGUAGE/PYTHON/fl_communication/log/server.log"
+            log_file=os.path.join(log_dir, "server.log")
         )
         self.model = model
+        if flat_buffer:
+            # parameters become views into one buffer, serialization is then copy-free
+            SerializationTool.flatten_model(self.model)
+        # the state_dict entries exchanged with the clients, all of them by default
+        self.layout = layout if layout is not None else LayoutManifest.build(self.model)
+        # client updates are folded in on arrival, the server keeps a single model-sized sum
+        self.aggregator = StreamingAggregator(self.layout.numel)
+        # recent global models, clients download only what changed since the version they hold
+        self.version_store = ModelVersionStore(capacity=version_history)
+        self.client_versions = dict()
+        # hashes of the snapshots that joining clients hold on disk
+        self.client_snapshots = dict()
+        # update counts, staleness and throughput of ``async_process``
+        self.async_stats = None
         self.comm_manager = gRPCCommunicationManager(
             ip=ip,
             port=port,
             max_connection_num=client_num,
             gRPC_config=gRPC_config
         )
+        # each round samples ``clients_per_round`` clients and closes once ``quorum`` of them
+        # reported or ``round_deadline`` seconds passed
+        self.scheduler = RoundScheduler(
+            self.comm_manager,
+            clients_per_round=clients_per_round,
+            deadline=round_deadline,
+            quorum=quorum,
+            max_staleness=max_staleness
+        )
 
-    def join_in(self):
+    def join_in(self, timeout=None):
+        """
+            wait until ``client_num`` clients joined, or at most ``timeout`` seconds if at least
+            one client joined by then
+        """
         current_client_num = 0
+        deadline = None if timeout is None else time.monotonic() + timeout
         while len(self.comm_manager.communicators) < self.client_num:
-            message = self.comm_manager.receive()
+            remaining = None
+            if deadline is not None and len(self.comm_manager.communicators) > 0:
+                remaining = max(0.0, deadline - time.monotonic())
+            message = self.comm_manager.receive(timeout=remaining)
+            if message is None:
+                self.logger.warning(f"Join timeout: {len(self.comm_manager.communicators)} of "
+                                    f"{self.client_num} clients joined.")
+                break
             print(message.content["port"])
-            if message.message_type == 100:
+            if message.message_type == 100 and self.admit(message):
                 current_client_num += 1
-                sender, ip, port = message.sender, message.content['ip'], message.content['port']
-                self.logger.info(f"Client {sender} ({ip}:{port}) joined in.")
-                self.comm_manager.add_communicators(
-                    message.sender, f"{message.content['ip']}:{message.content['port']}"
-                )
         # self.comm_manager.terminate_server()
 
+    def admit(self, message):
+        """
+            register the client of a join message (type 100) with the model version and snapshot it
+            holds, a client joining again, e.g. after a restart, replaces its previous state
+        :return: whether the client was admitted
+        """
+        sender, ip, port = message.sender, message.content['ip'], message.content['port']
+        if "layout" in message.content and LayoutManifest.from_list(message.content['layout']) != self.layout:
+            self.logger.warning(f"Client {sender} ({ip}:{port}) rejected: its layout manifest differs.")
+            self.reject(sender, f"{ip}:{port}", "the layout manifest differs from the server's")
+            return False
+        rejoined = sender in self.comm_manager.communicators
+        self.client_versions[sender] = message.content.get('version', -1)
+        self.client_snapshots[sender] = message.content.get('snapshot_hash') or None
+        self.logger.info(f"Client {sender} ({ip}:{port}) {'joined in again' if rejoined else 'joined in'}.")
+        self.comm_manager.add_communicators(sender, f"{ip}:{port}")
+        return True
+
+    def reject(self, sender, address, reason):
+        """
+            tell a client which is not admitted to terminate, it is registered only for this reply
+            under a key which cannot clash with an admitted client
+        """
+        key = f"{sender}@{address}"
+        self.comm_manager.add_communicators(key, address)
+        try:
+            self.comm_manager.send(
+                Message(
+                    message_type=101,
+                    sender="0",
+                    receiver=sender,
+                    content={"reason": f"Rejected: {reason}"}
+                ),
+                receiver=key
+            )
+        finally:
+            self.comm_manager.remove_communicators(key)
+
     def local_process(self):
         r = 0
         while r < 2:
             self.logger.info("Start a new round.")
-            model_parameters = SerializationTool.serialize_model(self.model)
+            model_parameters = SerializationTool.serialize_selected_model(self.model, self.layout)
             print(len(model_parameters))
-            self.comm_manager.send(
-                Message(
-                    message_type=201,
-                    sender="0",
-                    content={
-                        'model': model_parameters
-                    }
-                )
+            version = self.version_store.commit(model_parameters)
+            round_receivers = set()
+
+            def broadcast(receivers):
+                round_receivers.update(receivers)
+                results = self.broadcast_model(receivers, communication_round=r)
+                for result in results.values():
+                    if result.skipped:
+                        self.logger.warning(f"Round {r}: Client {result.receiver} is unreachable, skipped.")
+                    elif not result.success:
+                        self.logger.warning(f"Round {r}: Failed to send the model to client {result.receiver}.")
+                delivered_num = sum(1 for result in results.values() if result.success)
+                self.logger.info(f"Model version {version} sent to {delivered_num} of {len(results)} clients.")
+                return results
+
+            def handle_message(message):
+                # a client of this round which joined again, e.g. after a restart, lost the round's model
+                if message.message_type == 100 and self.admit(message) and message.sender in round_receivers:
+                    broadcast([message.sender])
+
+            stats = self.scheduler.run_round(r, broadcast, self.fold_update, handle_message=handle_message)
+            if stats.quorum_reached:
+                SerializationTool.deserialize_selected_model(self.model, self.aggregator.result(), self.layout)
+            else:
+                self.logger.warning(f"Round {r}: Quorum not reached ({len(stats.reported)} of {stats.quorum} "
+                                    f"updates), the global model is kept.")
+            if len(stats.stragglers) > 0:
+                self.logger.info(f"Round {r}: Stragglers {stats.stragglers}.")
+            self.logger.info(f"Round {r}: {len(stats.reported)} of {len(stats.selected)} clients reported "
+                             f"in {stats.duration:.2f}s.")
+            traffic = self.comm_manager.metrics.snapshot()["rounds"]
+            sent = traffic.get("send", dict()).get(r, dict())
+            received = traffic.get("receive", dict()).get(r, dict())
+            self.logger.info(f"Round {r}: {sent.get('bytes', 0)} bytes sent, {received.get('bytes', 0)} bytes "
+                             f"received, {sent.get('retries', 0)} retries.")
+            self.aggregator.reset()
+            r += 1
+        self.comm_manager.send(
+            Message(
+                message_type=101,
+                sender="0",
+                content=""
             )
-            self.logger.info("Model sent to all clients.")
-            num = 0
-            while num < self.client_num:
-                msg = self.comm_manager.receive()
+        )
+        self.comm_manager.terminate_server()
+
+    def async_process(self, num_versions=2, buffer_size=None, staleness_exponent=0.5, server_lr=1.0):
+        """
+            asynchronous buffered aggregation (FedBuff): every client trains on the latest model it
+            pulled and gets the newest one right after pushing its update, the server applies every
+            ``buffer_size`` buffered deltas, discounted by their staleness, as a new model version
+            without waiting for the other clients
+        :param num_versions: number of new model versions to publish before terminating
+        :param buffer_size: number of deltas per version (K), ``client_num`` by default
+        """
+        buffered = BufferedAggregator(
+            self.layout.numel,
+            buffer_size=buffer_size or self.client_num,
+            staleness_exponent=staleness_exponent,
+            server_lr=server_lr
+        )
+        self.async_stats = {"updates": 0, "discarded": 0, "staleness_sum": 0, "client_updates": dict()}
+        start_time = time.perf_counter()
+        version = self.version_store.commit(SerializationTool.serialize_selected_model(self.model, self.layout))
+        self.broadcast_model(communication_round=version)
+        self.logger.info(f"Model version {version} sent to all clients.")
+        while self.version_store.latest_version < num_versions:
+            msg = self.comm_manager.receive()
+            if msg.message_type == 100 and self.admit(msg):
+                # a client joining again, e.g. after a restart, pulls the latest model
+                self.broadcast_model([msg.sender], communication_round=self.version_store.latest_version)
+                continue
+            if msg.message_type not in (201, 202):
+                continue
+            base_version = msg.content.get('version', -1)
+            base_parameters = self.version_store.get(base_version)
+            self.client_versions[msg.sender] = base_version
+            if base_parameters is None:
+                self.async_stats["discarded"] += 1
+                self.logger.warning(f"Client {msg.sender} trained on version {base_version} which is no longer "
+                                    f"stored, its update is discarded.")
+            else:
+                staleness = self.version_store.latest_version - base_version
+                weight = msg.content.get('num_samples', 1)
                 if msg.message_type == 201:
-                    num += 1
-                    self.logger.info(f"Round {r}: Client {msg.sender} updated the model.")
-            r += 1
+                    buffered.add_delta(msg.content['model'] - base_parameters, staleness, weight=weight)
+                else:
+                    buffered.add_sparse_delta(
+                        decode_indices(msg.content['indices']), msg.content['values'], staleness, weight=weight)
+                self.async_stats["updates"] += 1
+                self.async_stats["staleness_sum"] += staleness
+                client_updates = self.async_stats["client_updates"]
+                client_updates[msg.sender] = client_updates.get(msg.sender, 0) + 1
+                self.logger.info(f"Client {msg.sender} pushed an update of version {base_version} "
+                                 f"(staleness {staleness}).")
+                if buffered.full:
+                    parameters = buffered.step(self.version_store.latest)
+                    SerializationTool.deserialize_selected_model(self.model, parameters, self.layout)
+                    version = self.version_store.commit(parameters)
+                    self.logger.info(f"Model version {version} published.")
+            sender = msg.sender
+            del msg
+            if self.version_store.latest_version < num_versions:
+                # the client pulls the latest model, as a delta from the version it holds
+                result = self.broadcast_model([sender], communication_round=self.version_store.latest_version)[sender]
+                if not result.success:
+                    self.logger.warning(f"Failed to send the latest model to client {sender}.")
+        duration = time.perf_counter() - start_time
+        self.async_stats["duration"] = duration
+        self.async_stats["updates_per_second"] = self.async_stats["updates"] / duration if duration > 0 else 0.0
+        self.async_stats["mean_staleness"] = self.async_stats["staleness_sum"] / self.async_stats["updates"] \
+            if self.async_stats["updates"] > 0 else 0.0
+        self.logger.info(f"{self.async_stats['updates']} updates in {duration:.2f}s "
+                         f"({self.async_stats['updates_per_second']:.2f} updates/s, "
+                         f"mean staleness {self.async_stats['mean_staleness']:.2f}).")
         self.comm_manager.send(
             Message(
                 message_type=101,
@@ -79,12 +259,86 @@ class Server:
         )
         self.comm_manager.terminate_server()
 
+    def fold_update(self, msg, staleness=0):
+        """
+            fold a client update into the aggregator, ``staleness`` is the number of rounds the
+            update is late
+        """
+        late = f" ({staleness} rounds late)" if staleness > 0 else ""
+        if msg.message_type == 201:
+            self.aggregator.add(msg.content['model'], weight=msg.content.get('num_samples', 1))
+            self.logger.info(f"Round {msg.communication_round}: Client {msg.sender} updated the model{late}.")
+        elif msg.message_type == 202:
+            # a sparse update is a delta from the model version the client trained on
+            base_parameters = self.version_store.get(msg.content.get('version'))
+            if base_parameters is None:
+                self.logger.warning(f"Client {msg.sender} sent a sparse update of an unknown model version.")
+                return
+            self.aggregator.add_sparse_update(base_parameters, decode_indices(msg.content['indices']),
+                                              msg.content['values'], weight=msg.content.get('num_samples', 1))
+            self.logger.info(f"Round {msg.communication_round}: Client {msg.sender} sent a sparse update{late}.")
+
+    def broadcast_model(self, receivers=None, communication_round=0):
+        """
+            send the latest model version, clients holding the same version share one
+            encoded message with either the full model, the delta from their version or,
+            for a joining client whose snapshot matches, only a reference to that snapshot
+        :param receivers: clients to send the model to, all clients by default
+        """
+        if receivers is None:
+            receivers = list(self.comm_manager.communicators.keys())
+        receivers_by_version = dict()
+        for client_id in receivers:
+            key = (self.client_versions.get(client_id, -1), self.client_snapshots.pop(client_id, None))
+            receivers_by_version.setdefault(key, []).append(client_id)
+        pending = dict()
+        for (base_version, snapshot_hash), receivers in receivers_by_version.items():
+            pending.update(self.comm_manager.send(
+                Message(
+                    message_type=201,
+                    sender="0",
+                    content=self.version_store.make_payload(base_version, snapshot_hash=snapshot_hash),
+                    communication_round=communication_round
+                ),
+                receiver=receivers,
+                wait=False
+            ))
+        results = {client_id: future.result() for client_id, future in pending.items()}
+        # the next delta of a client is based on the last version it received
+        for client_id, result in results.items():
+            if result.success:
+                self.client_versions[client_id] = self.version_store.latest_version
+        return results
+
 
 parser = argparse.ArgumentParser()
 parser.add_argument('--ip', type=str, default='127.0.0.1')
 parser.add_argument('--port', type=str, default='50051')
 parser.add_argument('--client_num', type=int, default=2)
+# the global model goes out exactly by default: a lossy codec makes the clients' base of the deltas
+# and their snapshots differ from the server's model, and its error adds up over the rounds
+parser.add_argument('--download_codec', type=str, default='none', help='none, fp16, bf16 or int8 for the broadcasts')
+parser.add_argument('--include', type=str, nargs='*', default=None, help='name patterns of the exchanged layers')
+parser.add_argument('--trainable_only', action='store_true', help='exchange only trainable parameters')
+parser.add_argument('--version_history', type=int, default=2, help='number of model versions kept for delta downloads')
+parser.add_argument('--shared_memory', action='store_true', help='exchange models with co-located peers through shared memory')
+parser.add_argument('--wire_format', type=str, default='protobuf', help='protobuf or frame, the flat binary frame format')
+parser.add_argument('--metrics_port', type=int, default=None, help='port of the Prometheus endpoint of the transfer metrics')
+parser.add_argument('--network_profile', type=str, default=None, help='emulated link to every peer, e.g. lan, 4g or 3g')
+parser.add_argument('--log_dir', type=str, default='log', help='directory of the log file')
+parser.add_argument('--clients_per_round', type=float, default=None, help='number, or fraction if below 1, of clients sampled each round')
+parser.add_argument('--round_deadline', type=float, default=None, help='seconds after which a round closes')
+parser.add_argument('--quorum', type=float, default=None, help='number, or fraction if below 1, of updates closing a round')
+parser.add_argument('--join_timeout', type=float, default=None, help='seconds to wait for missing clients to join')
+parser.add_argument('--mode', type=str, default='sync', help='sync rounds or async buffered aggregation')
+parser.add_argument('--buffer_size', type=int, default=None, help='updates per model version in async mode')
+parser.add_argument('--async_versions', type=int, default=2, help='model versions published in async mode')
+parser.add_argument('--staleness_exponent', type=float, default=0.5, help='exponent of the staleness discount in async mode')
+parser.add_argument('--max_staleness', type=int, default=0, help='rounds an update may be late and still be accepted')
 if __name__ == '__main__':
+    # the model libraries are only needed to run the server, not to import it
+    from model.mlp import MLP
+    from transformers import BertModel
     # model = MLP(784, 10, 10)
     model = BertModel.from_pretrained("./model/")
     args = parser.parse_args()
@@ -93,12 +347,32 @@ if __name__ == '__main__':
         port=args.port,
         client_num=args.client_num,
         model=model,
+        layout=LayoutManifest.build(model, include=args.include, trainable_only=args.trainable_only),
+        version_history=args.version_history,
+        clients_per_round=int(args.clients_per_round) if args.clients_per_round and args.clients_per_round >= 1
+        else args.clients_per_round,
+        round_deadline=args.round_deadline,
+        quorum=int(args.quorum) if args.quorum and args.quorum >= 1 else args.quorum,
+        max_staleness=args.max_staleness,
+        log_dir=args.log_dir,
         gRPC_config={
             "grpc_max_send_message_length": 1000 * 1024 * 1024,
             "grpc_max_receive_message_length": 1000 * 1024 * 1024,
             "grpc_enable_http_proxy": False,
-            "grpc_compression": "gzip"
+            "grpc_compression": "gzip",
+            "codecs": {201: args.download_codec},
+            "shared_memory": args.shared_memory,
+            "wire_format": args.wire_format,
+            "metrics_port": args.metrics_port,
+            "network_emulator": args.network_profile
         }
     )
-    server.join_in()
-    server.local_process()
+    server.join_in(timeout=args.join_timeout)
+    if args.mode == 'async':
+        server.async_process(
+            num_versions=args.async_versions,
+            buffer_size=args.buffer_size,
+            staleness_exponent=args.staleness_exponent
+        )
+    else:
+        server.local_process()
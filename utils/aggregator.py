@@ -0,0 +1,116 @@
+import torch
+
+
+class StreamingAggregator(object):
+    """Fold serialized model updates into one running weighted sum as they arrive.
+
+    Memory stays at one model-sized buffer no matter how many updates are folded in. Updates are serialized vectors as produced by :class:`SerializationTool`, either whole (:meth:`add`), slice by slice while they stream in (:meth:`add_chunk` + :meth:`finish_update`), sparse (:meth:`add_sparse`) or as a sparse delta from a model version (:meth:`add_sparse_update`).
+
+    Args:
+        numel (int): length of the serialized vectors.
+        dtype (torch.dtype, optional): dtype of the running sum. Defaults to ``torch.float32``.
+    """
+    def __init__(self, numel: int, dtype: torch.dtype = torch.float32):
+        self.weighted_sum = torch.zeros(numel, dtype=dtype)
+        self.total_weight = 0.0
+        self.num_updates = 0
+
+    def reset(self):
+        self.weighted_sum.zero_()
+        self.total_weight = 0.0
+        self.num_updates = 0
+
+    def add(self, parameters: torch.Tensor, weight: float = 1.0):
+        """Fold a whole serialized update weighted by ``weight``, e.g. its sample count."""
+        self.add_chunk(0, parameters, weight)
+        self.finish_update(weight)
+
+    def add_chunk(self, offset: int, chunk: torch.Tensor, weight: float = 1.0):
+        """Fold the slice ``[offset, offset + len(chunk))`` of an update, call :meth:`finish_update` once all slices of the update are folded."""
+        chunk = chunk.reshape(-1)
+        self.weighted_sum[offset:offset + chunk.numel()].add_(chunk.to(self.weighted_sum.dtype), alpha=weight)
+
+    def add_sparse(self, indices: torch.Tensor, values: torch.Tensor, weight: float = 1.0):
+        """Fold a sparse update whose entries outside ``indices`` are zero."""
+        self.weighted_sum.index_add_(0, indices, values.to(self.weighted_sum.dtype), alpha=weight)
+        self.finish_update(weight)
+
+    def add_sparse_update(self, base: torch.Tensor, indices: torch.Tensor, values: torch.Tensor, weight: float = 1.0):
+        """Fold the update ``base + delta`` of a sparse ``delta`` from the serialized model ``base`` without densifying the delta."""
+        self.add_chunk(0, base, weight)
+        self.weighted_sum.index_add_(0, indices, values.to(self.weighted_sum.dtype), alpha=weight)
+        self.finish_update(weight)
+
+    def finish_update(self, weight: float = 1.0):
+        self.total_weight += weight
+        self.num_updates += 1
+
+    def result(self) -> torch.Tensor:
+        """Return the weighted average of the folded updates.
+
+        Returns:
+            torch.Tensor: the weighted average, a new tensor.
+        """
+        if self.num_updates == 0:
+            raise ValueError("No update has been aggregated")
+        return self.weighted_sum / self.total_weight
+
+
+def staleness_weight(staleness: int, exponent: float = 0.5) -> float:
+    """Polynomial staleness discount ``1 / (1 + staleness) ** exponent`` of FedBuff."""
+    return 1.0 / (1.0 + max(0, staleness)) ** exponent
+
+
+class BufferedAggregator(StreamingAggregator):
+    """Buffer of asynchronous model deltas for FedBuff-style aggregation.
+
+    Clients train on whichever global version they last pulled, so every delta is discounted by :func:`staleness_weight` of its staleness, the number of versions the global model advanced since the client's base version. Once ``buffer_size`` deltas are folded in, :meth:`step` applies their weighted mean to the global model and empties the buffer.
+
+    Args:
+        numel (int): length of the serialized vectors.
+        buffer_size (int): number of deltas applied at once (K).
+        staleness_exponent (float, optional): exponent of the staleness discount. Defaults to 0.5.
+        server_lr (float, optional): server learning rate scaling the applied mean delta. Defaults to 1.0.
+        dtype (torch.dtype, optional): dtype of the running sum. Defaults to ``torch.float32``.
+    """
+    def __init__(self, numel: int, buffer_size: int, staleness_exponent: float = 0.5, server_lr: float = 1.0,
+                 dtype: torch.dtype = torch.float32):
+        super().__init__(numel, dtype=dtype)
+        self.buffer_size = buffer_size
+        self.staleness_exponent = staleness_exponent
+        self.server_lr = server_lr
+        self.staleness_sum = 0
+
+    def reset(self):
+        super().reset()
+        self.staleness_sum = 0
+
+    @property
+    def full(self) -> bool:
+        return self.num_updates >= self.buffer_size
+
+    def add_delta(self, delta: torch.Tensor, staleness: int, weight: float = 1.0):
+        """Fold a dense delta (client model minus its base version) weighted by ``weight``."""
+        self.add_chunk(0, delta, weight * staleness_weight(staleness, self.staleness_exponent))
+        self.finish_update(weight)
+        self.staleness_sum += staleness
+
+    def add_sparse_delta(self, indices: torch.Tensor, values: torch.Tensor, staleness: int, weight: float = 1.0):
+        """Fold a sparse delta whose entries outside ``indices`` are zero."""
+        alpha = weight * staleness_weight(staleness, self.staleness_exponent)
+        self.weighted_sum.index_add_(0, indices, values.to(self.weighted_sum.dtype), alpha=alpha)
+        self.finish_update(weight)
+        self.staleness_sum += staleness
+
+    def step(self, parameters: torch.Tensor) -> torch.Tensor:
+        """Apply the buffered deltas to the serialized global model and empty the buffer.
+
+        Args:
+            parameters (torch.Tensor): serialized global model the deltas are applied to.
+
+        Returns:
+            torch.Tensor: the new serialized global model, a new tensor.
+        """
+        new_parameters = parameters + self.result().mul_(self.server_lr).to(parameters.dtype)
+        self.reset()
+        return new_parameters
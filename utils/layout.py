@@ -0,0 +1,77 @@
+import fnmatch
+import hashlib
+import json
+
+import torch
+
+
+class LayoutManifest(object):
+    """The names, shapes, dtypes and offsets of the ``state_dict`` entries that peers exchange.
+
+    Peers agree on a manifest once, e.g. when a client joins, and then every round only sends the selected entries concatenated in manifest order, see :meth:`SerializationTool.serialize_selected_model`.
+
+    Args:
+        entries (list): list of dicts with keys ``name``, ``shape``, ``dtype``, ``offset`` and ``numel``.
+        covers_state_dict (bool, optional): whether the entries are the whole ``state_dict`` in order.
+    """
+    def __init__(self, entries: list, covers_state_dict: bool = False):
+        self.entries = entries
+        self.covers_state_dict = covers_state_dict
+
+    @classmethod
+    def build(cls, model: torch.nn.Module, include: list | None = None, exclude: list | None = None,
+              trainable_only: bool = False):
+        """Select ``state_dict`` entries of ``model`` by name pattern and trainability.
+
+        Args:
+            model (torch.nn.Module): model to describe.
+            include (list, optional): ``fnmatch`` patterns of entry names to keep, e.g. ``["encoder.layer.11.*"]``. Defaults to all entries.
+            exclude (list, optional): ``fnmatch`` patterns of entry names to drop, e.g. ``["embeddings.*"]``.
+            trainable_only (bool, optional): keep only parameters with ``requires_grad``, dropping buffers and frozen parameters. Defaults to ``False``.
+        """
+        state_dict = model.state_dict(keep_vars=True)
+        entries, offset = [], 0
+        for name, tensor in state_dict.items():
+            if include is not None and not any(fnmatch.fnmatchcase(name, pattern) for pattern in include):
+                continue
+            if exclude is not None and any(fnmatch.fnmatchcase(name, pattern) for pattern in exclude):
+                continue
+            if trainable_only and not (isinstance(tensor, torch.nn.Parameter) and tensor.requires_grad):
+                continue
+            entries.append({
+                "name": name,
+                "shape": list(tensor.shape),
+                "dtype": str(tensor.dtype).split(".")[-1],
+                "offset": offset,
+                "numel": tensor.numel()
+            })
+            offset += tensor.numel()
+        if len(entries) == 0:
+            raise ValueError("The layout selects no entry of the model")
+        return cls(entries, covers_state_dict=len(entries) == len(state_dict))
+
+    @classmethod
+    def from_list(cls, entries: list, covers_state_dict: bool = False):
+        return cls([dict(entry) for entry in entries], covers_state_dict=covers_state_dict)
+
+    def to_list(self) -> list:
+        return [dict(entry) for entry in self.entries]
+
+    @property
+    def names(self) -> list:
+        return [entry["name"] for entry in self.entries]
+
+    @property
+    def numel(self) -> int:
+        return sum(entry["numel"] for entry in self.entries)
+
+    def digest(self) -> str:
+        """Return a short hash of the manifest, equal on peers that agree on the layout."""
+        fields = [[entry["name"], list(entry["shape"]), entry["dtype"], entry["offset"]] for entry in self.entries]
+        return hashlib.blake2b(json.dumps(fields).encode(), digest_size=16).hexdigest()
+
+    def __eq__(self, other):
+        return isinstance(other, LayoutManifest) and self.digest() == other.digest()
+
+    def __len__(self):
+        return len(self.entries)
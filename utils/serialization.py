@@ -60,10 +60,16 @@ class SerializationTool(object):
         Please note that we update the implementation. 
         Current version of serialization includes the parameters in batchnorm layers.
 
+        If ``model`` has been flattened by :meth:`flatten_model` and the flat buffer covers the whole ``state_dict``, the flat buffer itself is returned without any copy (on CPU models). The returned view aliases the live parameters, ``clone`` it to keep a snapshot.
+
         Args:
             model (torch.nn.Module): model to serialize.
             cpu (bool, optional): Whether move the vectorized parameter to ``torch.device('cpu')`` by force. Defaults to ``True``. If ``cpu`` is ``False``, the returned vector is on the same device as ``model``.
         """
+        if SerializationTool._covers_state_dict(model):
+            flat_parameters = model._flat_parameters
+            return flat_parameters.cpu() if cpu else flat_parameters
+
         parameters = [param.data.view(-1) for param in model.state_dict().values()]
         m_parameters = torch.cat(parameters)
         if cpu:
@@ -84,6 +90,10 @@ class SerializationTool(object):
             serialized_parameters (torch.Tensor): serialized model parameters.
             mode (str): deserialize mode. Support "copy", "add", and "sub".
         """
+        if SerializationTool._covers_state_dict(model):
+            SerializationTool.deserialize_flat_model(model, serialized_parameters, mode=mode)
+            return
+
         current_index = 0  # keep track of where to read from grad_update
 
         for param in model.state_dict().values():
@@ -96,11 +106,11 @@ class SerializationTool(object):
             elif mode == "add":
                 param.add_(
                     serialized_parameters[current_index:current_index +
-                                                        numel].view(size))
+                                                        numel].view(size).to(param.dtype))
             elif mode == "sub":
                 param.sub_(
                     serialized_parameters[current_index:current_index +
-                                                        numel].view(size))
+                                                        numel].view(size).to(param.dtype))
             else:
                 raise ValueError(
                     "Invalid deserialize mode {}, require \"copy\", \"add\" or \"sub\" "
@@ -160,3 +170,135 @@ class SerializationTool(object):
                     "Invalid deserialize mode {}, require \"copy\", \"add\" or \"sub\" "
                     .format(mode))
             current_index += numel
+
+    @staticmethod
+    def flatten_model(model: torch.nn.Module, dtype: torch.dtype | None = None) -> torch.Tensor:
+        """Re-point the parameters and buffers of ``model`` at views into one contiguous flat buffer.
+
+        Every ``model.state_dict()`` entry of ``dtype`` is copied into the flat buffer in ``state_dict`` order, then ``param.data`` (or the registered buffer) is replaced by the matching view. Afterwards serializing is a view of the flat buffer and deserializing is a single vectorized operation, see :meth:`serialize_flat_model` and :meth:`deserialize_flat_model`.
+        NOTE: moving or casting the model afterwards (e.g. ``model.to(...)``) allocates new tensors and breaks the flat layout, call ``flatten_model`` again after it.
+
+        Args:
+            model (torch.nn.Module): model to flatten.
+            dtype (torch.dtype, optional): dtype of the flat buffer. Defaults to the dtype of the first floating-point entry of ``model.state_dict()``. Entries of other dtypes, e.g. ``num_batches_tracked``, keep their own storage.
+
+        Returns:
+            torch.Tensor: the flat buffer.
+        """
+        state_dict = model.state_dict(keep_vars=True)
+        if dtype is None:
+            dtype = next(tensor.dtype for tensor in state_dict.values() if tensor.is_floating_point())
+        entries = [(name, tensor) for name, tensor in state_dict.items() if tensor.dtype == dtype]
+        if len({id(tensor) for _, tensor in entries}) != len(entries):
+            raise ValueError("Models with shared (tied) parameters can not be flattened")
+
+        flat_parameters = torch.empty(sum(tensor.numel() for _, tensor in entries),
+                                      dtype=dtype, device=entries[0][1].device)
+        current_index = 0
+        for name, tensor in entries:
+            numel = tensor.numel()
+            view = flat_parameters[current_index:current_index + numel].view(tensor.shape)
+            view.copy_(tensor.data)
+            if isinstance(tensor, torch.nn.Parameter):
+                tensor.data = view
+            else:
+                module_name, _, buffer_name = name.rpartition(".")
+                model.get_submodule(module_name)._buffers[buffer_name] = view
+            current_index += numel
+
+        model._flat_parameters = flat_parameters
+        model._flat_parameter_names = [name for name, _ in entries]
+        model._flat_covers_state_dict = len(entries) == len(state_dict)
+        return flat_parameters
+
+    @staticmethod
+    def _covers_state_dict(model: torch.nn.Module) -> bool:
+        return getattr(model, "_flat_covers_state_dict", False)
+
+    @staticmethod
+    def serialize_flat_model(model: torch.nn.Module) -> torch.Tensor:
+        """Return the flat buffer of a model flattened by :meth:`flatten_model`, without any copy.
+
+        Args:
+            model (torch.nn.Module): flattened model.
+        """
+        flat_parameters = getattr(model, "_flat_parameters", None)
+        if flat_parameters is None:
+            raise ValueError("The model has not been flattened, call SerializationTool.flatten_model first")
+        return flat_parameters
+
+    @staticmethod
+    def deserialize_flat_model(model: torch.nn.Module,
+                               serialized_parameters: torch.Tensor,
+                               mode="copy"):
+        """Assign ``serialized_parameters`` to the flat buffer of ``model`` in a single vectorized operation.
+
+        Args:
+            model (torch.nn.Module): model flattened by :meth:`flatten_model`.
+            serialized_parameters (torch.Tensor): vector with the layout of the flat buffer.
+            mode (str): deserialize mode. Support "copy", "add", and "sub".
+        """
+        flat_parameters = SerializationTool.serialize_flat_model(model)
+        serialized_parameters = serialized_parameters.to(device=flat_parameters.device, dtype=flat_parameters.dtype)
+        if mode == "copy":
+            flat_parameters.copy_(serialized_parameters)
+        elif mode == "add":
+            flat_parameters.add_(serialized_parameters)
+        elif mode == "sub":
+            flat_parameters.sub_(serialized_parameters)
+        else:
+            raise ValueError(
+                "Invalid deserialize mode {}, require \"copy\", \"add\" or \"sub\" "
+                .format(mode))
+
+    @staticmethod
+    def serialize_selected_model(model: torch.nn.Module, layout, cpu: bool = True) -> torch.Tensor:
+        """Unfold only the ``state_dict`` entries selected by ``layout``, concatenated in manifest order.
+
+        Args:
+            model (torch.nn.Module): model to serialize.
+            layout (LayoutManifest): entries to serialize, see :class:`utils.layout.LayoutManifest`.
+            cpu (bool, optional): Whether move the vectorized parameter to ``torch.device('cpu')`` by force. Defaults to ``True``.
+        """
+        if layout.covers_state_dict:
+            return SerializationTool.serialize_model(model, cpu=cpu)
+
+        state_dict = model.state_dict()
+        parameters = [state_dict[name].view(-1) for name in layout.names]
+        m_parameters = torch.cat(parameters)
+        if cpu:
+            m_parameters = m_parameters.cpu()
+
+        return m_parameters
+
+    @staticmethod
+    def deserialize_selected_model(model: torch.nn.Module,
+                                   serialized_parameters: torch.Tensor,
+                                   layout,
+                                   mode="copy"):
+        """Assign the slices of ``serialized_parameters`` to the ``state_dict`` entries selected by ``layout``, other entries are left untouched.
+
+        Args:
+            model (torch.nn.Module): model to deserialize.
+            serialized_parameters (torch.Tensor): vector produced by :meth:`serialize_selected_model` with the same ``layout``.
+            layout (LayoutManifest): entries to deserialize.
+            mode (str): deserialize mode. Support "copy", "add", and "sub".
+        """
+        if layout.covers_state_dict:
+            SerializationTool.deserialize_model(model, serialized_parameters, mode=mode)
+            return
+
+        state_dict = model.state_dict()
+        for entry in layout.entries:
+            param = state_dict[entry["name"]]
+            values = serialized_parameters[entry["offset"]:entry["offset"] + entry["numel"]].view(param.size())
+            if mode == "copy":
+                param.copy_(values)
+            elif mode == "add":
+                param.add_(values.to(param.dtype))
+            elif mode == "sub":
+                param.sub_(values.to(param.dtype))
+            else:
+                raise ValueError(
+                    "Invalid deserialize mode {}, require \"copy\", \"add\" or \"sub\" "
+                    .format(mode))
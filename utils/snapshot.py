@@ -0,0 +1,107 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+import torch
+
+
+def model_hash(parameters: torch.Tensor) -> str:
+    """Content hash (BLAKE2b) of a serialized model, computed over its raw bytes without copying.
+
+    Args:
+        parameters (torch.Tensor): serialized model, e.g. the output of :meth:`SerializationTool.serialize_model`.
+
+    Returns:
+        str: hex digest of the flat parameter buffer.
+    """
+    parameters = parameters.detach().cpu().contiguous().reshape(-1)
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(str(parameters.dtype).encode())
+    digest.update(memoryview(parameters.view(torch.uint8).numpy()))
+    return digest.hexdigest()
+
+
+class SnapshotStore(object):
+    """Content-addressed on-disk store of serialized models with size-capped LRU eviction.
+
+    Every snapshot lives in ``<directory>/<hash>.bin``, snapshots are memory-mapped on read. The LRU order survives restarts through ``<directory>/index.json``, so a restarted client still knows which models it holds.
+
+    Args:
+        directory (str): directory of the snapshot files.
+        capacity_bytes (int, optional): maximum total size of the snapshots. Defaults to 4 GB.
+    """
+    def __init__(self, directory: str, capacity_bytes: int = 4 * 1024 * 1024 * 1024):
+        self.directory = directory
+        self.capacity_bytes = capacity_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._index_path = os.path.join(directory, "index.json")
+        self.index = OrderedDict()
+        if os.path.exists(self._index_path):
+            with open(self._index_path) as index_file:
+                for entry in json.load(index_file):
+                    if os.path.exists(self._path(entry["hash"])):
+                        self.index[entry["hash"]] = entry
+
+    def _path(self, snapshot_hash: str) -> str:
+        return os.path.join(self.directory, f"{snapshot_hash}.bin")
+
+    def _save_index(self):
+        with open(self._index_path, "w") as index_file:
+            json.dump(list(self.index.values()), index_file)
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(entry["nbytes"] for entry in self.index.values())
+
+    @property
+    def latest_hash(self):
+        """Hash of the most recently used snapshot, ``None`` if the store is empty."""
+        return next(reversed(self.index)) if len(self.index) > 0 else None
+
+    def __contains__(self, snapshot_hash: str):
+        return snapshot_hash in self.index
+
+    def put(self, parameters: torch.Tensor, snapshot_hash: str | None = None) -> str:
+        """Store ``parameters`` and mark it as most recently used.
+
+        Args:
+            parameters (torch.Tensor): serialized model.
+            snapshot_hash (str, optional): known :func:`model_hash` of ``parameters``, computed if not given.
+
+        Returns:
+            str: the hash of the snapshot.
+        """
+        if snapshot_hash is None:
+            snapshot_hash = model_hash(parameters)
+        if snapshot_hash not in self.index:
+            parameters = parameters.detach().cpu().contiguous().reshape(-1)
+            parameters.view(torch.uint8).numpy().tofile(self._path(snapshot_hash))
+            self.index[snapshot_hash] = {
+                "hash": snapshot_hash,
+                "dtype": str(parameters.dtype).split(".")[-1],
+                "numel": parameters.numel(),
+                "nbytes": parameters.numel() * parameters.element_size()
+            }
+        self.index.move_to_end(snapshot_hash)
+        self._evict()
+        self._save_index()
+        return snapshot_hash
+
+    def get(self, snapshot_hash: str):
+        """Memory-map the snapshot ``snapshot_hash``, ``None`` if it is not stored.
+
+        The returned tensor is a private (copy-on-write) mapping of the file, writing to it does not change the snapshot.
+        """
+        entry = self.index.get(snapshot_hash)
+        if entry is None:
+            return None
+        self.index.move_to_end(snapshot_hash)
+        self._save_index()
+        return torch.from_file(self._path(snapshot_hash), shared=False, size=entry["numel"],
+                               dtype=getattr(torch, entry["dtype"]))
+
+    def _evict(self):
+        while self.total_bytes > self.capacity_bytes and len(self.index) > 1:
+            snapshot_hash, _ = self.index.popitem(last=False)
+            os.remove(self._path(snapshot_hash))
@@ -0,0 +1,91 @@
+import numpy as np
+import torch
+
+
+def encode_indices(indices: torch.Tensor) -> torch.Tensor:
+    """Encode sorted indices as delta-encoded LEB128 varints.
+
+    Args:
+        indices (torch.Tensor): 1-D tensor of ascending non-negative indices.
+
+    Returns:
+        torch.Tensor: ``torch.uint8`` tensor of the encoded bytes.
+    """
+    deltas = np.diff(indices.cpu().numpy().astype(np.uint64), prepend=np.uint64(0))
+    num_bytes = np.ones(len(deltas), dtype=np.int64)
+    remaining = deltas >> np.uint64(7)
+    while remaining.any():
+        num_bytes += remaining > 0
+        remaining >>= np.uint64(7)
+    offsets = np.cumsum(num_bytes) - num_bytes
+    encoded = np.empty(int(num_bytes.sum()), dtype=np.uint8)
+    for position in range(int(num_bytes.max(initial=0))):
+        mask = num_bytes > position
+        payload = (deltas[mask] >> np.uint64(7 * position)) & np.uint64(0x7F)
+        continuation = np.where(num_bytes[mask] > position + 1, 0x80, 0).astype(np.uint64)
+        encoded[offsets[mask] + position] = (payload | continuation).astype(np.uint8)
+    return torch.from_numpy(encoded)
+
+
+def decode_indices(encoded: torch.Tensor) -> torch.Tensor:
+    """Decode the output of :func:`encode_indices` back to a ``torch.int64`` index tensor.
+
+    Args:
+        encoded (torch.Tensor): ``torch.uint8`` tensor of delta-encoded varints.
+
+    Returns:
+        torch.Tensor: 1-D tensor of ascending indices.
+    """
+    data = np.asarray(encoded.cpu().numpy(), dtype=np.uint8)
+    if len(data) == 0:
+        return torch.empty(0, dtype=torch.int64)
+    is_last = (data & 0x80) == 0
+    starts = np.flatnonzero(np.concatenate(([True], is_last[:-1])))
+    group = np.cumsum(np.concatenate(([0], is_last[:-1].astype(np.int64))))
+    position = np.arange(len(data)) - starts[group]
+    shifted = (data & 0x7F).astype(np.uint64) << (np.uint64(7) * position.astype(np.uint64))
+    deltas = np.bitwise_or.reduceat(shifted, starts)
+    return torch.from_numpy(np.cumsum(deltas).astype(np.int64))
+
+
+class TopKSparsifier(object):
+    """Top-k (or threshold) sparsification of model updates with error feedback.
+
+    The entries dropped in one round are kept in a residual buffer and added to the next round's update, so no update mass is lost over time.
+
+    Args:
+        ratio (float, optional): fraction of entries to keep. Defaults to ``0.01``.
+        k (int, optional): number of entries to keep, overrides ``ratio``.
+        threshold (float, optional): keep entries whose magnitude is at least ``threshold``, overrides ``k`` and ``ratio``.
+    """
+    def __init__(self, ratio: float = 0.01, k: int | None = None, threshold: float | None = None):
+        self.ratio = ratio
+        self.k = k
+        self.threshold = threshold
+        self.residual = None
+
+    def reset(self):
+        self.residual = None
+
+    def compress(self, update: torch.Tensor):
+        """Select the entries of ``update`` plus the residual to send.
+
+        Args:
+            update (torch.Tensor): dense update vector, e.g. ``local_model - received_global_model``.
+
+        Returns:
+            tuple: ``(encoded_indices, values)`` where ``encoded_indices`` is the output of :func:`encode_indices`.
+        """
+        update = update.detach().reshape(-1)
+        if self.residual is None:
+            self.residual = torch.zeros_like(update)
+        accumulated = self.residual.add_(update)
+        if self.threshold is not None:
+            indices = torch.nonzero(accumulated.abs() >= self.threshold).view(-1)
+        else:
+            k = self.k if self.k is not None else max(1, int(self.ratio * accumulated.numel()))
+            k = min(k, accumulated.numel())
+            indices = torch.topk(accumulated.abs(), k, sorted=False).indices.sort().values
+        values = accumulated[indices].clone()
+        accumulated[indices] = 0
+        return encode_indices(indices), values
@@ -0,0 +1,95 @@
+from collections import OrderedDict
+
+import torch
+
+from utils.snapshot import model_hash
+from utils.sparsification import decode_indices, encode_indices
+
+
+class ModelVersionStore(object):
+    """Keep a small ring of recent serialized model versions to build delta downloads.
+
+    A client that reports the version it holds gets only the entries that changed since that version, or the full model if that is smaller or the version has left the ring. Deltas carry the new values (not differences), so applying them is exact.
+
+    Args:
+        capacity (int, optional): number of versions kept. Defaults to ``4``.
+    """
+    def __init__(self, capacity: int = 4):
+        if capacity < 1:
+            raise ValueError("The capacity of ModelVersionStore must be at least 1")
+        self.capacity = capacity
+        self.versions = OrderedDict()
+        self.latest_version = -1
+        self.latest_hash = None
+
+    def commit(self, parameters: torch.Tensor) -> int:
+        """Store a copy of ``parameters`` as the next version.
+
+        Returns:
+            int: the new version number.
+        """
+        self.latest_version += 1
+        self.versions[self.latest_version] = parameters.detach().clone()
+        self.latest_hash = model_hash(self.versions[self.latest_version])
+        while len(self.versions) > self.capacity:
+            self.versions.popitem(last=False)
+        return self.latest_version
+
+    @property
+    def latest(self) -> torch.Tensor:
+        return self.versions[self.latest_version]
+
+    def get(self, version: int | None):
+        return self.versions.get(version)
+
+    def make_payload(self, base_version: int | None, snapshot_hash: str | None = None) -> dict:
+        """Build the message content that brings a client from ``base_version`` to the latest version.
+
+        Args:
+            base_version (int): version the client holds, ``None`` or ``-1`` if it holds none.
+            snapshot_hash (str, optional): :func:`model_hash` of a snapshot the client has stored locally.
+
+        Returns:
+            dict: ``{"version", "model_hash"}`` if the client's snapshot is the latest model, ``{"version", "model_hash", "model"}`` for a full download or ``{"version", "model_hash", "base_version", "indices", "values", "numel"}`` for a delta.
+        """
+        latest = self.latest
+        if snapshot_hash is not None and snapshot_hash == self.latest_hash:
+            return {"version": self.latest_version, "model_hash": self.latest_hash}
+        full_payload = {"version": self.latest_version, "model_hash": self.latest_hash, "model": latest}
+        base = self.get(base_version)
+        if base is None:
+            return full_payload
+        indices = torch.nonzero(latest != base).view(-1)
+        encoded_indices = encode_indices(indices)
+        delta_bytes = encoded_indices.numel() + indices.numel() * latest.element_size()
+        if delta_bytes >= latest.numel() * latest.element_size():
+            return full_payload
+        return {
+            "version": self.latest_version,
+            "model_hash": self.latest_hash,
+            "base_version": base_version,
+            "indices": encoded_indices,
+            "values": latest[indices],
+            "numel": latest.numel()
+        }
+
+    @staticmethod
+    def apply_payload(parameters: torch.Tensor | None, payload: dict) -> torch.Tensor:
+        """Rebuild the latest serialized model on the client.
+
+        Args:
+            parameters (torch.Tensor): serialized model of ``payload["base_version"]``, ignored for a full download.
+            payload (dict): output of :meth:`make_payload`.
+
+        Returns:
+            torch.Tensor: the serialized model of ``payload["version"]``.
+        """
+        if "model" in payload:
+            return payload["model"]
+        if "indices" not in payload:
+            raise ValueError(f"The payload refers to the local snapshot {payload['model_hash']}")
+        if parameters is None or parameters.numel() != payload["numel"]:
+            raise ValueError("A delta download requires the parameters of its base version")
+        parameters = parameters.clone()
+        parameters[decode_indices(payload["indices"])] = payload["values"].to(parameters.dtype)
+        return parameters